@@ -0,0 +1,37 @@
+"""Add composite indexes for order hot paths
+
+Revision ID: 003_order_hot_path_indexes
+Revises: 002_add_product_stock
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '003_order_hot_path_indexes'
+down_revision = '002_add_product_stock'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Kitchen board: status IN (...) ORDER BY created_at
+    op.create_index('ix_orders_status_created_at', 'orders', ['status', 'created_at'])
+    # Table summary / per-table filters
+    op.create_index('ix_orders_table_id_status', 'orders', ['table_id', 'status'])
+    # Date-range reports and created_at DESC listings
+    op.create_index('ix_orders_created_at_id', 'orders', ['created_at', 'id'])
+
+    # Foreign keys used by every item join
+    op.create_index('ix_order_items_order_id', 'order_items', ['order_id'])
+    op.create_index('ix_order_items_product_id', 'order_items', ['product_id'])
+
+
+def downgrade():
+    op.drop_index('ix_order_items_product_id', table_name='order_items')
+    op.drop_index('ix_order_items_order_id', table_name='order_items')
+    op.drop_index('ix_orders_created_at_id', table_name='orders')
+    op.drop_index('ix_orders_table_id_status', table_name='orders')
+    op.drop_index('ix_orders_status_created_at', table_name='orders')
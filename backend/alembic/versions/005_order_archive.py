@@ -0,0 +1,63 @@
+"""Add archived_orders / archived_order_items cold tier
+
+Revision ID: 005_order_archive
+Revises: 004_idempotency_keys
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '005_order_archive'
+down_revision = '004_idempotency_keys'
+branch_labels = None
+depends_on = None
+
+# orders.status ile aynı tip; PostgreSQL'de mevcut orderstatus tipi yeniden oluşturulmaz
+ORDER_STATUSES = ('BEKLIYOR', 'HAZIRLANIYOR', 'HAZIR', 'TESLIM_EDILDI', 'IPTAL')
+order_status = sa.Enum(*ORDER_STATUSES, name='orderstatus').with_variant(
+    postgresql.ENUM(*ORDER_STATUSES, name='orderstatus', create_type=False), 'postgresql'
+)
+
+
+def upgrade():
+    op.create_table('archived_orders',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('table_id', sa.Integer(), nullable=True),
+        sa.Column('status', order_status, nullable=True),
+        sa.Column('customer_notes', sa.String(), nullable=True),
+        sa.Column('total_amount', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['table_id'], ['tables.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_archived_orders_created_at'), 'archived_orders', ['created_at'], unique=False)
+    op.create_table('archived_order_items',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=True),
+        sa.Column('product_id', sa.Integer(), nullable=True),
+        sa.Column('quantity', sa.Integer(), nullable=True),
+        sa.Column('unit_price', sa.Float(), nullable=False),
+        sa.Column('extras', sa.JSON(), nullable=True),
+        sa.Column('subtotal', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['order_id'], ['archived_orders.id'], ),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_archived_order_items_order_id'), 'archived_order_items', ['order_id'], unique=False)
+    op.create_index(op.f('ix_archived_order_items_product_id'), 'archived_order_items', ['product_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_archived_order_items_product_id'), table_name='archived_order_items')
+    op.drop_index(op.f('ix_archived_order_items_order_id'), table_name='archived_order_items')
+    op.drop_table('archived_order_items')
+    op.drop_index(op.f('ix_archived_orders_created_at'), table_name='archived_orders')
+    op.drop_table('archived_orders')
@@ -0,0 +1,41 @@
+"""Add print_jobs table for the ESC/POS print spooler
+
+Revision ID: 006_print_jobs
+Revises: 005_order_archive
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006_print_jobs'
+down_revision = '005_order_archive'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('print_jobs',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('printer', sa.String(), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=True),
+        sa.Column('kind', sa.String(), nullable=True),
+        sa.Column('payload', sa.LargeBinary(), nullable=False),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=True),
+        sa.Column('last_error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('printed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_print_jobs_id'), 'print_jobs', ['id'], unique=False)
+    op.create_index('ix_print_jobs_printer_status_id', 'print_jobs', ['printer', 'status', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_print_jobs_printer_status_id', table_name='print_jobs')
+    op.drop_index(op.f('ix_print_jobs_id'), table_name='print_jobs')
+    op.drop_table('print_jobs')
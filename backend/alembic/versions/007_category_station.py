@@ -0,0 +1,25 @@
+"""Add categories.station for kitchen station routing
+
+Revision ID: 007_category_station
+Revises: 006_print_jobs
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '007_category_station'
+down_revision = '006_print_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('categories', sa.Column('station', sa.String(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('categories', 'station')
@@ -0,0 +1,27 @@
+"""Add print_jobs claim columns so only one worker sends a job
+
+Revision ID: 008_print_job_claims
+Revises: 007_category_station
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '008_print_job_claims'
+down_revision = '007_category_station'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('print_jobs', sa.Column('claimed_by', sa.String(), nullable=True))
+    op.add_column('print_jobs', sa.Column('claimed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('print_jobs', 'claimed_at')
+    op.drop_column('print_jobs', 'claimed_by')
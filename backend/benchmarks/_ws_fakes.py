@@ -0,0 +1,72 @@
+"""WebSocket benchmark'larının ortak sahte soketi ve örnek sipariş mesajları."""
+
+import asyncio
+import json
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Union
+
+
+class FakeSocket:
+    """
+    Ağ yerine kareleri kaydeden sahte WebSocket. delay: kare başına gönderim
+    süresi (0 ise bir döngü turu), broken: her gönderim bağlantı hatası verir,
+    counter: paylaşılan sayaçta name anahtarına kare sayar, on_frame(soket,
+    kare): gelen her karede çağrılır (ör. pong, sızıntı kontrolü).
+    """
+
+    def __init__(self, name: str = "ws", delay: float = 0.0, broken: bool = False,
+                 counter: Optional[Counter] = None, on_frame: Optional[Callable] = None, **attrs):
+        self.name = name
+        self.delay = delay
+        self.broken = broken
+        self.counter = counter
+        self.on_frame = on_frame
+        self.frames: List[Union[str, bytes]] = []
+        self.closed_at: Optional[float] = None
+        self.__dict__.update(attrs)
+
+    async def send_text(self, text: str):
+        await self._send(text)
+
+    async def send_bytes(self, data: bytes):
+        await self._send(data)
+
+    async def _send(self, frame):
+        if self.broken:
+            raise ConnectionResetError("istemci gitti")
+        await asyncio.sleep(self.delay)
+        self.frames.append(frame)
+        if self.counter is not None:
+            self.counter[self.name] += 1
+        if self.on_frame is not None:
+            self.on_frame(self, frame)
+
+    async def close(self, code: int = 1000):
+        self.closed_at = time.monotonic()
+
+    @property
+    def closed(self) -> bool:
+        return self.closed_at is not None
+
+
+def order_entries(text: str) -> List[Dict[str, Any]]:
+    """Bir karedeki sipariş kayıtları (tekil, toplu liste veya "orders_batch")."""
+    message = json.loads(text)
+    events = message["data"] if message["type"] == "orders_batch" else [message]
+    return [entry for event in events
+            for entry in (event["data"] if isinstance(event["data"], list) else [event["data"]])]
+
+
+def sample_order(order_id: int, items: int = 6, tables: int = 60) -> Dict[str, Any]:
+    """order_created mesajındaki data: istasyonlu kalemlerle tipik bir sipariş."""
+    table = order_id % tables + 1
+    return {
+        "id": order_id, "table_id": table, "table_number": table, "table_name": f"Masa {table}",
+        "status": "pending", "customer_notes": None, "total_amount": 92.0 * items,
+        "created_at": datetime(2026, 10, 17, 20, 15).isoformat(),
+        "items": [{"product_id": 100 + i, "product_name": f"Ürün {i % 7}", "quantity": 1 + i % 3,
+                   "unit_price": 92.0, "notes": None, "station": ("grill", "cold", "bar")[i % 3]}
+                  for i in range(items)]
+    }
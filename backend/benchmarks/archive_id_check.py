@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Arşivleme ile SQLite id tekrar kullanımı (regresyon kontrolü).
+
+orders / order_items AUTOINCREMENT'siz olduğundan SQLite silinen en büyük
+rowid'i sonraki satıra tekrar verir. Sıra: kalemli A ve kalemsiz B
+siparişi teslim edilip arşivlenir, ardından C ve D oluşturulup tekrar
+arşivlenir. Önceden ikinci çalıştırma "UNIQUE constraint failed:
+archived_order_items.id" ile düşüyor, sonraki tüm çalıştırmalar da
+başarısız oluyordu. Her çalıştırma başarılı olmalı ve arşivdeki id'ler
+sıcak tablodakilerle çakışmamalı.
+
+    python benchmarks/archive_id_check.py
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "archive_id_check.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["ARCHIVE_AFTER_DAYS"] = "0"  # zamanlanmış arşivleyici kapalı; elle tetiklenir
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from fastapi.testclient import TestClient
+
+import main
+from models import get_session, Table, Category, Product, Order, OrderItem, OrderStatus
+
+
+def create_order(with_item: bool) -> int:
+    db = next(get_session())
+    order = Order(table_id=1, status=OrderStatus.TESLIM_EDILDI, total_amount=100.0 if with_item else 0.0)
+    db.add(order)
+    db.flush()
+    if with_item:
+        db.add(OrderItem(order_id=order.id, product_id=1, quantity=1, unit_price=100.0, subtotal=100.0))
+    db.commit()
+    order_id = order.id
+    db.close()
+    return order_id
+
+
+def ids(table: str):
+    conn = sqlite3.connect(DB_PATH)
+    rows = [row[0] for row in conn.execute(f"SELECT id FROM {table} ORDER BY id")]
+    conn.close()
+    return rows
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=5, help="ek oluştur/arşivle turu")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with TestClient(main.app) as client:
+        db = next(get_session())
+        db.add(Table(name="Masa 1", number=1))
+        db.add(Category(name="Ana"))
+        db.commit()
+        db.add(Product(name="Kebap", price=100.0, category_id=1))
+        db.commit()
+        db.close()
+
+        token = client.post("/api/auth/login", json={"username": "admin", "password": "admin123"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        def archive():
+            response = client.post("/api/admin/archive/run?older_than_days=0", headers=headers)
+            assert response.status_code == 200, response.text
+            return response.json()["archived"]
+
+        create_order(True)   # A
+        create_order(False)  # B
+        archived = [archive()]
+        for _ in range(args.rounds):
+            create_order(True)   # C
+            create_order(False)  # D
+            archived.append(archive())
+
+        for hot, cold in (("orders", "archived_orders"), ("order_items", "archived_order_items")):
+            overlap = set(ids(hot)) & set(ids(cold))
+            assert not overlap, f"{hot} ile {cold} id çakışması: {sorted(overlap)}"
+        print(f"arşivlenen/çalıştırma: {archived}")
+        print(f"sıcak: {ids('orders')} kalem {ids('order_items')}  arşiv: {ids('archived_orders')} kalem {ids('archived_order_items')}")
+
+    assert sum(archived) > 0
+    print("OK: arşivleme id tekrar kullanımıyla çakışmıyor")
+    os.remove(DB_PATH)
+
+
+if __name__ == "__main__":
+    main_()
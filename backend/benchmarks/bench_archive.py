@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Sıcak/soğuk sipariş arşivi doğrulaması ve ölçümü.
+
+N sipariş yükler (bir yıla yayılmış), rapor endpoint'lerini ve sıcak yol
+sorgularını ölçer, 30 günden eski teslim/iptal siparişleri arşive taşır ve
+aynı ölçümleri tekrarlar. Raporların çıktısı arşivlemeden önce ve sonra
+birebir aynı olmalı; sıcak tablo küçülmelidir.
+
+    python benchmarks/bench_archive.py --orders 200000
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench_archive.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["ARCHIVE_AFTER_DAYS"] = "0"  # zamanlanmış arşivleyici kapalı; elle tetiklenir
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from fastapi.testclient import TestClient
+
+import main
+from bench_order_indexes import seed
+
+REPORTS = [
+    "/api/admin/dashboard",
+    "/api/admin/reports/sales",
+    "/api/admin/reports/sales?start_date=2000-01-01",
+    "/api/admin/reports/product-matrix",
+    "/api/orders?limit=50",
+    "/api/tables/stats/summary",
+]
+
+
+def timed(client, url: str, headers: dict, repeat: int):
+    timings, body = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url, headers=headers)
+        timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, f"{url}: {response.text}"
+        body = response.json()
+    return statistics.median(timings), body
+
+
+def row_counts():
+    conn = sqlite3.connect(DB_PATH)
+    counts = {t: conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+              for t in ("orders", "order_items", "archived_orders", "archived_order_items")}
+    conn.close()
+    return counts
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    print(f"Seeding {args.orders:,} orders ...")
+    seed(DB_PATH, args.orders, tables=60, products=80)
+
+    with TestClient(main.app) as client:
+        token = client.post("/api/auth/login", json={"username": "admin", "password": "admin123"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        before = {url: timed(client, url, headers, args.repeat) for url in REPORTS}
+
+        started = time.perf_counter()
+        archived = client.post("/api/admin/archive/run?older_than_days=30", headers=headers).json()["archived"]
+        print(f"archived {archived:,} orders in {time.perf_counter() - started:.1f}s -> {row_counts()}")
+
+        after = {url: timed(client, url, headers, args.repeat) for url in REPORTS}
+
+    print(f"{'endpoint':48} {'hot+cold ms':>12} {'archived ms':>12}")
+    for url in REPORTS:
+        print(f"{url:48} {before[url][0]:>12.2f} {after[url][0]:>12.2f}")
+    for url in REPORTS:
+        if url.startswith("/api/admin"):
+            assert before[url][1] == after[url][1], f"{url} arşivlemeden sonra farklı sonuç verdi"
+    assert archived > 0
+    print("OK: raporlar arşivden önce ve sonra aynı")
+    os.remove(DB_PATH)
+
+
+if __name__ == "__main__":
+    main_()
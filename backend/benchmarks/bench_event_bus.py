@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Çok işçili kurulumda olay yolu (EVENT_BUS=redis) doğrulaması ve gecikmesi.
+
+Aynı veritabanı ve Redis ile iki ayrı uvicorn süreci başlatılır. Siparişler
+A işçisine verilir; B işçisine bağlı mutfak ekranının bunları alması, B'nin
+mutfak panosunun güncellenmesi ve B'de yapılan durum değişikliğinin A'nın
+panosuna yansıması beklenir. Sipariş isteğinden B'deki ekrana ulaşma süresi
+raporlanır. Çalışan bir Redis gerekir (docker-compose'daki redis servisi).
+
+    REDIS_URL=redis://localhost:6379 python benchmarks/bench_event_bus.py --orders 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DB_PATH = os.path.join(tempfile.mkdtemp(), "event_bus.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.append(str(BACKEND_DIR))
+
+import websockets
+
+from models import get_session, Table, Category, Product
+
+
+def start_worker(port: int, redis_url: str) -> subprocess.Popen:
+    env = dict(os.environ, EVENT_BUS="redis", REDIS_URL=redis_url,
+               USER_STATS_JOURNAL=os.path.join(os.path.dirname(DB_PATH), f"journal-{port}"))
+    process = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+                               cwd=BACKEND_DIR, env=env)
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/health")
+            return process
+        except Exception:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError(f"işçi başlamadı (port {port})")
+
+
+def api(port: int, method: str, path: str, body=None):
+    request = urllib.request.Request(f"http://127.0.0.1:{port}/api{path}", method=method,
+                                     data=json.dumps(body).encode() if body is not None else None,
+                                     headers={"Content-Type": "application/json"})
+    return json.loads(urllib.request.urlopen(request).read())
+
+
+async def run(orders: int, port_a: int, port_b: int):
+    latencies = []
+    async with websockets.connect(f"ws://127.0.0.1:{port_b}/ws") as kitchen:
+        await kitchen.send(json.dumps({"type": "register", "client_type": "kitchen"}))
+        await asyncio.sleep(0.3)
+        order_ids = []
+        for _ in range(orders):
+            started = time.perf_counter()
+            order = await asyncio.to_thread(api, port_a, "POST", "/orders", {"table_number": 1, "items": [{"product_id": 1, "quantity": 1}]})
+            message = json.loads(await asyncio.wait_for(kitchen.recv(), 5))
+            latencies.append((time.perf_counter() - started) * 1000)
+            assert message["type"] == "order_created" and message["data"]["id"] == order["id"], message
+            order_ids.append(order["id"])
+
+        board_b = [t["id"] for t in await asyncio.to_thread(api, port_b, "GET", "/orders/kitchen-tickets")]
+        assert board_b == order_ids, "B panosu A'daki siparişleri içermeli"
+
+        await asyncio.to_thread(api, port_b, "PUT", "/orders/status/bulk", {"order_ids": order_ids, "status": "ready"})
+        for _ in range(50):
+            if not await asyncio.to_thread(api, port_a, "GET", "/orders/kitchen-tickets"):
+                break
+            await asyncio.sleep(0.05)
+        else:
+            raise AssertionError("B'deki durum değişikliği A panosuna yansımadı")
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=50)
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL", "redis://localhost:6379"))
+    parser.add_argument("--ports", type=int, nargs=2, default=(8101, 8102))
+    args = parser.parse_args()
+
+    workers = [start_worker(args.ports[0], args.redis_url)]
+    try:
+        db = next(get_session())
+        db.add(Table(name="Masa 1", number=1))
+        db.add(Category(name="Ana"))
+        db.commit()
+        db.add(Product(name="Kebap", price=100.0, category_id=1))
+        db.commit()
+        db.close()
+        workers.append(start_worker(args.ports[1], args.redis_url))
+
+        latencies = asyncio.run(run(args.orders, *args.ports))
+        latencies.sort()
+        print(f"{args.orders} sipariş A -> B mutfak: ort {statistics.mean(latencies):.1f} ms, "
+              f"p50 {latencies[len(latencies) // 2]:.1f} ms, en kötü {latencies[-1]:.1f} ms")
+        print("OK: işçiler arası olay yolu")
+    finally:
+        for worker in workers:
+            worker.terminate()
+            worker.wait()
+
+
+if __name__ == "__main__":
+    main()
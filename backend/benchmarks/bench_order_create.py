@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+POST /api/orders gecikme ölçümü (1, 10 ve 50 kalemli siparişler).
+
+Geçici bir SQLite veritabanı üzerinde uygulamayı ASGI üzerinden çalıştırır;
+her sipariş boyutu için medyan/p95 gecikmeyi, istek başına SQL ifadesi ve
+commit sayısını yazdırır.
+
+    python benchmarks/bench_order_create.py --requests 200
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench_create.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import main
+from models import get_async_engine, get_session, Table, Category, Product, Inventory
+
+PRODUCTS = 50
+
+
+def seed():
+    db = next(get_session())
+    db.add(Table(name="Masa 1", number=1))
+    db.add(Category(name="Bench"))
+    db.commit()
+    db.add_all([Product(name=f"Ürün {i}", price=10.0 + i, category_id=1) for i in range(1, PRODUCTS + 1)])
+    db.commit()
+    db.add_all([Inventory(product_id=i, quantity=10_000_000) for i in range(1, PRODUCTS + 1)])
+    db.commit()
+    db.close()
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    counters = {"statements": 0, "commits": 0}
+
+    with TestClient(main.app) as client:
+        seed()
+        engine = get_async_engine().sync_engine
+        event.listen(engine, "before_cursor_execute", lambda *a: counters.__setitem__("statements", counters["statements"] + 1))
+        event.listen(engine, "commit", lambda *a: counters.__setitem__("commits", counters["commits"] + 1))
+
+        print(f"{'items':>5} {'median ms':>10} {'p95 ms':>8} {'stmts/req':>10} {'commits/req':>12}")
+        for size in args.sizes:
+            payload = {
+                "table_number": 1,
+                "items": [{"product_id": (i % PRODUCTS) + 1, "quantity": 1} for i in range(size)],
+            }
+            client.post("/api/orders", json=payload)  # ısınma
+            counters.update(statements=0, commits=0)
+            timings = []
+            for _ in range(args.requests):
+                started = time.perf_counter()
+                response = client.post("/api/orders", json=payload)
+                timings.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 200, response.text
+            timings.sort()
+            print(
+                f"{size:>5} {statistics.median(timings):>10.2f} {timings[int(len(timings) * 0.95) - 1]:>8.2f} "
+                f"{counters['statements'] / args.requests:>10.1f} {counters['commits'] / args.requests:>12.1f}"
+            )
+    os.remove(DB_PATH)
+
+
+if __name__ == "__main__":
+    main_()
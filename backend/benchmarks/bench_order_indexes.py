@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Sipariş sıcak yolları için indeks karşılaştırması.
+
+Geçici bir SQLite veritabanına N sipariş (varsayılan 1.000.000) yükler ve
+mutfak, masa özeti ve rapor sorgularının EXPLAIN QUERY PLAN çıktısını ve
+sürelerini 003_order_hot_path_indexes indeksleri olmadan ve varken yazdırır.
+
+    python benchmarks/bench_order_indexes.py --orders 1000000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine, select, func
+from models import Base, Order, OrderItem, OrderStatus, Table
+
+NEW_INDEXES = [
+    "ix_orders_status_created_at",
+    "ix_orders_table_id_status",
+    "ix_orders_created_at_id",
+    "ix_order_items_order_id",
+    "ix_order_items_product_id",
+]
+
+ACTIVE = [OrderStatus.BEKLIYOR, OrderStatus.HAZIRLANIYOR]
+
+
+def build_queries(now: datetime):
+    """Endpoint'lerdeki sorguların birebir karşılıkları."""
+    return {
+        "kitchen (status IN .. ORDER BY created_at)": select(Order.id).filter(
+            Order.status.in_(ACTIVE)
+        ).order_by(Order.created_at.asc()),
+        "order items (selectinload)": select(OrderItem).filter(
+            OrderItem.order_id.in_([1, 500, 250000, 999999])
+        ),
+        "/tables/stats/summary": select(func.count(func.distinct(Table.id))).join(Order).filter(
+            Table.is_active == True,
+            Order.created_at >= now - timedelta(hours=2),
+            ~Order.status.in_([OrderStatus.TESLIM_EDILDI, OrderStatus.IPTAL]),
+        ),
+        "active orders of table 7": select(Order.id).filter(
+            Order.table_id == 7, Order.status.in_(ACTIVE)
+        ),
+        "sales report (last 7 days)": select(func.sum(Order.total_amount)).filter(
+            Order.created_at >= now - timedelta(days=7), Order.status != OrderStatus.IPTAL
+        ),
+        "product volume (product 3)": select(func.sum(OrderItem.quantity)).filter(
+            OrderItem.product_id == 3
+        ),
+    }
+
+
+def seed(path: str, orders: int, tables: int, products: int):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    for name in NEW_INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+    now = datetime.now()
+    conn.executemany(
+        "INSERT INTO tables (id, name, number, is_active, created_at) VALUES (?, ?, ?, 1, ?)",
+        [(i, f"Masa {i}", i, now) for i in range(1, tables + 1)],
+    )
+    conn.executemany(
+        "INSERT INTO products (id, name, price, is_featured, is_active, created_at) VALUES (?, ?, ?, 0, 1, ?)",
+        [(i, f"Ürün {i}", 10.0 + i, now) for i in range(1, products + 1)],
+    )
+
+    rnd = random.Random(42)
+    history = ["TESLIM_EDILDI"] * 18 + ["IPTAL"]
+    batch_orders, batch_items, item_id = [], [], 0
+    span = 365 * 24 * 3600
+    for order_id in range(1, orders + 1):
+        # Son birkaç yüz sipariş aktif, geri kalanı geçmiş
+        recent = order_id > orders - 300
+        status = rnd.choice(["BEKLIYOR", "HAZIRLANIYOR", "HAZIR"]) if recent else rnd.choice(history)
+        created = now - timedelta(seconds=(orders - order_id) * span / orders)
+        batch_orders.append((order_id, rnd.randint(1, tables), status, 0.0, created, created))
+        for _ in range(rnd.randint(1, 4)):
+            item_id += 1
+            batch_items.append((item_id, order_id, rnd.randint(1, products), 1, 25.0, "{}", 25.0, created))
+        if len(batch_orders) >= 50000:
+            _flush(conn, batch_orders, batch_items)
+    _flush(conn, batch_orders, batch_items)
+    conn.commit()
+    conn.close()
+    return now
+
+
+def _flush(conn, batch_orders, batch_items):
+    conn.executemany(
+        "INSERT INTO orders (id, table_id, status, total_amount, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+        batch_orders,
+    )
+    conn.executemany(
+        "INSERT INTO order_items (id, order_id, product_id, quantity, unit_price, extras, subtotal, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        batch_items,
+    )
+    batch_orders.clear()
+    batch_items.clear()
+
+
+def run(engine, queries, repeat: int):
+    results = {}
+    with engine.connect() as conn:
+        for name, stmt in queries.items():
+            sql = str(stmt.compile(engine, compile_kwargs={"literal_binds": True}))
+            plan = [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                conn.exec_driver_sql(sql).fetchall()
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = (plan, statistics.median(timings))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--tables", type=int, default=60)
+    parser.add_argument("--products", type=int, default=80)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_indexes.db")
+    print(f"Seeding {args.orders:,} orders into {path} ...")
+    started = time.perf_counter()
+    now = seed(path, args.orders, args.tables, args.products)
+    print(f"Seeded in {time.perf_counter() - started:.1f}s\n")
+
+    engine = create_engine(f"sqlite:///{path}")
+    queries = build_queries(now)
+    before = run(engine, queries, args.repeat)
+
+    for table in (Order.__table__, OrderItem.__table__):
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    after = run(engine, queries, args.repeat)
+
+    for name in queries:
+        (plan_before, ms_before), (plan_after, ms_after) = before[name], after[name]
+        print(f"== {name}")
+        print(f"   before {ms_before:10.2f} ms  | " + " / ".join(plan_before))
+        print(f"   after  {ms_after:10.2f} ms  | " + " / ".join(plan_after))
+    engine.dispose()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+GET /api/orders derin sayfalama: offset ve cursor (keyset) modu karşılaştırması.
+
+bench_order_indexes ile aynı şekilde N sipariş yükler, indeksleri oluşturur ve
+farklı derinliklerdeki bir sayfanın gecikmesini iki modda ölçer. Offset modu
+derinlikle doğrusal yavaşlar; cursor modu sabit kalmalıdır.
+
+    python benchmarks/bench_order_paging.py --orders 200000
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench_paging.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["ARCHIVE_AFTER_DAYS"] = "0"  # bir yıllık geçmiş seed edilir; arşivleyici sayfalamayı boşaltmasın
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from fastapi.testclient import TestClient
+
+import main
+from bench_order_indexes import seed
+from routers.orders import encode_cursor
+
+PAGE = 50
+
+
+def cursor_at(depth: int) -> str:
+    """depth. siparişten hemen önceki satırın cursor'ı (önceki sayfanın next_cursor'ı)."""
+    conn = sqlite3.connect(DB_PATH)
+    created_at, order_id = conn.execute(
+        "SELECT created_at, id FROM orders ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET ?", (depth - 1,)
+    ).fetchone()
+    conn.close()
+    return encode_cursor(datetime.fromisoformat(created_at), order_id)
+
+
+def timed(client, url: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url)
+        timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.text
+    return statistics.median(timings)
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    print(f"Seeding {args.orders:,} orders ...")
+    seed(DB_PATH, args.orders, tables=60, products=80)
+
+    with TestClient(main.app) as client:  # açılışta eksik indeksler oluşturulur
+        depths = [d for d in (PAGE, 1_000, 10_000, 50_000, 100_000, args.orders - PAGE) if d < args.orders]
+        print(f"{'depth':>9} {'offset ms':>10} {'cursor ms':>10}")
+        for depth in depths:
+            offset_ms = timed(client, f"/api/orders?limit={PAGE}&skip={depth}", args.repeat)
+            cursor_ms = timed(client, f"/api/orders?limit={PAGE}&cursor={cursor_at(depth)}", args.repeat)
+            print(f"{depth:>9,} {offset_ms:>10.2f} {cursor_ms:>10.2f}")
+    os.remove(DB_PATH)
+
+
+if __name__ == "__main__":
+    main_()
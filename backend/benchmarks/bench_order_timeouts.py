@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Sipariş zaman aşımı zamanlayıcısı: doğruluk ve ölçek.
+
+1) Uygulama üzerinden: kısa bir zaman aşımıyla sipariş açar, biri zamanında
+   hazırlanır; yalnızca diğeri için admin kanalına tek "order_overdue" gelmeli.
+2) Doğrudan zamanlayıcı: N aktif siparişte ekleme/silme maliyeti (O(log n))
+   ve tek bir uyanmada vadesi gelenlerin işlenmesi ölçülür. Pano yeniden
+   yüklenince (olay yolu resync'i) bildirilen siparişler tekrar bildirilmez.
+
+    python benchmarks/bench_order_timeouts.py --orders 100000
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "order_timeouts.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from fastapi.testclient import TestClient
+
+import main
+from models import get_session, Table
+from services.order_timeouts import order_timeouts, OrderTimeoutScheduler
+
+
+def check_escalation():
+    with TestClient(main.app) as client:
+        db = next(get_session())
+        db.add(Table(name="Masa 1", number=1))
+        db.commit()
+        db.close()
+        with client.websocket_connect("/ws") as admin:
+            admin.send_text(json.dumps({"type": "register", "client_type": "admin"}))
+            order_timeouts.timeout_seconds = 1  # test için saniye düzeyinde
+            late = client.post("/api/orders", json={"table_number": 1, "items": []}).json()["id"]
+            on_time = client.post("/api/orders", json={"table_number": 1, "items": []}).json()["id"]
+            assert client.put(f"/api/orders/{on_time}/status", json={"status": "ready"}).status_code == 200
+            messages = []
+            while True:
+                message = json.loads(admin.receive_text())
+                messages.append(message["type"])
+                if message["type"] == "order_overdue":
+                    break
+            assert message["order_id"] == late, message
+            time.sleep(1.5)
+            stats = client.get("/metrics").json()["order_timeouts"]
+        print(f"escalated: {message['message']}  stats: {stats}")
+        assert stats["escalations"] == 1 and stats["tracked"] == 1
+
+
+def bench_scheduler(orders: int):
+    scheduler = OrderTimeoutScheduler(timeout_minutes=30)
+    base = datetime.now() - timedelta(minutes=60)
+    tickets = [{"id": i, "created_at": (base + timedelta(seconds=i * 3600 / orders)).isoformat()} for i in range(orders)]
+
+    started = time.perf_counter()
+    for ticket in tickets:
+        scheduler.ticket_added(ticket)
+    add_us = (time.perf_counter() - started) / orders * 1e6
+
+    started = time.perf_counter()
+    for ticket in tickets[::2]:
+        scheduler.ticket_removed(ticket["id"])
+    remove_us = (time.perf_counter() - started) / (orders // 2) * 1e6
+
+    sent = []
+
+    async def fake_escalate(order_id, started_at, now):
+        sent.append(order_id)
+
+    scheduler._escalate = fake_escalate
+
+    async def one_tick():
+        task = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(0.1)
+        task.cancel()
+
+    started = time.perf_counter()
+    asyncio.run(one_tick())
+    tick_ms = (time.perf_counter() - started) * 1000
+    expected = sum(1 for t in tickets[1::2] if datetime.fromisoformat(t["created_at"]) <= datetime.now() - timedelta(minutes=30))
+    print(f"{orders:,} orders: add {add_us:.2f} µs, remove {remove_us:.2f} µs, "
+          f"first tick {tick_ms:.0f} ms -> {len(sent):,} overdue (expected ~{expected:,})")
+    assert abs(len(sent) - expected) <= 2 and len(set(sent)) == len(sent)
+    assert all(order_id % 2 == 1 for order_id in sent), "tamamlanan sipariş bildirilmemeli"
+
+    # Olay yolu resync'i panoyu yeniden yükler: bildirilenler tekrar bildirilmez,
+    # yalnızca başlangıcı değişen sipariş yeniden değerlendirilir
+    active = tickets[1::2]
+    moved = dict(active[-1], created_at=(base - timedelta(minutes=5)).isoformat())
+    first = len(sent)
+    scheduler.board_reset(active[:-1] + [moved])
+    asyncio.run(one_tick())
+    print(f"resync: {len(sent) - first} yeni bildirim")
+    assert moved["id"] in sent[first:] and not set(sent[:first]) & set(sent[first:]), "bildirim tekrarlanmamalı"
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=100_000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    check_escalation()
+    bench_scheduler(args.orders)
+    print("OK: zaman aşımı zamanlayıcısı")
+    os.remove(DB_PATH)
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+WebSocket giden kuyrukları: yavaş istemci mutfağı geciktirmemeli.
+
+Bir mutfak ekranı, ağı çok yavaş bir telefon ve bağlantısı kopmuş bir
+telefonla sipariş olayları yayınlanır. Eski yolda (asyncio.gather ile
+doğrudan gönderim) yayın yavaş telefonu bekler; yeni yolda her soketin
+kendi kuyruğu ve yazıcı görevi vardır. Her kuyruk politikası için yayın
+süresi, mutfağa ulaşma gecikmesi, atılan mesajlar ve kapatılan soketler
+raporlanır.
+
+    python benchmarks/bench_ws_backpressure.py --events 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import websocket_utils
+from websocket_utils import ConnectionManager, broadcast_order_update
+from _ws_fakes import FakeSocket, order_entries
+
+
+def record_latency(socket, text: str):
+    socket.latencies.append(time.perf_counter() - order_entries(text)[0]["sent_at"])
+
+
+async def legacy_broadcast(manager: ConnectionManager, message):
+    async def send(ws, text):
+        try: await ws.send_text(text)
+        except: pass
+    text = websocket_utils.encode_message({"type": "order_updated", "data": message})
+    await asyncio.gather(*[send(ws, text) for ws in manager.kitchen_connections + manager.active_connections])
+
+
+async def run(args, policy: str):
+    manager = ConnectionManager(queue_size=args.queue_size, policy=policy if policy != "eski" else "drop_oldest")
+    websocket_utils.set_connection_manager(manager)
+    kitchen = FakeSocket("kitchen", on_frame=record_latency, latencies=[])
+    slow = FakeSocket("slow", delay=args.slow_ms / 1000, on_frame=record_latency, latencies=[])
+    broken = FakeSocket("broken", broken=True)
+    await manager.connect(kitchen, "kitchen")
+    await manager.connect(slow, "customer", table_number=1)
+    await manager.connect(broken, "customer", table_number=1)
+
+    broadcast_times = []
+    for order_id in range(args.events):
+        message = {"id": order_id, "table_number": 1, "status": "ready", "sent_at": time.perf_counter()}
+        started = time.perf_counter()
+        if policy == "eski":
+            await legacy_broadcast(manager, message)
+        else:
+            await broadcast_order_update(message, "order_updated")
+        broadcast_times.append(time.perf_counter() - started)
+        await asyncio.sleep(args.interval_ms / 1000)
+    stats = manager.stats()["clients"]
+    for outbox in list(manager.outboxes.values()):
+        manager.disconnect(outbox.websocket, outbox.client_type, outbox.station, outbox.table_number)
+    return {
+        "broadcast_ms": statistics.mean(broadcast_times) * 1000,
+        "kitchen_p_max_ms": max(kitchen.latencies) * 1000,
+        "kitchen_received": len(kitchen.latencies),
+        "slow_received": len(slow.latencies),
+        "customer": stats.get("customer", {}),
+        "slow_closed": slow.closed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=50)
+    parser.add_argument("--interval-ms", type=float, default=5)
+    parser.add_argument("--slow-ms", type=float, default=100, help="yavaş telefonun kare başına gönderim süresi")
+    parser.add_argument("--queue-size", type=int, default=10)
+    parser.add_argument("--send-timeout", type=float, default=2)
+    args = parser.parse_args()
+    websocket_utils.logger.disabled = True
+    websocket_utils.WS_SEND_TIMEOUT_SECONDS = args.send_timeout
+
+    print(f"{args.events} olay / {args.interval_ms:g} ms, yavaş telefon {args.slow_ms:g} ms/kare, kuyruk {args.queue_size}")
+    results = {}
+    for policy in ("eski", "drop_oldest", "coalesce", "disconnect"):
+        r = results[policy] = asyncio.run(run(args, policy))
+        c = r["customer"]
+        print(f"{policy:<12} yayın {r['broadcast_ms']:7.2f} ms  mutfak en geç {r['kitchen_p_max_ms']:7.2f} ms "
+              f"({r['kitchen_received']}/{args.events})  yavaş telefon {r['slow_received']} kare  "
+              f"atılan {c.get('dropped', 0)}  kapatılan {c.get('reaped', 0)}")
+
+    for policy in ("drop_oldest", "coalesce", "disconnect"):
+        r = results[policy]
+        assert r["kitchen_received"] == args.events
+        assert r["kitchen_p_max_ms"] < args.slow_ms, "mutfak yavaş telefonu beklememeli"
+        assert r["customer"]["reaped"] >= 1, "bağlantısı kopan soket kapatılmalı"
+    assert results["disconnect"]["slow_closed"], "disconnect politikasında geride kalan soket kapatılmalı"
+    assert results["drop_oldest"]["customer"]["dropped"] > 0
+    print("OK: giden kuyruklar")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Sipariş olaylarını birleştirme penceresi (WS_COALESCE_MS): kare sayısı.
+
+İki yoğun an sahte soketlerle canlandırılır: 20 kişilik masanın garsonu
+siparişleri arka arkaya tek tek girer ve mutfak aynı anda 30 fişi önce
+"preparing" sonra "ready" yapar (toplu bump). Penceresiz yolda her olay
+her ekrana ayrı kare olarak gider; pencereyle ekran başına tek
+"orders_batch" karesi gider ve aynı siparişin art arda güncellemeleri
+sonuncuya indirilir. Toplam kare, ekranın son gördüğü durum ve
+birleştirme istatistikleri raporlanır.
+
+    python benchmarks/bench_ws_coalesce.py --window-ms 50 --party 20 --bump 30
+"""
+
+import argparse
+import asyncio
+import sys
+from collections import Counter
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import websocket_utils
+from websocket_utils import ConnectionManager, OrderCoalescer, broadcast_order_update
+from _ws_fakes import FakeSocket, order_entries
+
+
+async def run(args, window_ms: float):
+    frames, seen = Counter(), {}
+
+    def track_status(socket, text):
+        for entry in order_entries(text):
+            seen.setdefault(socket.name, {})[entry["id"]] = entry["status"]
+
+    def screen(name):
+        return FakeSocket(name, counter=frames, on_frame=track_status)
+
+    manager = ConnectionManager(queue_size=1000)  # yalnızca kare sayımı: kuyrukta atılma olmasın
+    websocket_utils.set_connection_manager(manager)
+    websocket_utils.coalescer = OrderCoalescer(window_ms)
+    for i in range(args.kitchens):
+        await manager.connect(screen(f"kitchen-{i}"), "kitchen")
+    await manager.connect(screen("admin-0"), "admin")
+    for phone in range(args.phones):
+        await manager.connect(screen(f"customer-{phone}"), "customer", table_number=1)
+
+    # 20 kişilik masa: sipariş başına bir olay, garson girdikçe
+    for order_id in range(args.party):
+        await broadcast_order_update({"id": order_id, "table_number": 1, "status": "pending",
+                                      "items": [{"product_name": "Kebap", "quantity": 1}]}, "order_created")
+        await asyncio.sleep(0.001)
+    # Toplu bump: aynı fişler önce hazırlanıyor, hemen ardından hazır
+    bumped = list(range(args.bump))
+    for status in ("preparing", "ready"):
+        await broadcast_order_update([{"id": order_id, "table_number": 1, "status": status} for order_id in bumped],
+                                     "orders_updated")
+    await asyncio.sleep(window_ms / 1000 * 2 + 0.01)
+    await manager.idle()
+    return frames, seen, websocket_utils.coalescer.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--window-ms", type=float, default=50)
+    parser.add_argument("--party", type=int, default=20)
+    parser.add_argument("--bump", type=int, default=30)
+    parser.add_argument("--kitchens", type=int, default=3)
+    parser.add_argument("--phones", type=int, default=4)
+    args = parser.parse_args()
+    websocket_utils.logger.disabled = True
+
+    direct = asyncio.run(run(args, 0))
+    coalesced = asyncio.run(run(args, args.window_ms))
+    print(f"{args.party} siparişlik masa + {args.bump} fiş toplu bump, "
+          f"{args.kitchens} mutfak + 1 admin + {args.phones} telefon")
+    for label, (frames, seen, stats) in (("anında", direct), (f"{args.window_ms:g} ms", coalesced)):
+        print(f"{label:<8} toplam kare {sum(frames.values()):5d}  mutfak başına {frames['kitchen-0']:3d}  "
+              f"birleştirme {stats}")
+
+    expected = {order_id: "ready" if order_id < args.bump else "pending" for order_id in range(max(args.party, args.bump))}
+    for frames, seen, _ in (direct, coalesced):
+        assert all(view == expected for view in seen.values()), "ekranlar son durumu görmeli"
+    stats = coalesced[2]
+    assert stats["frames_saved"] > 0
+    assert sum(coalesced[0].values()) < sum(direct[0].values())
+    assert stats["collapsed"] == args.bump
+    print(f"OK: {sum(direct[0].values())} -> {sum(coalesced[0].values())} kare, "
+          f"{stats['frames_saved']} kare birleştirildi")
+
+
+if __name__ == "__main__":
+    main()
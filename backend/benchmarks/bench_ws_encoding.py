@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+WebSocket kare kodlamaları: JSON, msgpack ve deflate; kare boyutu ve CPU.
+
+Sipariş mesajları her kalemde aynı anahtarları tekrarlar. İstemci register
+sırasında {"encoding": "msgpack", "compress": true} isteyebilir; sunucu
+mesajı kodlama başına bir kez kodlayıp aynı baytları tüm soketlere gönderir.
+Her kodlama için sahte soketlerle N ekrana yayın yapılır; kare başına bayt,
+yayın başına süre ve aynı kodlamanın soket başına yeniden yapıldığı (önbelleksiz)
+yol karşılaştırılır. Kareler çözülüp özgün mesajla karşılaştırılır.
+
+    python benchmarks/bench_ws_encoding.py --clients 50 --items 20 --rounds 200
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import zlib
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import msgpack
+
+import websocket_utils
+from websocket_utils import ConnectionManager, Frame, encode_message
+from _ws_fakes import FakeSocket, sample_order
+
+ENCODINGS = ("json", "json+deflate", "msgpack", "msgpack+deflate")
+
+
+def decode(data, encoding: str):
+    if encoding.endswith("+deflate"):
+        data = zlib.decompress(data, -15)
+    return msgpack.unpackb(data) if encoding.startswith("msgpack") else json.loads(data)
+
+
+async def run(args, encoding: str, cached: bool):
+    manager = ConnectionManager(queue_size=args.rounds)
+    sockets = [FakeSocket() for _ in range(args.clients)]
+    for socket in sockets:
+        await manager.connect(socket, "kitchen", encoding=encoding)
+        socket.frames.clear()  # "encoding" bildirimi sayılmaz
+    messages = [{"type": "order_created", "seq": order_id, "epoch": "a1b2c3d4", "data": sample_order(order_id, args.items)}
+                for order_id in range(args.rounds)]
+
+    started = time.perf_counter()
+    for message in messages:
+        if cached:
+            await manager.fanout(encode_message(message), manager.kitchen_connections)
+        else:
+            # Önbelleksiz: her soket için ayrı kodlama
+            for ws in manager.kitchen_connections:
+                manager.send_message(ws, Frame(message))
+        await manager.idle()
+    elapsed = time.perf_counter() - started
+
+    assert all(decode(frame, encoding) == message for socket in sockets[:3] for frame, message in zip(socket.frames, messages))
+    frame_bytes = sum(len(f.encode() if isinstance(f, str) else f) for f in sockets[0].frames) / args.rounds
+    return frame_bytes, elapsed / args.rounds * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    websocket_utils.logger.disabled = True
+
+    print(f"{args.items} kalemli sipariş, {args.clients} ekran, {args.rounds} yayın")
+    results = {}
+    for encoding in ENCODINGS:
+        frame_bytes, ms = asyncio.run(run(args, encoding, cached=True))
+        _, uncached_ms = asyncio.run(run(args, encoding, cached=False))
+        results[encoding] = (frame_bytes, ms, uncached_ms)
+        print(f"{encoding:<16} {frame_bytes:7.0f} bayt/kare  yayın {ms:6.3f} ms  "
+              f"soket başına kodlama {uncached_ms:6.3f} ms")
+
+    json_bytes = results["json"][0]
+    for encoding in ENCODINGS[1:]:
+        assert results[encoding][0] < json_bytes, f"{encoding} JSON'dan küçük olmalı"
+    assert results["msgpack+deflate"][1] < results["msgpack+deflate"][2], "önbellek kodlamayı soket başına yinelememeli"
+    best = min(results, key=lambda e: results[e][0])
+    print(f"OK: {best} {json_bytes:.0f} -> {results[best][0]:.0f} bayt/kare "
+          f"({json_bytes / results[best][0]:.1f}x), kodlama yayın başına bir kez")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+WebSocket yayın (fanout) maliyeti: eski yol ile tek serileştirmeli yol.
+
+Eski yol mesajı mutfağa, admine ve tüm bağlantılara ayrı ayrı gönderiyordu;
+active_connections mutfak/admin soketlerini de içerdiği için bu ekranlar
+her mesajı iki kez alıyor, mesaj bağlantı başına yeniden serileştiriliyordu.
+Sahte soketlerle (gerçek ağ yok) N istemcide yayın süresi, json.dumps
+sayısı ve soket başına alınan kare sayısı ölçülür. Müşteriler masalara
+dağıtılır; masaya göre süzme için bkz. bench_ws_tables.py.
+
+    python benchmarks/bench_ws_fanout.py --clients 500 --rounds 200
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import websocket_utils
+from websocket_utils import ConnectionManager, broadcast_order_update
+from _ws_fakes import FakeSocket, sample_order
+
+
+async def legacy_send(websocket, text: str):
+    try: await websocket.send_text(text)
+    except: pass
+
+
+async def legacy_broadcast(manager: ConnectionManager, message, update_type: str):
+    # Değişiklik öncesi davranış: üç ayrı yayın, bağlantı başına json.dumps
+    full_message = {"type": update_type, "data": message}
+    for connections in (manager.kitchen_connections, manager.admin_connections, manager.active_connections):
+        await asyncio.gather(*[legacy_send(ws, json.dumps(full_message)) for ws in connections], return_exceptions=True)
+
+
+TABLES = 60
+
+
+async def run(clients: int, kitchens: int, admins: int, rounds: int, broadcast):
+    received = Counter()
+    manager = ConnectionManager(queue_size=rounds)  # yalnızca kare sayımı: kuyrukta atılma olmasın
+    for i in range(clients):
+        client_type = "kitchen" if i < kitchens else "admin" if i < kitchens + admins else "customer"
+        await manager.connect(FakeSocket(f"{client_type}-{i}", counter=received), client_type, table_number=i % TABLES + 1)
+    websocket_utils.set_connection_manager(manager)
+
+    dumps_calls = 0
+    original_dumps = json.dumps
+
+    def counting_dumps(*args, **kwargs):
+        nonlocal dumps_calls
+        dumps_calls += 1
+        return original_dumps(*args, **kwargs)
+
+    json.dumps = counting_dumps
+    try:
+        started = time.perf_counter()
+        for order_id in range(rounds):
+            await broadcast(sample_order(order_id, tables=TABLES))
+        await manager.idle()
+        elapsed = time.perf_counter() - started
+    finally:
+        json.dumps = original_dumps
+    return elapsed / rounds * 1000, dumps_calls / rounds, received
+
+
+def report(label, ms, dumps, received, rounds):
+    per_type = {}
+    for name, count in received.items():
+        per_type.setdefault(name.split("-")[0], set()).add(round(count / rounds, 2))
+    frames = sum(received.values()) / rounds
+    print(f"{label:<8} {ms:7.2f} ms/yayın  json.dumps {dumps:6.0f}  kare {frames:6.0f}  "
+          f"soket başına kare {dict(sorted((k, sorted(v)) for k, v in per_type.items()))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--kitchens", type=int, default=10)
+    parser.add_argument("--admins", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    websocket_utils.logger.disabled = True
+
+    legacy = asyncio.run(run(args.clients, args.kitchens, args.admins, args.rounds,
+                             lambda m: legacy_broadcast(websocket_utils.manager, m, "order_created")))
+    fanout = asyncio.run(run(args.clients, args.kitchens, args.admins, args.rounds,
+                             lambda m: broadcast_order_update(m, "order_created")))
+    print(f"{args.clients} istemci ({args.kitchens} mutfak, {args.admins} admin), {args.rounds} yayın")
+    report("eski", *legacy, args.rounds)
+    report("fanout", *fanout, args.rounds)
+
+    # Mutfak/admin için bir, siparişin masası için bir serileştirme
+    assert fanout[1] == 2, "mesaj hedef grubu başına bir kez serileştirilmeli"
+    staff = {count for name, count in fanout[2].items() if not name.startswith("customer")}
+    assert staff == {args.rounds}, "her mutfak/admin ekranı her mesajı tam bir kez almalı"
+    print(f"OK: {legacy[0] / fanout[0]:.1f}x hızlı, {legacy[1]:.0f} -> {fanout[1]:.0f} serileştirme")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+WebSocket ping/pong ve yanıtsız soketlerin kapatılması.
+
+Yarı açık telefon bağlantısı (ağdan çıkmış, TCP henüz fark etmemiş) yazımı
+hata vermeden yutar; ping olmadan saatlerce listede kalır ve her yayında bir
+gönderime mal olur. Sahte soketlerle sağlıklı (ping'e pong veren) ve yarı
+açık (hiç yanıt vermeyen) telefonlar bağlanır, heartbeat görevi kısa
+aralıklarla çalıştırılır. Yanıtsız soketlerin boşta kalma süresi içinde
+kapatıldığı, sağlıklıların kaldığı ve yayın başına kare sayısının düştüğü
+kontrol edilir; bağlantı sayaçları raporlanır.
+
+    python benchmarks/bench_ws_heartbeat.py --healthy 20 --half-open 40
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import websocket_utils
+from websocket_utils import ConnectionManager, broadcast_order_update
+from _ws_fakes import FakeSocket
+
+
+def phone(manager: ConnectionManager, answers: bool) -> FakeSocket:
+    def pong(socket, text):
+        if json.loads(text)["type"] == "ping":
+            manager.touch(socket)
+    return FakeSocket(on_frame=pong if answers else None)
+
+
+async def frames_per_event(manager: ConnectionManager, sockets, order_id: int) -> int:
+    before = sum(len(s.frames) for s in sockets)
+    await broadcast_order_update({"id": order_id, "table_number": 1, "status": "ready"}, "order_updated")
+    await manager.idle()
+    return sum(len(s.frames) for s in sockets) - before
+
+
+async def run(args):
+    manager = ConnectionManager(ping_interval=args.interval, idle_timeout=args.idle_timeout)
+    websocket_utils.set_connection_manager(manager)
+    healthy = [phone(manager, True) for _ in range(args.healthy)]
+    half_open = [phone(manager, False) for _ in range(args.half_open)]
+    await manager.connect(phone(manager, True), "kitchen")
+    for socket in healthy + half_open:
+        await manager.connect(socket, "customer", table_number=1)
+    sockets = healthy + half_open
+
+    before = await frames_per_event(manager, sockets, 1)
+    started = time.monotonic()
+    heartbeat = asyncio.create_task(manager.heartbeat())
+    await asyncio.sleep(args.idle_timeout + args.interval * 3)
+    after = await frames_per_event(manager, sockets, 2)
+    heartbeat.cancel()
+    await asyncio.gather(heartbeat, return_exceptions=True)
+
+    reap_delays = [s.closed_at - started for s in half_open if s.closed_at is not None]
+    return before, after, reap_delays, healthy, manager.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--healthy", type=int, default=20)
+    parser.add_argument("--half-open", type=int, default=40)
+    parser.add_argument("--interval", type=float, default=0.05, help="ping aralığı (sn)")
+    parser.add_argument("--idle-timeout", type=float, default=0.15, help="yanıtsız soket kapatma süresi (sn)")
+    args = parser.parse_args()
+    websocket_utils.logger.disabled = True
+
+    before, after, reap_delays, healthy, stats = asyncio.run(run(args))
+    customer = stats["clients"]["customer"]
+    print(f"{args.healthy} sağlıklı + {args.half_open} yarı açık telefon, ping {args.interval:g} sn, "
+          f"boşta kalma {args.idle_timeout:g} sn")
+    print(f"yayın başına kare: {before} -> {after}")
+    print(f"yarı açık soket kapatma: {len(reap_delays)}/{args.half_open}, en geç {max(reap_delays, default=0):.2f} sn")
+    print(f"müşteri sayaçları: {customer}")
+
+    assert len(reap_delays) == args.half_open, "yanıtsız soketler kapatılmalı"
+    assert max(reap_delays) <= args.idle_timeout + args.interval * 2
+    assert not any(s.closed_at for s in healthy), "pong veren soketler kalmalı"
+    assert before == args.healthy + args.half_open and after == args.healthy
+    assert customer["connections"] == args.healthy and customer["idle_reaped"] == args.half_open
+    assert customer["connects"] - customer["disconnects"] == customer["connections"]
+    print("OK: heartbeat")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Müşteri soketlerinin masaya göre yayını: herkese yayın ile masa indeksi.
+
+Önceden her sipariş olayı bağlı tüm müşteri telefonlarına gidiyordu (başka
+masaların sipariş içeriği dahil). Şimdi müşteriler kayıtta masa numarasını
+bildirir ve olay yalnızca o masanın abonelerine gider. Sahte soketlerle
+sipariş başına kare sayısı, yayın süresi ve sızıntı kontrol edilir.
+
+    python benchmarks/bench_ws_tables.py --tables 60 --phones 2 --rounds 500
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import websocket_utils
+from websocket_utils import ConnectionManager, broadcast_order_update, encode_message
+from _ws_fakes import FakeSocket, order_entries
+
+
+async def legacy_broadcast(manager: ConnectionManager, message, update_type: str):
+    # Değişiklik öncesi: mutfak + admin + tüm bağlantılar (müşteriler dahil)
+    await manager.fanout(encode_message({"type": update_type, "data": message}),
+                         manager.kitchen_connections, manager.admin_connections, manager.active_connections)
+
+
+async def run(args, broadcast):
+    received, leaks = Counter(), []
+
+    def check_table(socket, text):
+        for entry in order_entries(text):
+            if entry["table_number"] != socket.table_number:
+                leaks.append((socket.table_number, entry["table_number"]))
+
+    manager = ConnectionManager(queue_size=args.rounds)  # yalnızca kare sayımı: kuyrukta atılma olmasın
+    for _ in range(args.kitchens):
+        await manager.connect(FakeSocket(f"kitchen-{_}", counter=received), "kitchen")
+    for table in range(1, args.tables + 1):
+        for _ in range(args.phones):
+            socket = FakeSocket(f"table-{table}-{_}", counter=received, on_frame=check_table, table_number=table)
+            await manager.connect(socket, "customer", table_number=table)
+    websocket_utils.set_connection_manager(manager)
+
+    rng = random.Random(1)
+    started = time.perf_counter()
+    for order_id in range(args.rounds):
+        table = rng.randint(1, args.tables)
+        await broadcast(manager, {"id": order_id, "table_number": table, "table_name": f"Masa {table}",
+                                  "status": "ready", "items": [{"product_name": "Kebap", "quantity": 2}]})
+    await manager.idle()
+    elapsed = time.perf_counter() - started
+    return elapsed / args.rounds * 1000, sum(received.values()) / args.rounds, len(leaks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tables", type=int, default=60)
+    parser.add_argument("--phones", type=int, default=2)
+    parser.add_argument("--kitchens", type=int, default=3)
+    parser.add_argument("--rounds", type=int, default=500)
+    args = parser.parse_args()
+    websocket_utils.logger.disabled = True
+
+    legacy = asyncio.run(run(args, lambda m, msg: legacy_broadcast(m, msg, "order_updated")))
+    indexed = asyncio.run(run(args, lambda m, msg: broadcast_order_update(msg, "order_updated")))
+    print(f"{args.tables} masa x {args.phones} telefon + {args.kitchens} mutfak, {args.rounds} olay")
+    for label, (ms, frames, leaks) in (("herkese", legacy), ("masaya", indexed)):
+        print(f"{label:<8} {ms:6.3f} ms/olay  {frames:6.1f} kare/olay  başka masaya sızan {leaks}")
+
+    assert indexed[1] == args.kitchens + args.phones
+    assert indexed[2] == 0
+    print(f"OK: {legacy[1] / indexed[1]:.0f}x daha az kare, {legacy[0] / indexed[0]:.1f}x hızlı")
+
+
+if __name__ == "__main__":
+    main()
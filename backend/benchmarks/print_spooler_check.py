@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Yazdırma kuyruğu uçtan uca testi (sahte TCP yazıcıya karşı).
+
+- Sipariş oluşturma yazıcıyı beklemez: yazıcı kapalıyken de sipariş süresi aynı kalır.
+- Yazıcı kapalıyken işler sırası bozulmadan üstel bekleme ile yeniden denenir.
+- Ardışık fişler birleştirilir (bağlantı sayısı < fiş sayısı).
+- Her sipariş tam olarak bir mutfak fişi olarak basılır; fiş isteği kuyruğa eklenir.
+- İkinci bir işçinin kuyruğu (aynı veritabanı, aynı yazıcılar) aynı anda
+  boşaltması fişleri çiftlemez: işler gönderimden önce sahiplenilir.
+
+    python benchmarks/print_spooler_check.py --orders 40
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+PORT = free_port()
+DB_PATH = os.path.join(tempfile.mkdtemp(), "print_spooler.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["PRINTERS"] = f"kitchen=127.0.0.1:{PORT},receipt=127.0.0.1:{PORT}"
+os.environ["PRINT_KITCHEN_ON_ORDER"] = "true"
+os.environ["PRINT_RETRY_BASE_SECONDS"] = "0.2"
+os.environ["PRINT_TIMEOUT_SECONDS"] = "1"
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import httpx
+
+import main
+from models import get_session, Table, Category, Product
+from services.fake_printer import FakePrinter
+from services.print_spooler import PrintSpooler, parse_printers
+
+
+def seed():
+    db = next(get_session())
+    db.add_all([Table(name=f"Masa {i}", number=i) for i in range(1, 6)])
+    db.add(Category(name="Print"))
+    db.commit()
+    db.add_all([Product(name="Mercimek Çorbası", price=60.0, category_id=1), Product(name="Izgara Köfte", price=180.0, category_id=1)])
+    db.commit()
+    db.close()
+
+
+async def place(client, n: int) -> float:
+    started = time.perf_counter()
+    response = await client.post("/api/orders", json={
+        "table_number": (n % 5) + 1,
+        "items": [{"product_id": 1, "quantity": 1}, {"product_id": 2, "quantity": 2, "extras": {"az pişmiş": True}}],
+        "customer_notes": "Soğansız" if n % 2 else None,
+    })
+    assert response.status_code == 200, response.text
+    return (time.perf_counter() - started) * 1000
+
+
+async def wait_until(predicate, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "zaman aşımı"
+        await asyncio.sleep(0.05)
+
+
+async def run(orders: int):
+    async with main.app.router.lifespan_context(main.app):
+        seed()
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://print") as client:
+            # 1) Yazıcı kapalı: siparişler yine hızlı alınır, işler kuyrukta bekler
+            offline = [await place(client, n) for n in range(orders // 2)]
+            await asyncio.sleep(0.5)
+            status = (await client.get("/api/orders/printer/status")).json()["printers"][0]
+            print(f"printer offline: intake median {statistics.median(offline):.1f} ms, queued {status['queued']}, error {status['last_error']}")
+            assert status["online"] is False
+
+            # İkinci işçi: aynı kuyruğu kendi backoff'uyla boşaltmaya çalışır
+            other = PrintSpooler(parse_printers(os.environ["PRINTERS"]))
+            other.start()
+
+            # 2) Yazıcı açılır: bekleyen işler backoff sonrası sırayla basılır
+            printer = await FakePrinter(port=PORT).start()
+            online = [await place(client, n) for n in range(orders // 2, orders)]
+            await wait_until(lambda: len(printer.tickets()) >= orders)
+            await asyncio.sleep(0.5)
+
+            receipt = (await client.post("/api/orders/printer/print-order/1?kind=receipt")).json()
+            await wait_until(lambda: len(printer.tickets()) >= orders + 1)
+            status = (await client.get("/api/orders/printer/status")).json()["printers"]
+            await other.stop()
+            await printer.stop()
+
+    tickets = printer.tickets()
+    print(f"printer online: intake median {statistics.median(online):.1f} ms")
+    print(f"tickets: {len(tickets)}, connections: {printer.connections}, status: {status[0]}")
+    kitchen = [t for t in tickets if b"TOPLAM" not in t]
+    ids = [int(t.split(b"Sipari")[1].split(b"#")[1].split(b"\x1b")[0]) for t in kitchen]
+    # submit() arka planda kuyruğa ekler: iş sırası sipariş sırasından sapabilir
+    conn = sqlite3.connect(DB_PATH)
+    job_orders = [row[0] for row in conn.execute("SELECT order_id FROM print_jobs WHERE kind = 'kitchen' ORDER BY id")]
+    conn.close()
+    assert sorted(ids) == list(range(1, orders + 1)), "her sipariş tam bir kez basılmalı"
+    assert ids == job_orders, "fişler kuyruk sırasıyla basılmalı"
+    assert printer.connections < len(tickets), "ardışık fişler birleştirilmeli"
+    assert receipt["job_id"] and any(b"TOPLAM" in t for t in tickets)
+    assert "Köfte".encode("cp857") in tickets[0]
+    assert status[0]["queued"] == 0 and status[0]["sending"] == 0 and status[0]["failed"] == 0
+    print("OK: yazdırma kuyruğu")
+    os.remove(DB_PATH)
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=40)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    asyncio.run(run(args.orders))
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Sipariş listeleme endpoint'lerinin istek başına SQL ifadesi sayısını doğrular.
+
+Önce birkaç, sonra yüzlerce sipariş varken aynı istekleri atar ve ifade
+sayısının sipariş/kalem sayısından bağımsız (sabit) olduğunu kontrol eder.
+
+    python benchmarks/query_counts.py
+"""
+
+import logging
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "query_counts.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import main
+from models import get_async_engine, get_session, Table, Category, Product
+
+ENDPOINTS = [
+    "/api/orders",
+    "/api/orders?limit=1000",
+    "/api/orders?status_filter=pending",
+    "/api/orders/1",
+    "/api/orders/kitchen-tickets",
+    "/api/orders/kitchen/pending",
+]
+
+
+def seed():
+    db = next(get_session())
+    db.add_all([Table(name=f"Masa {i}", number=i) for i in range(1, 11)])
+    db.add(Category(name="QC"))
+    db.commit()
+    db.add_all([Product(name=f"Ürün {i}", price=10.0 + i, category_id=1) for i in range(1, 21)])
+    db.commit()
+    db.close()
+
+
+def place_orders(client, count: int):
+    for n in range(count):
+        client.post("/api/orders", json={
+            "table_number": (n % 10) + 1,
+            "items": [{"product_id": ((n + k) % 20) + 1, "quantity": 1} for k in range(3)],
+        })
+
+
+def measure(client, counter):
+    counts = {}
+    for url in ENDPOINTS:
+        counter["n"] = 0
+        assert client.get(url).status_code == 200, url
+        counts[url] = counter["n"]
+    return counts
+
+
+def main_():
+    logging.disable(logging.INFO)
+    counter = {"n": 0}
+    with TestClient(main.app) as client:
+        seed()
+        event.listen(get_async_engine().sync_engine, "before_cursor_execute",
+                     lambda *a: counter.__setitem__("n", counter["n"] + 1))
+        place_orders(client, 2)
+        small = measure(client, counter)
+        place_orders(client, 300)
+        large = measure(client, counter)
+
+    print(f"{'endpoint':40} {'2 orders':>9} {'302 orders':>11}")
+    for url in ENDPOINTS:
+        print(f"{url:40} {small[url]:>9} {large[url]:>11}")
+    assert small == large, "SQL ifadesi sayısı sipariş sayısıyla artıyor (N+1)"
+    assert max(large.values()) <= 3
+    print("OK: istek başına sabit sayıda sorgu")
+    os.remove(DB_PATH)
+
+
+if __name__ == "__main__":
+    main_()
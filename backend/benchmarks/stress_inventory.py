@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Stok ayırma eşzamanlılık testi.
+
+Aynı ürüne ASGI üzerinden yüzlerce paralel sipariş gönderir ve fazla satış
+olmadığını doğrular: başarılı sipariş sayısı başlangıç stoğunu aşmamalı,
+kalan stok negatif olmamalı ve her kalem için tam olarak bir düşüm olmalı.
+
+    python benchmarks/stress_inventory.py --orders 400 --stock 150
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "stress_inventory.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import httpx
+
+import main
+from models import get_session, Table, Category, Product, Inventory, Order, OrderItem
+
+
+def seed(stock: int):
+    db = next(get_session())
+    db.add(Table(name="Masa 1", number=1))
+    db.add(Category(name="Stress"))
+    db.commit()
+    db.add_all([Product(name="Son Porsiyon", price=100.0, category_id=1), Product(name="Ayran", price=20.0, category_id=1)])
+    db.commit()
+    db.add_all([Inventory(product_id=1, quantity=stock), Inventory(product_id=2, quantity=stock * 10)])
+    db.commit()
+    db.close()
+
+
+def final_state():
+    db = next(get_session())
+    try:
+        stock = {i.product_id: i.quantity for i in db.query(Inventory).all()}
+        orders = db.query(Order).count()
+        sold = sum(i.quantity for i in db.query(OrderItem).filter(OrderItem.product_id == 1).all())
+        return stock, orders, sold
+    finally:
+        db.close()
+
+
+async def fire(orders: int, quantity: int):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://stress") as client:
+        payload = {"table_number": 1, "items": [
+            {"product_id": 1, "quantity": quantity},
+            {"product_id": 2, "quantity": 1},
+        ]}
+        responses = await asyncio.gather(*[client.post("/api/orders", json=payload) for _ in range(orders)])
+    return Counter(r.status_code for r in responses)
+
+
+async def run(args):
+    async with main.app.router.lifespan_context(main.app):
+        seed(args.stock)
+        codes = await fire(args.orders, args.quantity)
+    return codes
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=400)
+    parser.add_argument("--stock", type=int, default=150)
+    parser.add_argument("--quantity", type=int, default=1)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    codes = asyncio.run(run(args))
+    stock, orders, sold = final_state()
+    expected = min(args.orders, args.stock // args.quantity)
+    print(f"responses: {dict(codes)}")
+    print(f"orders stored: {orders}, units sold: {sold}, stock left: {stock}")
+
+    assert codes[200] == expected, f"{codes[200]} sipariş kabul edildi, beklenen {expected}"
+    assert codes[400] == args.orders - expected, "reddedilen siparişler 400 dönmeli"
+    assert orders == codes[200], "yalnızca kabul edilen siparişler kaydedilmeli"
+    assert stock[1] == args.stock - sold >= 0, "fazla satış"
+    assert stock[2] == args.stock * 10 - codes[200], "kısmi ayırma geri alınmamış"
+    print("OK: fazla satış yok")
+    os.remove(DB_PATH)
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+UserStats write-behind doğrulaması.
+
+Teslim edilen siparişlerin cirosu önce bellekte birikir: flush öncesi
+/auth/me/stats birleşik değeri göstermeli, DB satırı değişmemelidir. Ardından
+flush edilmemiş artışlar bırakılıp (çökme) başka bir işçinin aggregator'ı
+sahipsiz journal'ı devralır; sonuç tam olarak bir kez yazılmalıdır. Aynı
+anda açılan iki işçi artışları iki kez uygulamamalı, çalışan bir işçinin
+journal'ına dokunulmamalıdır. Kilidi kısa süre başka işçide olan işçi
+açılışta düşmemeli, beklemelidir.
+
+    python benchmarks/user_stats_journal.py --orders 200
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+WORK_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORK_DIR, 'user_stats.db')}"
+os.environ["USER_STATS_JOURNAL"] = os.path.join(WORK_DIR, "user_stats.journal")
+os.environ["USER_STATS_FLUSH_SECONDS"] = "3600"
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import httpx
+
+import main
+from models import get_session, Table, Category, Product, UserStats
+from services.user_stats import UserStatsAggregator, user_stats, try_lock, unlock_and_remove
+
+
+def seed():
+    db = next(get_session())
+    db.add(Table(name="Masa 1", number=1))
+    db.add(Category(name="Stats"))
+    db.commit()
+    db.add(Product(name="Kebap", price=12.5, category_id=1))
+    db.commit()
+    db.close()
+
+
+def persisted_score() -> float:
+    db = next(get_session())
+    try:
+        row = db.query(UserStats).first()
+        return row.total_sales_score if row else 0.0
+    finally:
+        db.close()
+
+
+async def run(orders: int):
+    async with main.app.router.lifespan_context(main.app):
+        seed()
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://stats") as client:
+            token = (await client.post("/api/auth/login", json={"username": "admin", "password": "admin123"})).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+            for _ in range(orders):
+                order = (await client.post("/api/orders", json={"table_number": 1, "items": [{"product_id": 1, "quantity": 2}]})).json()
+                await client.put(f"/api/orders/{order['id']}/status", json={"status": "delivered"}, headers=headers)
+            merged = (await client.get("/api/auth/me/stats", headers=headers)).json()
+
+        expected = orders * 25.0
+        print(f"merged read: {merged['total_sales_score']}, persisted: {persisted_score()}")
+        assert merged["total_sales_score"] == expected, "birleşik okuma bekleyen deltayı içermeli"
+        assert persisted_score() == 0.0, "flush öncesi DB'ye yazılmamalı"
+
+        # Çalışan başka bir işçinin henüz yazılmamış artışı devralınmamalı
+        journal_base = os.environ["USER_STATS_JOURNAL"]
+        live = UserStatsAggregator(journal_base, worker="live")
+        live.credit(1, 5.0)
+
+        # Çökme: bellekteki delta kaybolur, yalnızca journal kalır (kilidi işletim sistemi bırakır)
+        user_stats.close()
+        user_stats._pending.clear()
+        # Yeniden başlatılan iki işçi aynı anda kurtarma yapar
+        survivors = [UserStatsAggregator(journal_base, worker=name) for name in ("w1", "w2")]
+        for survivor in survivors:
+            survivor.recover()
+        for survivor in survivors:
+            await survivor.flush()
+        print(f"after recovery flush: {persisted_score()}")
+        assert persisted_score() == expected, "journal'daki artışlar bir kez uygulanmalı"
+        for survivor in survivors:
+            survivor.recover()
+            await survivor.flush()
+        assert persisted_score() == expected, "ikinci recover tekrar uygulamamalı"
+
+        await live.flush()
+        assert persisted_score() == expected + 5.0, "çalışan işçinin artışı kendi flush'ında yazılmalı"
+
+        # Açılış yarışı: başka işçinin recover()'ı w3'ün kilidini tutup silerken w3 başlar
+        lock_path = f"{journal_base}.w3.lock"
+        held = try_lock(lock_path)
+        threading.Timer(0.2, unlock_and_remove, (held, lock_path)).start()
+        late = UserStatsAggregator(journal_base, worker="w3")
+        late.recover()  # beklemeli, RuntimeError vermemeli
+        assert try_lock(lock_path) is None, "silinip yeniden yaratılan kilit dosyası iki sahip vermemeli"
+        for aggregator in survivors + [live, late]:
+            aggregator.close()
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=200)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    asyncio.run(run(args.orders))
+    print("OK: write-behind ve journal kurtarma doğru")
+
+
+if __name__ == "__main__":
+    main_()
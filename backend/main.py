@@ -3,7 +3,7 @@ from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Depe
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
-from models import create_tables, User, UserRole, RestaurantConfig, get_session
+from models import create_tables, get_engine, get_async_engine, get_async_session_factory, dispose_engine, get_pool_metrics, sqlite_profile_enabled, checkpoint_wal, User, UserRole, RestaurantConfig, get_session
 from pathlib import Path
 from routers import products_new as products, orders, admin, auth, tables
 from sqlalchemy.orm import Session
@@ -11,12 +11,19 @@ from models import get_session
 from auth import get_password_hash
 import json
 import asyncio
-from typing import List, Dict, Any
+from typing import Dict, Any
 import os
 from dotenv import load_dotenv
 import logging
 from contextlib import asynccontextmanager
-from websocket_utils import set_connection_manager, broadcast_order_update
+from websocket_utils import ConnectionManager, set_connection_manager, broadcast_order_update, replay_order_updates, order_log, coalescer, negotiate_encoding
+from services.kitchen_board import kitchen_board, normalize_station
+from services.idempotency import idempotency_store
+from services.user_stats import user_stats
+from services.archive import archive_loop, ARCHIVE_AFTER_DAYS
+from services.print_spooler import print_spooler
+from services.order_timeouts import order_timeouts
+from services.event_bus import event_bus
 
 # Load environment variables
 load_dotenv()
@@ -49,6 +56,18 @@ try:
 except ImportError:
     def set_static_ip(): return True
 
+WAL_CHECKPOINT_INTERVAL = int(os.getenv("SQLITE_WAL_CHECKPOINT_SECONDS", "300"))
+
+async def wal_checkpoint_loop():
+    """WAL dosyasının sınırsız büyümesini önlemek için periyodik checkpoint."""
+    while True:
+        await asyncio.sleep(WAL_CHECKPOINT_INTERVAL)
+        try:
+            busy, log_frames, checkpointed = await asyncio.to_thread(checkpoint_wal)
+            logger.debug(f"WAL checkpoint: {checkpointed}/{log_frames} frame (busy={busy})")
+        except Exception as e:
+            logger.warning(f"WAL checkpoint hatası: {e}")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
@@ -60,7 +79,9 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.warning(f"IP setup check skipped: {e}")
 
-    # 1. Tabloları Oluştur
+    # 1. Tabloları Oluştur (paylaşılan engine DATABASE_URL ile kurulur)
+    get_engine(DATABASE_URL)
+    get_async_engine(DATABASE_URL)
     create_tables()
     logger.info("Database tables created/verified")
 
@@ -92,6 +113,10 @@ async def lifespan(app: FastAPI):
             logger.info("✅ Varsayılan restoran ayarları oluşturuldu.")
             
         db.commit()
+
+        # C) Sipariş zaman aşımı süresi
+        timeout_minutes = db.query(RestaurantConfig.order_timeout_minutes).scalar()
+        order_timeouts.set_timeout(timeout_minutes if timeout_minutes is not None else 30)
         
     except Exception as e:
         db.rollback()
@@ -99,8 +124,38 @@ async def lifespan(app: FastAPI):
     finally:
         db.close()
 
+    # 3. İşçiler arası olay yolu (EVENT_BUS=redis ile birden çok işçi), ardından
+    # mutfak panosunu belleğe yükle (zaman aşımı zamanlayıcısı panoyu izler)
+    await event_bus.start()
+    kitchen_board.subscribe(order_timeouts)
+    async with get_async_session_factory()() as session:
+        await kitchen_board.load(session)
+    logger.info(f"Mutfak panosu yüklendi: {len(kitchen_board.tickets())} aktif sipariş")
+
+    # 4. Önceki çalışmadan kalan yazılmamış ciro artışlarını uygula
+    user_stats.recover()
+    await user_stats.flush()
+
+    background_tasks = [asyncio.create_task(user_stats.run())]
+    if ARCHIVE_AFTER_DAYS > 0:
+        background_tasks.append(asyncio.create_task(archive_loop()))
+    print_spooler.start()
+    background_tasks.append(asyncio.create_task(order_timeouts.run()))
+    background_tasks.append(asyncio.create_task(manager.heartbeat()))
+    if sqlite_profile_enabled(DATABASE_URL) and WAL_CHECKPOINT_INTERVAL > 0:
+        logger.info("SQLite performans profili aktif (WAL)")
+        background_tasks.append(asyncio.create_task(wal_checkpoint_loop()))
+
     yield
     logger.info("Shutting down Restaurant Order System...")
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await print_spooler.stop()
+    await event_bus.stop()
+    await user_stats.flush()
+    user_stats.close()
+    await dispose_engine()
 
 app = FastAPI(
     title="Restaurant Order System",
@@ -153,42 +208,6 @@ async def serve_login():
 async def root():
     return FileResponse(STATIC_DIR / "menu.html")
 
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-        self.kitchen_connections: List[WebSocket] = []
-        self.admin_connections: List[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket, client_type: str = "customer"):
-        self.active_connections.append(websocket)
-        if client_type == "kitchen":
-            self.kitchen_connections.append(websocket)
-        elif client_type == "admin":
-            self.admin_connections.append(websocket)
-        logger.info(f"WS Connected: {client_type}")
-
-    def disconnect(self, websocket: WebSocket, client_type: str = "customer"):
-        if websocket in self.active_connections: self.active_connections.remove(websocket)
-        if client_type == "kitchen" and websocket in self.kitchen_connections: self.kitchen_connections.remove(websocket)
-        if client_type == "admin" and websocket in self.admin_connections: self.admin_connections.remove(websocket)
-        logger.info(f"WS Disconnected: {client_type}")
-
-    async def broadcast_to_all(self, message: dict):
-        if self.active_connections:
-            await asyncio.gather(*[self.send_message(ws, json.dumps(message)) for ws in self.active_connections], return_exceptions=True)
-
-    async def broadcast_to_kitchen(self, message: dict):
-        if self.kitchen_connections:
-            await asyncio.gather(*[self.send_message(ws, json.dumps(message)) for ws in self.kitchen_connections], return_exceptions=True)
-
-    async def broadcast_to_admin(self, message: dict):
-        if self.admin_connections:
-            await asyncio.gather(*[self.send_message(ws, json.dumps(message)) for ws in self.admin_connections], return_exceptions=True)
-
-    async def send_message(self, websocket: WebSocket, message: str):
-        try: await websocket.send_text(message)
-        except: pass
-
 manager = ConnectionManager()
 set_connection_manager(manager)
 
@@ -197,26 +216,44 @@ async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
     
     client_type = "customer"
+    station = None
+    table_number = None
+    encoding = "json"
     try:
-        initial_data = await websocket.receive_text()
+        # Kayıt mesajı göndermeyen bağlantı da boşta kalmaz
+        initial_data = await asyncio.wait_for(websocket.receive_text(), manager.idle_timeout or None)
         try:
             msg = json.loads(initial_data)
             if msg.get("type") == "register":
                 client_type = msg.get("client_type", "customer")
+                if client_type == "kitchen":
+                    station = normalize_station(msg.get("station"))
+                elif client_type == "customer" and str(msg.get("table_number", "")).isdigit():
+                    table_number = int(msg["table_number"])
+                # İsteğe bağlı ikili kodlama: {"encoding": "msgpack", "compress": true}
+                encoding = negotiate_encoding(msg.get("encoding"), bool(msg.get("compress")))
             
-            await manager.connect(websocket, client_type)
+            await manager.connect(websocket, client_type, station, table_number, encoding)
+            # Yeniden bağlanan istemci kaçırdığı olayları alır (yoksa "resync")
+            if msg.get("type") == "register" and "last_seq" in msg:
+                last_seq = msg["last_seq"] if isinstance(msg["last_seq"], int) else None
+                await replay_order_updates(websocket, last_seq, msg.get("epoch"))
             
         except json.JSONDecodeError:
             await manager.connect(websocket, client_type)
 
         while True:
-            data = await websocket.receive_text()
+            await websocket.receive_text()
+            # Her mesaj (sunucu ping'ine "pong" dahil) soketin canlı olduğunu gösterir
+            manager.touch(websocket)
             
     except WebSocketDisconnect:
-        manager.disconnect(websocket, client_type)
+        manager.disconnect(websocket, client_type, station, table_number)
+    except asyncio.TimeoutError:
+        await websocket.close(code=1008)
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
-        manager.disconnect(websocket, client_type)
+        manager.disconnect(websocket, client_type, station, table_number)
 
 @app.get("/health")
 async def health_check():
@@ -226,5 +263,9 @@ async def health_check():
 async def system_info():
     return {"app": "Restaurant System", "status": "running"}
 
+@app.get("/metrics")
+async def system_metrics():
+    return {"db_pool": get_pool_metrics(), "idempotency": idempotency_store.stats(), "user_stats": user_stats.stats(), "order_timeouts": order_timeouts.stats(), "websocket": manager.stats(), "event_bus": event_bus.stats(), "ws_replay": order_log.stats(), "ws_coalesce": coalescer.stats()}
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=False)
\ No newline at end of file
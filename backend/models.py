@@ -1,8 +1,14 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, Boolean, DateTime, JSON, Enum, ForeignKey, Table
+from sqlalchemy import create_engine, event, inspect, text, Index, Column, Integer, String, Float, Boolean, DateTime, JSON, Enum, ForeignKey, LargeBinary, Table
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from datetime import datetime
+from typing import Optional
 import enum
+import os
+import threading
+import time
 
 Base = declarative_base()
 
@@ -40,6 +46,7 @@ class Category(Base):
     icon = Column(String, nullable=True)
     order = Column(Integer, default=0)
     is_active = Column(Boolean, default=True)
+    station = Column(String, nullable=True)  # Mutfak istasyonu (ızgara, bar, tatlı...); boşsa varsayılan istasyon
     created_at = Column(DateTime, default=datetime.now) # Değişti
     products = relationship("Product", back_populates="category")
 
@@ -108,6 +115,15 @@ class Order(Base):
     table = relationship("Table", back_populates="orders")
     items = relationship("OrderItem", back_populates="order")
 
+    __table_args__ = (
+        # Mutfak: status IN (...) ORDER BY created_at
+        Index("ix_orders_status_created_at", "status", "created_at"),
+        # Masa özeti ve masa bazlı filtreler
+        Index("ix_orders_table_id_status", "table_id", "status"),
+        # Tarih aralıklı raporlar ve created_at DESC listeleme
+        Index("ix_orders_created_at_id", "created_at", "id"),
+    )
+
 class OrderItem(Base):
     __tablename__ = "order_items"
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
@@ -121,6 +137,37 @@ class OrderItem(Base):
     order = relationship("Order", back_populates="items")
     product = relationship("Product")
 
+    __table_args__ = (
+        Index("ix_order_items_order_id", "order_id"),
+        Index("ix_order_items_product_id", "product_id"),
+    )
+
+# Soğuk katman: teslim edilmiş/iptal edilmiş eski siparişler (services/archive.py taşır).
+# id'ler orijinal sipariş/kalem id'leridir; raporlar iki katmanı UNION ALL ile okur.
+class ArchivedOrder(Base):
+    __tablename__ = "archived_orders"
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    table_id = Column(Integer, ForeignKey("tables.id"))
+    status = Column(Enum(OrderStatus))
+    customer_notes = Column(String, nullable=True)
+    total_amount = Column(Float, default=0.0)
+    created_at = Column(DateTime, index=True)
+    updated_at = Column(DateTime)
+    archived_at = Column(DateTime, default=datetime.now)
+    items = relationship("ArchivedOrderItem", back_populates="order")
+
+class ArchivedOrderItem(Base):
+    __tablename__ = "archived_order_items"
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    order_id = Column(Integer, ForeignKey("archived_orders.id"), index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), index=True)
+    quantity = Column(Integer, default=1)
+    unit_price = Column(Float, nullable=False)
+    extras = Column(JSON, default={})
+    subtotal = Column(Float, default=0.0)
+    created_at = Column(DateTime)
+    order = relationship("ArchivedOrder", back_populates="items")
+
 class RestaurantConfig(Base):
     __tablename__ = "restaurant_config"
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
@@ -152,19 +199,271 @@ class Inventory(Base):
     product_id = Column(Integer, ForeignKey("products.id"), unique=True)
     quantity = Column(Integer, default=0)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    key = Column(String, primary_key=True)
+    fingerprint = Column(String, nullable=False)
+    response = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.now, index=True)
+
+class PrintJob(Base):
+    __tablename__ = "print_jobs"
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    printer = Column(String, nullable=False)
+    order_id = Column(Integer, nullable=True)
+    kind = Column(String, default="kitchen")  # kitchen | receipt
+    payload = Column(LargeBinary, nullable=False)  # hazır ESC/POS baytları
+    status = Column(String, default="queued")  # queued | sending | done | failed
+    attempts = Column(Integer, default=0)
+    last_error = Column(String, nullable=True)
+    claimed_by = Column(String, nullable=True)  # gönderen işçi (status == "sending")
+    claimed_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.now)
+    printed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Yazıcı kuyruğu: printer + status, id sırasıyla
+        Index("ix_print_jobs_printer_status_id", "printer", "status", "id"),
+    )
+
 # Database setup
-def get_engine():
-    return create_engine("sqlite:///./restaurant.db", connect_args={"check_same_thread": False})
+# Engine ve session fabrikası süreç başına bir kez oluşturulur; her istekte yeni
+# bir bağlantı havuzu açmak yerine aynı havuz paylaşılır.
+DEFAULT_DATABASE_URL = "sqlite:///./restaurant.db"
+
+# Senkron URL sürücüsü -> async sürücü karşılığı
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+_engine = None
+_session_factory = None
+_async_engine = None
+_async_session_factory = None
+_engine_lock = threading.Lock()
+
+
+def _new_pool_metrics() -> dict:
+    return {
+        "checkouts": 0,
+        "checkins": 0,
+        "connects": 0,
+        "wait_time_total_ms": 0.0,
+        "wait_time_max_ms": 0.0,
+    }
+
+_pool_metrics = {"sync": _new_pool_metrics(), "async": _new_pool_metrics()}
+_pool_metrics_lock = threading.Lock()
+
+
+class _MeteredPoolMixin:
+    """Havuzdan bağlantı alırken geçen bekleme süresini ölçer."""
+    metrics_key = "sync"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited_ms = (time.perf_counter() - started) * 1000
+            with _pool_metrics_lock:
+                metrics = _pool_metrics[self.metrics_key]
+                metrics["wait_time_total_ms"] += waited_ms
+                metrics["wait_time_max_ms"] = max(metrics["wait_time_max_ms"], waited_ms)
+
+
+class MeteredQueuePool(_MeteredPoolMixin, QueuePool):
+    metrics_key = "sync"
+
+
+class MeteredAsyncQueuePool(_MeteredPoolMixin, AsyncAdaptedQueuePool):
+    metrics_key = "async"
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes", "on")
+
+
+def get_database_url() -> str:
+    return os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL)
+
+
+def get_async_database_url(url: Optional[str] = None) -> str:
+    """sqlite:// -> sqlite+aiosqlite://, postgresql:// -> postgresql+asyncpg://"""
+    url = url or get_database_url()
+    scheme, sep, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+def sqlite_profile_enabled(url: Optional[str] = None) -> bool:
+    """SQLITE_PERFORMANCE_PROFILE=true ise ve veritabanı SQLite ise aktiftir."""
+    return (url or get_database_url()).startswith("sqlite") and _env_flag("SQLITE_PERFORMANCE_PROFILE")
+
+
+def apply_sqlite_profile(dbapi_connection, connection_record):
+    """Her yeni SQLite bağlantısına WAL ve performans pragmalarını uygular.
+
+    WAL modunda okuyucular yazıcıyı beklemez; mutfak ekranı, admin paneli ve
+    müşteri telefonları aynı anda okurken sipariş yazımı bloklanmaz.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA cache_size=-{_env_int('SQLITE_CACHE_SIZE_KB', 65536)}")
+        cursor.execute(f"PRAGMA mmap_size={_env_int('SQLITE_MMAP_SIZE', 268435456)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute(f"PRAGMA busy_timeout={_env_int('SQLITE_BUSY_TIMEOUT_MS', 5000)}")
+    finally:
+        cursor.close()
+
+
+def checkpoint_wal(mode: str = "PASSIVE"):
+    """WAL dosyasını ana veritabanına aktarır; (busy, log, checkpointed) döndürür."""
+    with get_engine().connect() as conn:
+        return tuple(conn.exec_driver_sql(f"PRAGMA wal_checkpoint({mode})").one())
+
+
+def _count_pool_event(metrics_key: str, key: str):
+    def listener(*args):
+        with _pool_metrics_lock:
+            _pool_metrics[metrics_key][key] += 1
+    return listener
+
+
+def _pool_options(url: str) -> dict:
+    """DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE ve DB_POOL_TIMEOUT ile ayarlanır."""
+    options = {
+        "pool_size": _env_int("DB_POOL_SIZE", 10),
+        "max_overflow": _env_int("DB_MAX_OVERFLOW", 20),
+        "pool_recycle": _env_int("DB_POOL_RECYCLE", 1800),
+        "pool_timeout": _env_int("DB_POOL_TIMEOUT", 30),
+    }
+    if not url.startswith("sqlite"):
+        options["pool_pre_ping"] = True
+    return options
+
+
+def _instrument_engine(engine, url: str, metrics_key: str):
+    event.listen(engine, "checkout", _count_pool_event(metrics_key, "checkouts"))
+    event.listen(engine, "checkin", _count_pool_event(metrics_key, "checkins"))
+    event.listen(engine, "connect", _count_pool_event(metrics_key, "connects"))
+    if sqlite_profile_enabled(url):
+        event.listen(engine, "connect", apply_sqlite_profile)
+
+
+def _build_engine(url: str):
+    kwargs = _pool_options(url)
+    if url.startswith("sqlite"):
+        kwargs["connect_args"] = {"check_same_thread": False}
+    engine = create_engine(url, poolclass=MeteredQueuePool, **kwargs)
+    _instrument_engine(engine, url, "sync")
+    return engine
+
+
+def _build_async_engine(url: str):
+    engine = create_async_engine(get_async_database_url(url), poolclass=MeteredAsyncQueuePool, **_pool_options(url))
+    _instrument_engine(engine.sync_engine, url, "async")
+    return engine
+
+
+def get_engine(url: Optional[str] = None):
+    """Paylaşılan engine'i döndürür; ilk çağrıda DATABASE_URL ile oluşturulur."""
+    global _engine, _session_factory
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _build_engine(url or get_database_url())
+                _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=_engine)
+    return _engine
+
+
+def get_async_engine(url: Optional[str] = None):
+    """Event loop'u bloklamayan async engine (aiosqlite / asyncpg)."""
+    global _async_engine, _async_session_factory
+    if _async_engine is None:
+        with _engine_lock:
+            if _async_engine is None:
+                _async_engine = _build_async_engine(url or get_database_url())
+                _async_session_factory = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+
+def get_session_factory():
+    get_engine()
+    return _session_factory
+
+
+def get_async_session_factory():
+    get_async_engine()
+    return _async_session_factory
+
 
 def get_session():
-    engine = get_engine()
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    db = SessionLocal()
+    db = get_session_factory()()
     try:
         yield db
     finally:
         db.close()
 
+
+async def get_async_session():
+    async with get_async_session_factory()() as db:
+        yield db
+
+
+def get_pool_metrics() -> dict:
+    """Havuz durumunu ve checkout/bekleme sayaçlarını döndürür."""
+    with _pool_metrics_lock:
+        result = {key: dict(metrics) for key, metrics in _pool_metrics.items()}
+    pools = {"sync": _engine.pool if _engine is not None else None,
+             "async": _async_engine.pool if _async_engine is not None else None}
+    for key, metrics in result.items():
+        if metrics["checkouts"]:
+            metrics["wait_time_avg_ms"] = metrics["wait_time_total_ms"] / metrics["checkouts"]
+        else:
+            metrics["wait_time_avg_ms"] = 0.0
+        pool = pools[key]
+        if pool is not None:
+            metrics.update({
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+            })
+    return result
+
+
+async def dispose_engine():
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    if _engine is not None:
+        _engine.dispose()
+
+
 def create_tables():
     engine = get_engine()
     Base.metadata.create_all(bind=engine)
+    # create_all mevcut tablolara sonradan eklenen kolonları ve indeksleri oluşturmaz
+    existing = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            present = {c["name"] for c in existing.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in present and column.nullable and not column.primary_key:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'))
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
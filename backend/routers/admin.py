@@ -2,8 +2,9 @@ from fastapi import APIRouter, HTTPException, Depends, Query, UploadFile, File
 from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from models import User, Product, Category, Order, Table, OrderItem, OrderStatus, RestaurantConfig, Inventory, get_session
+from models import User, Product, Category, Order, Table, OrderStatus, RestaurantConfig, Inventory, get_session
 from services.ai_service import generate_analysis_text
+from services.order_timeouts import order_timeouts
 from collections import defaultdict
 from io import BytesIO
 from fastapi.responses import FileResponse
@@ -11,7 +12,8 @@ import importlib
 from auth import require_role, get_current_active_user
 from models import UserRole
 from datetime import datetime, date, timedelta
-from sqlalchemy import func
+from sqlalchemy import func, select
+from services.archive import order_history, order_item_history, archive_orders, ARCHIVE_AFTER_DAYS
 import os
 import shutil
 import logging
@@ -56,6 +58,16 @@ def safe_parse_date(date_val):
             pass
     return None
 
+def product_volumes(db: Session) -> Dict[int, int]:
+    """Ürün başına satılan adet (sıcak + arşiv kalemleri, SQL'de toplanır)."""
+    items = order_item_history("product_id", "quantity")
+    return {
+        pid: qty or 0
+        for pid, qty in db.execute(
+            select(items.c.product_id, func.sum(items.c.quantity)).where(items.c.product_id.isnot(None)).group_by(items.c.product_id)
+        )
+    }
+
 # --- ENDPOINTLER ---
 
 @router.get("/dashboard")
@@ -63,42 +75,38 @@ async def get_dashboard_stats(
     current_user = Depends(require_role([UserRole.ADMIN, UserRole.SUPERVISOR])),
     db: Session = Depends(get_session)
 ):
-    all_orders = db.query(Order).all()
-    
     total_products = db.query(Product).filter(Product.is_active == True).count()
     total_tables = db.query(Table).filter(Table.is_active == True).count()
     
     today = date.today()
     today_order_count = 0
     today_revenue = 0.0
-    active_orders = 0
+    # Aktif siparişler arşive taşınmaz; sıcak tablodan sayılır
+    active_orders = db.query(Order).filter(Order.status.in_([OrderStatus.BEKLIYOR, OrderStatus.HAZIRLANIYOR])).count()
     
     daily_revenue = {} 
     for i in range(6, -1, -1):
         d = (today - timedelta(days=i)).isoformat()
         daily_revenue[d] = 0.0
 
-    for o in all_orders:
-        o_dt = safe_parse_date(o.created_at)
+    # Son 7 gün: sıcak + arşiv siparişleri, yalnızca gereken kolonlar
+    week_start = datetime.combine(today - timedelta(days=6), datetime.min.time())
+    history = order_history("status", "total_amount", "created_at", where=lambda o: o.created_at >= week_start)
+    for status, total_amount, created_at in db.execute(select(history)):
+        o_dt = safe_parse_date(created_at)
         if not o_dt: continue
         
         o_date = o_dt.date()
         o_date_str = o_date.isoformat()
-        
-        status = str(o.status).lower() if o.status else ""
-        is_cancelled = status in ["cancelled", "iptal"]
-        is_active = status in ["pending", "preparing", "bekliyor", "hazirlaniyor"]
+        is_cancelled = status == OrderStatus.IPTAL
         
         if o_date == today:
             today_order_count += 1
             if not is_cancelled:
-                today_revenue += (o.total_amount or 0.0)
-        
-        if is_active:
-            active_orders += 1
+                today_revenue += (total_amount or 0.0)
             
         if o_date_str in daily_revenue and not is_cancelled:
-            daily_revenue[o_date_str] += (o.total_amount or 0.0)
+            daily_revenue[o_date_str] += (total_amount or 0.0)
 
     daily_trend = [{"date": k, "revenue": v} for k, v in daily_revenue.items()]
 
@@ -125,11 +133,15 @@ async def get_sales_report(
     if not start_date: start_date = date.today() - timedelta(days=30)
     if not end_date: end_date = date.today()
     
-    # EMOJİSİZ PRINT (HATA VERMEYECEK)
-    print(f"[INFO] Rapor Istegi: {start_date} - {end_date}")
+    logger.info(f"Rapor isteği: {start_date} - {end_date}")
     
-    all_orders = db.query(Order).all()
-    print(f"[INFO] Veritabanindaki Toplam Siparis: {len(all_orders)}")
+    # Tarih aralığı SQL'de süzülür; sıcak ve arşiv tabloları birlikte okunur
+    range_start = datetime.combine(start_date, datetime.min.time())
+    range_end = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+    in_range = lambda o: (o.created_at >= range_start) & (o.created_at < range_end)
+    history = order_history("status", "total_amount", "created_at", where=in_range)
+    rows = db.execute(select(history)).all()
+    logger.info(f"Tarih aralığındaki sipariş: {len(rows)}")
 
     filtered_orders = []
     total_revenue = 0.0
@@ -140,11 +152,10 @@ async def get_sales_report(
         day = (start_date + timedelta(days=i)).isoformat()
         breakdown[day] = {"revenue": 0, "count": 0}
 
-    product_stats = {}
     processed_count = 0
 
-    for o in all_orders:
-        o_dt = safe_parse_date(o.created_at)
+    for status, total_amount, created_at in rows:
+        o_dt = safe_parse_date(created_at)
         
         if not o_dt: 
             continue
@@ -154,27 +165,28 @@ async def get_sales_report(
         if start_date <= o_date <= end_date:
             processed_count += 1
             
-            status = str(o.status).lower() if o.status else ""
-            if status in ["cancelled", "iptal"]:
+            if status == OrderStatus.IPTAL:
                 continue
                 
-            filtered_orders.append(o)
-            amount = o.total_amount or 0.0
+            filtered_orders.append(total_amount)
+            amount = total_amount or 0.0
             total_revenue += amount
             
             d_str = o_date.isoformat()
             if d_str in breakdown:
                 breakdown[d_str]["revenue"] += amount
                 breakdown[d_str]["count"] += 1
-            
-            for item in o.items:
-                if not item.product: continue
-                pid = item.product_id
-                if pid not in product_stats:
-                    product_stats[pid] = {"name": item.product.name, "qty": 0, "total": 0}
-                
-                product_stats[pid]["qty"] += item.quantity
-                product_stats[pid]["total"] += (item.subtotal or 0.0)
+
+    items = order_item_history("product_id", "quantity", "subtotal",
+                               where=lambda o: in_range(o) & (o.status != OrderStatus.IPTAL))
+    product_stats = {
+        pid: {"name": name, "qty": qty or 0, "total": total or 0.0}
+        for pid, name, qty, total in db.execute(
+            select(items.c.product_id, Product.name, func.sum(items.c.quantity), func.sum(items.c.subtotal))
+            .join(Product, Product.id == items.c.product_id)
+            .group_by(items.c.product_id, Product.name)
+        )
+    }
 
     # EMOJİSİZ PRINTLER
     print(f"[OK] Tarih Araligina Giren: {processed_count}")
@@ -197,10 +209,7 @@ async def product_matrix(
     current_user = Depends(require_role([UserRole.ADMIN])),
     db: Session = Depends(get_session)
 ):
-    counts = defaultdict(int)
-    for item in db.query(OrderItem).all():
-        if item.product_id:
-            counts[item.product_id] += item.quantity or 0
+    counts = product_volumes(db)
     products = db.query(Product).all()
     matrix = []
     vols = [counts.get(p.id, 0) for p in products]
@@ -221,17 +230,16 @@ async def closing_report_pdf(
     current_user = Depends(require_role([UserRole.ADMIN])),
     db: Session = Depends(get_session)
 ):
-    orders = db.query(Order).all()
-    total_revenue = 0.0
-    for o in orders:
-        status = str(o.status).lower() if o.status else ""
-        if status not in ["cancelled", "iptal"]:
-            total_revenue += float(o.total_amount or 0.0)
+    history = order_history("total_amount", where=lambda o: o.status != OrderStatus.IPTAL)
+    total_revenue = float(db.execute(select(func.sum(history.c.total_amount))).scalar() or 0.0)
+    items = order_item_history("product_id", "quantity", "subtotal")
     counts = defaultdict(int)
     totals = defaultdict(float)
-    for item in db.query(OrderItem).all():
-        counts[item.product_id] += item.quantity or 0
-        totals[item.product_id] += float(item.subtotal or 0.0)
+    for pid, qty, total in db.execute(
+        select(items.c.product_id, func.sum(items.c.quantity), func.sum(items.c.subtotal)).group_by(items.c.product_id)
+    ):
+        counts[pid] = qty or 0
+        totals[pid] = float(total or 0.0)
     products = db.query(Product).all()
     top = sorted([
         {"name": p.name, "qty": counts.get(p.id, 0), "total": totals.get(p.id, 0.0)} for p in products
@@ -280,6 +288,17 @@ async def closing_report_pdf(
         logger.error(f"PDF generation failed: {e}")
         raise HTTPException(status_code=500, detail="PDF oluşturulamadı")
 
+@router.post("/archive/run")
+async def run_archive(
+    older_than_days: int = Query(None, ge=0),
+    current_user = Depends(require_role([UserRole.ADMIN]))
+):
+    # Zamanlanmış arşivleyiciyi beklemeden elle çalıştırır
+    days = older_than_days if older_than_days is not None else ARCHIVE_AFTER_DAYS
+    if not days and older_than_days is None:
+        raise HTTPException(status_code=400, detail="Arşivleme kapalı (ARCHIVE_AFTER_DAYS=0); older_than_days belirtin")
+    return {"archived": await archive_orders(days), "older_than_days": days}
+
 class InventoryUpdate(BaseModel):
     quantity: int
 
@@ -343,6 +362,7 @@ async def update_system_settings(
         config.logo_url = settings.logo_url
     
     db.commit()
+    order_timeouts.update_timeout(settings.order_timeout_minutes)
     return {"message": "Ayarlar başarıyla güncellendi"}
 
 @router.post("/settings/logo")
@@ -6,6 +6,7 @@ from models import User, get_session
 from auth import verify_password, get_password_hash, create_access_token, get_current_active_user, require_role
 from models import UserRole
 from datetime import timedelta
+from services.user_stats import user_stats
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -111,6 +112,11 @@ async def get_current_user_info(current_user: User = Depends(get_current_active_
         "created_at": current_user.created_at
     }
 
+@router.get("/me/stats")
+async def get_current_user_stats(current_user: User = Depends(get_current_active_user)):
+    # Kalıcı ciro + henüz toplu yazılmamış artışlar
+    return await user_stats.get(current_user.id)
+
 @router.get("/users")
 async def get_users(
     current_user: User = Depends(require_role([UserRole.ADMIN])),
@@ -1,13 +1,24 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
-from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
-from models import Order, OrderItem, OrderStatus, Table, Product, Inventory, get_session
+from fastapi import APIRouter, HTTPException, Depends, Query, Header, Request, Response
+from typing import List, Optional, Dict, Any, Tuple, Union
+from sqlalchemy import select, insert, update, tuple_
+from sqlalchemy.orm import Session, selectinload, joinedload, contains_eager
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Order, OrderItem, OrderStatus, Table, Product, Inventory, get_session, get_async_session
 from auth import require_role, get_current_active_user, optional_current_user
 from models import UserRole
 from datetime import datetime
+from collections import defaultdict
 from websocket_utils import broadcast_order_update
+from services.inventory import reserve_stock, InsufficientStockError
+from services.kitchen_board import kitchen_board, kitchen_ticket, ticket_options, product_station, normalize_station
+from services.idempotency import idempotency_store, request_fingerprint
+from services.user_stats import user_stats
+from services.print_spooler import print_spooler, PRINT_KITCHEN_ON_ORDER
 from pydantic import BaseModel
 import logging
+import json
+import base64
+import os
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 logger = logging.getLogger("printer")
@@ -44,204 +55,445 @@ class OrderResponse(BaseModel):
     updated_at: datetime
     items: List[OrderItemResponse]
 
+class OrderPage(BaseModel):
+    items: List[OrderResponse]
+    next_cursor: Optional[str]
+
+MAX_BATCH_ORDERS = int(os.getenv("ORDER_BATCH_MAX", "100"))
+
+class BatchOrderCreate(BaseModel):
+    orders: List[OrderCreate]
+
+class BatchOrderResult(BaseModel):
+    index: int
+    ok: bool
+    status_code: int
+    order: Optional[OrderResponse] = None
+    error: Optional[str] = None
+
+class BatchOrderResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BatchOrderResult]
+
 # DÜZELTME: Status artık metin (str) olarak geliyor
 class OrderStatusUpdate(BaseModel):
     status: str 
 
+class BulkStatusUpdate(BaseModel):
+    order_ids: List[int]
+    status: str
+
+class BulkStatusResponse(BaseModel):
+    status: OrderStatus
+    updated: List[int]
+    unchanged: List[int]
+    not_found: List[int]
+
 # --- ENDPOINTLER ---
 
+def board_response(request: Request, station: Optional[str] = None) -> Response:
+    # Mutfak panosu RAM'den servis edilir; değişmediyse 304 döner
+    # ?station= verilirse yalnızca o istasyonun kalemleri döner
+    station = normalize_station(station)
+    body, etag = kitchen_board.station_snapshot(station) if station else (None, kitchen_board.etag)
+    headers = {"ETag": etag, "X-Board-Version": str(kitchen_board.version), "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body or kitchen_board.snapshot(), media_type="application/json", headers=headers)
+
 @router.get("/kitchen/pending")
-async def get_pending_orders_for_kitchen(db: Session = Depends(get_session)):
-    orders = db.query(Order).filter(
-        Order.status.in_([OrderStatus.BEKLIYOR, OrderStatus.HAZIRLANIYOR])
-    ).order_by(Order.created_at.asc()).all()
-    
-    result = []
-    for order in orders:
-        items = []
-        for item in order.items:
-            p_name = item.product.name if item.product else "Silinmiş Ürün"
-            items.append({
-                "id": item.id, "product_id": item.product_id, "product_name": p_name,
-                "quantity": item.quantity, "extras": item.extras, "subtotal": item.subtotal
-            })
-        table_name = order.table.name if order.table else "Masa Bilinmiyor"
-        result.append({
-            "id": order.id, "table_name": table_name, "status": order.status,
-            "customer_notes": order.customer_notes, "created_at": order.created_at.isoformat(),
-            "items": items, "total_amount": order.total_amount
-        })
-    return result
+async def get_pending_orders_for_kitchen(request: Request, station: Optional[str] = Query(None)):
+    return board_response(request, station)
 
 @router.get("/kitchen-tickets")
-async def get_kitchen_tickets(db: Session = Depends(get_session)):
-    orders = db.query(Order).filter(
-        Order.status.in_([OrderStatus.BEKLIYOR, OrderStatus.HAZIRLANIYOR])
-    ).order_by(Order.created_at.asc()).all()
-    result = []
-    for order in orders:
-        items = []
-        for item in order.items:
-            p_name = item.product.name if item.product else "Silinmiş Ürün"
-            items.append({
-                "id": item.id,
-                "product_id": item.product_id,
-                "product_name": p_name,
-                "quantity": item.quantity,
-                "extras": item.extras,
-                "subtotal": item.subtotal
-            })
-        table_name = order.table.name if order.table else "Masa Bilinmiyor"
-        result.append({
-            "id": order.id,
-            "table_name": table_name,
-            "status": order.status,
-            "customer_notes": order.customer_notes,
-            "created_at": order.created_at.isoformat(),
-            "items": items,
-            "total_amount": order.total_amount
-        })
-    return result
+async def get_kitchen_tickets(request: Request, station: Optional[str] = Query(None)):
+    return board_response(request, station)
 
 @router.post("/printer/print-order/{order_id}")
-async def print_order_stub(order_id: int):
-    logger.info(f"Printing order #{order_id} to ESC/POS printer")
-    return {"message": f"Printing order #{order_id}"}
+async def print_order(order_id: int, kind: str = Query("kitchen", pattern="^(kitchen|receipt)$")):
+    # Fiş kuyruğa yazılır, gönderim arka planda (services/print_spooler.py)
+    try:
+        job_id = await print_spooler.enqueue(order_id, kind)
+    except LookupError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if job_id is None: raise HTTPException(status_code=404, detail="Order not found")
+    logger.info(f"Order #{order_id} queued for {kind} printer (job {job_id})")
+    return {"message": f"Printing order #{order_id}", "job_id": job_id}
+
+@router.get("/printer/status")
+async def printer_status():
+    return await print_spooler.status()
+
+@router.post("/printer/jobs/{job_id}/retry")
+async def retry_print_job(
+    job_id: int,
+    current_user = Depends(require_role([UserRole.ADMIN, UserRole.SUPERVISOR]))
+):
+    if not await print_spooler.retry(job_id):
+        raise HTTPException(status_code=404, detail="Başarısız yazdırma işi bulunamadı")
+    return {"message": f"Job {job_id} requeued"}
 
 @router.get("/stats")
 async def get_order_stats(db: Session = Depends(get_session)):
     return {"total_orders": db.query(Order).count()}
 
 @router.post("", response_model=OrderResponse)
-async def create_order(order: OrderCreate, db: Session = Depends(get_session)):
-    # FIX: Masayı table_number ile bul
-    table = db.query(Table).filter(Table.number == order.table_number).first()
-    if not table: raise HTTPException(status_code=404, detail=f"Table with number {order.table_number} not found")
-    
-    new_order = Order(table_id=table.id, customer_notes=order.customer_notes, status=OrderStatus.BEKLIYOR)
-    db.add(new_order)
-    db.commit()
-    db.refresh(new_order)
-    
-    total_amount = 0.0
-    order_items = []
+async def create_order(
+    order: OrderCreate,
+    response: Response,
+    db: AsyncSession = Depends(get_async_session),
+    idempotency_key: Optional[str] = Header(None)
+):
+    if not idempotency_key:
+        return await place_order(order, db)
+    # Tekrar denemelerde önbellekteki yanıt döner; DB ve WebSocket'e dokunulmaz
+    result, replayed = await idempotency_store.run(idempotency_key, request_fingerprint(order), lambda: place_order(order, db))
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+def order_item_rows(order: OrderCreate, products: Dict[int, Product]) -> List[Dict[str, Any]]:
+    rows = []
     for item_data in order.items:
-        product = db.query(Product).filter(Product.id == item_data.product_id).first()
+        product = products.get(item_data.product_id)
         if not product: continue
-        inv = db.query(Inventory).filter(Inventory.product_id == item_data.product_id).first()
-        if inv and (inv.quantity or 0) < item_data.quantity:
-            raise HTTPException(status_code=400, detail=f"Yetersiz stok: Ürün ID {item_data.product_id}")
-        subtotal = product.price * item_data.quantity
-        total_amount += subtotal
-        order_item = OrderItem(order_id=new_order.id, product_id=item_data.product_id, quantity=item_data.quantity, unit_price=product.price, extras=item_data.extras, subtotal=subtotal)
-        db.add(order_item)
-        db.commit()
-        db.refresh(order_item)
-        order_items.append({
-            "id": order_item.id, "product_id": order_item.product_id, "quantity": order_item.quantity,
-            "unit_price": order_item.unit_price, "extras": order_item.extras, "subtotal": order_item.subtotal,
-            "product": {"id": product.id, "name": product.name, "description": product.description, "price": product.price, "image_url": product.image_url}
+        rows.append({
+            "product_id": product.id, "quantity": item_data.quantity, "unit_price": product.price,
+            "extras": item_data.extras, "subtotal": product.price * item_data.quantity
         })
-    
-    new_order.total_amount = total_amount
-    db.commit()
-    # Stok düş
+    return rows
+
+def requested_stock(order: OrderCreate, stock: Dict[int, int]) -> Dict[int, int]:
+    # Aynı ürün birden fazla satırda olabilir; stok toplam adet üzerinden ayrılır
+    requested = defaultdict(int)
+    for item_data in order.items:
+        if item_data.product_id in stock:
+            requested[item_data.product_id] += item_data.quantity
+    return dict(requested)
+
+async def insert_order_items(db: AsyncSession, item_rows: List[Dict[str, Any]]) -> list:
+    # Kalemler tek executemany ile eklenir; RETURNING satırları item_rows sırasıyla
+    # döner (çok-satırlı INSERT'te id/RETURNING sırası garanti değildir). Postgres
+    # bunu sıralı çok-satırlı INSERT'lerle yapar, SQLite satır satır ekler.
+    if not item_rows:
+        return []
+    result = await db.execute(
+        insert(OrderItem).returning(
+            OrderItem.id, OrderItem.order_id, OrderItem.product_id, OrderItem.quantity,
+            OrderItem.unit_price, OrderItem.extras, OrderItem.subtotal,
+            sort_by_parameter_order=True
+        ).execution_options(render_nulls=True),  # None'lı satırlar ayrı gruba bölünmesin
+        item_rows
+    )
+    return result.all()
+
+def created_order(order: Dict[str, Any], table: Table, created_items: list, products: Dict[int, Product]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Yeni siparişin yanıtını üretir, mutfak panosuna ekler; yayınlanacak mesajı da döner."""
+    order_items = [{
+        "id": row.id, "product_id": row.product_id, "quantity": row.quantity,
+        "unit_price": float(row.unit_price), "extras": row.extras, "subtotal": float(row.subtotal),
+        "product": {"id": product.id, "name": product.name, "description": product.description, "price": product.price, "image_url": product.image_url},
+        "station": product_station(product)
+    } for row, product in ((row, products[row.product_id]) for row in created_items)]
+
+    kitchen_board.add({
+        "id": order["id"], "table_name": table.name, "status": order["status"],
+        "customer_notes": order["customer_notes"], "created_at": order["created_at"].isoformat(),
+        "items": [{
+            "id": i["id"], "product_id": i["product_id"], "product_name": i["product"]["name"],
+            "quantity": i["quantity"], "extras": i["extras"], "subtotal": i["subtotal"], "station": i["station"]
+        } for i in order_items],
+        "total_amount": order["total_amount"]
+    })
+
+    response = {
+        "id": order["id"], "table_id": table.id, "table_name": table.name, "status": order["status"],
+        "customer_notes": order["customer_notes"], "total_amount": order["total_amount"],
+        "created_at": order["created_at"], "updated_at": order["updated_at"], "items": order_items
+    }
+    message = {
+        "id": order["id"], "table_id": table.id, "table_number": table.number, "table_name": table.name, "status": order["status"],
+        "customer_notes": order["customer_notes"], "total_amount": order["total_amount"],
+        "created_at": order["created_at"].isoformat(),
+        "items": [{"product_name": i['product']['name'], "quantity": i['quantity'], "station": i["station"]} for i in order_items]
+    }
+    return response, message
+
+async def place_order(order: OrderCreate, db: AsyncSession) -> Dict[str, Any]:
+    # Tek transaction: masa, ürünler ve stok birer sorguyla okunur,
+    # stok tek koşullu UPDATE ile ayrılır, kalemler toplu eklenir ve bir kez commit edilir.
+    table = (await db.execute(select(Table).filter(Table.number == order.table_number))).scalars().first()
+    if not table: raise HTTPException(status_code=404, detail=f"Table with number {order.table_number} not found")
+
+    product_ids = {item.product_id for item in order.items}
+    products = {p.id: p for p in (await db.execute(select(Product).options(joinedload(Product.category)).filter(Product.id.in_(product_ids)))).scalars()}
+    stock = dict((await db.execute(
+        select(Inventory.product_id, Inventory.quantity).filter(Inventory.product_id.in_(products.keys()))
+    )).all())
+
+    # Koşullu UPDATE eşzamanlı siparişlerde fazla satışı engeller
+    try:
+        await reserve_stock(db, requested_stock(order, stock))
+    except InsufficientStockError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+    item_rows = order_item_rows(order, products)
+    new_order = Order(table_id=table.id, customer_notes=order.customer_notes, status=OrderStatus.BEKLIYOR,
+                      total_amount=sum(row["subtotal"] for row in item_rows))
+    db.add(new_order)
+    await db.flush()
+
+    for row in item_rows: row["order_id"] = new_order.id
+    created_items = await insert_order_items(db, item_rows)
+    await db.commit()
+
+    response, message = created_order({
+        "id": new_order.id, "status": new_order.status, "customer_notes": new_order.customer_notes,
+        "total_amount": new_order.total_amount, "created_at": new_order.created_at, "updated_at": new_order.updated_at
+    }, table, created_items, products)
+    await broadcast_order_update(message, "order_created")
+    if PRINT_KITCHEN_ON_ORDER:
+        print_spooler.submit(new_order.id, "kitchen")
+    return response
+
+@router.post("/batch", response_model=BatchOrderResponse)
+async def create_orders_batch(
+    batch: BatchOrderCreate,
+    db: AsyncSession = Depends(get_async_session),
+    current_user = Depends(require_role([UserRole.WAITER, UserRole.ADMIN, UserRole.SUPERVISOR]))
+):
+    """
+    Garson tabletleri için toplu sipariş: masalar, ürünler ve stok birer sorguyla
+    okunur, tüm siparişler tek commit ile yazılır ve tek bir "orders_created"
+    WebSocket mesajı yayınlanır. Her sipariş için ayrı sonuç döner; masası
+    bulunamayan veya stoğu yetmeyen siparişler diğerlerini etkilemez.
+    """
+    if len(batch.orders) > MAX_BATCH_ORDERS:
+        raise HTTPException(status_code=422, detail=f"Tek seferde en fazla {MAX_BATCH_ORDERS} sipariş gönderilebilir")
+
+    table_numbers = {o.table_number for o in batch.orders}
+    product_ids = {item.product_id for o in batch.orders for item in o.items}
+    tables = {t.number: t for t in (await db.execute(select(Table).filter(Table.number.in_(table_numbers)))).scalars()}
+    products = {p.id: p for p in (await db.execute(select(Product).options(joinedload(Product.category)).filter(Product.id.in_(product_ids)))).scalars()}
+    stock = dict((await db.execute(
+        select(Inventory.product_id, Inventory.quantity).filter(Inventory.product_id.in_(products.keys()))
+    )).all())
+
+    results: List[Dict[str, Any]] = [{"index": i, "ok": False} for i in range(len(batch.orders))]
+    accepted = []  # (index, table, item_rows)
+    for index, order in enumerate(batch.orders):
+        table = tables.get(order.table_number)
+        if not table:
+            results[index].update(status_code=404, error=f"Table with number {order.table_number} not found")
+            continue
+        # Her sipariş kendi stoğunu ayırır; yetmezse yalnızca o siparişin ayırması geri alınır
+        try:
+            await reserve_stock(db, requested_stock(order, stock))
+        except InsufficientStockError as e:
+            results[index].update(status_code=400, error=str(e))
+            continue
+        accepted.append((index, table, order_item_rows(order, products)))
+
+    messages = []
+    if accepted:
+        now = datetime.now()
+        order_rows = [{
+            "table_id": table.id, "customer_notes": batch.orders[index].customer_notes, "status": OrderStatus.BEKLIYOR,
+            "total_amount": sum(row["subtotal"] for row in item_rows), "created_at": now, "updated_at": now
+        } for index, table, item_rows in accepted]
+        # Çok-satırlı INSERT RETURNING sırası garanti değildir: id'ler order_rows sırasıyla istenir
+        order_ids = (await db.execute(
+            insert(Order).returning(Order.id, sort_by_parameter_order=True).execution_options(render_nulls=True), order_rows
+        )).scalars().all()
+
+        all_item_rows = []
+        for order_id, (index, table, item_rows) in zip(order_ids, accepted):
+            for row in item_rows: row["order_id"] = order_id
+            all_item_rows.extend(item_rows)
+        items_by_order = defaultdict(list)
+        for row in await insert_order_items(db, all_item_rows):
+            items_by_order[row.order_id].append(row)
+        await db.commit()
+
+        for order_id, order_row, (index, table, item_rows) in zip(order_ids, order_rows, accepted):
+            response, message = created_order({"id": order_id, **order_row}, table, items_by_order[order_id], products)
+            results[index].update(ok=True, status_code=200, order=response)
+            messages.append(message)
+            if PRINT_KITCHEN_ON_ORDER:
+                print_spooler.submit(order_id, "kitchen")
+        await broadcast_order_update(messages, "orders_created")
+    else:
+        await db.rollback()
+
+    return {"created": len(messages), "failed": len(batch.orders) - len(messages), "results": results}
+
+def order_with_items():
+    # Kalemler ve ürünler sabit sayıda sorguyla yüklenir (N+1 yok)
+    return selectinload(Order.items).selectinload(OrderItem.product)
+
+def order_response(order: Order, table_name: str, product_details: bool = True) -> Dict[str, Any]:
+    items = []
+    for item in order.items:
+        p_name = item.product.name if item.product else "Bilinmeyen"
+        p_desc = (item.product.description if item.product else "") if product_details else ""
+        p_img = (item.product.image_url if item.product else "") if product_details else ""
+        items.append({"id": item.id, "product_id": item.product_id, "quantity": item.quantity, "unit_price": item.unit_price, "extras": item.extras, "subtotal": item.subtotal, "product": {"id": item.product_id, "name": p_name, "description": p_desc, "price": item.unit_price, "image_url": p_img}})
+    return {"id": order.id, "table_id": order.table_id, "table_name": table_name, "status": order.status, "customer_notes": order.customer_notes, "total_amount": order.total_amount, "created_at": order.created_at, "updated_at": order.updated_at, "items": items}
+
+def encode_cursor(created_at: datetime, order_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), order_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
     try:
-        for item_data in order.items:
-            inv = db.query(Inventory).filter(Inventory.product_id == item_data.product_id).first()
-            if inv:
-                inv.quantity = max(0, int(inv.quantity or 0) - int(item_data.quantity or 0))
-        db.commit()
+        created_at, order_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), int(order_id)
     except Exception:
-        db.rollback()
-    
-    await broadcast_order_update({
-        "id": new_order.id, "table_id": new_order.table_id, "table_name": table.name, "status": new_order.status,
-        "customer_notes": new_order.customer_notes, "total_amount": new_order.total_amount,
-        "created_at": new_order.created_at.isoformat(),
-        "items": [{"product_name": i['product']['name'], "quantity": i['quantity']} for i in order_items]
-    }, "order_created")
-    
-    return {
-        "id": new_order.id, "table_id": new_order.table_id, "table_name": table.name, "status": new_order.status,
-        "customer_notes": new_order.customer_notes, "total_amount": new_order.total_amount,
-        "created_at": new_order.created_at, "updated_at": new_order.updated_at, "items": order_items
-    }
+        raise HTTPException(status_code=400, detail="Geçersiz cursor")
 
-@router.get("", response_model=List[OrderResponse])
-async def get_orders(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000), status_filter: Optional[OrderStatus] = Query(None), table_id: Optional[int] = Query(None), db: Session = Depends(get_session)):
-    query = db.query(Order).join(Table)
+@router.get("", response_model=Union[OrderPage, List[OrderResponse]])
+async def get_orders(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000), status_filter: Optional[OrderStatus] = Query(None), table_id: Optional[int] = Query(None), cursor: Optional[str] = Query(None), db: AsyncSession = Depends(get_async_session)):
+    query = select(Order).join(Table).options(contains_eager(Order.table), order_with_items())
     if status_filter: query = query.filter(Order.status == status_filter)
     if table_id: query = query.filter(Order.table_id == table_id)
-    orders = query.order_by(Order.created_at.desc()).offset(skip).limit(limit).all()
-    
-    result = []
-    for order in orders:
-        items = []
-        for item in order.items:
-            p_name = item.product.name if item.product else "Bilinmeyen"
-            p_desc = item.product.description if item.product else ""
-            p_img = item.product.image_url if item.product else ""
-            items.append({"id": item.id, "product_id": item.product_id, "quantity": item.quantity, "unit_price": item.unit_price, "extras": item.extras, "subtotal": item.subtotal, "product": {"id": item.product_id, "name": p_name, "description": p_desc, "price": item.unit_price, "image_url": p_img}})
-        table_name = order.table.name if order.table else "Masa Bilinmiyor"
-        result.append({"id": order.id, "table_id": order.table_id, "table_name": table_name, "status": order.status, "customer_notes": order.customer_notes, "total_amount": order.total_amount, "created_at": order.created_at, "updated_at": order.updated_at, "items": items})
-    return result
+    query = query.order_by(Order.created_at.desc(), Order.id.desc())
+
+    if cursor is None:
+        # Eski offset modu (geriye uyumluluk)
+        orders = (await db.execute(query.offset(skip).limit(limit))).scalars().all()
+        return [order_response(order, order.table.name if order.table else "Masa Bilinmiyor") for order in orders]
+
+    # Keyset modu: ?cursor= ile ilk sayfa, sonra dönen next_cursor ile devam.
+    # (created_at, id) indeksi sayesinde sayfa derinliğinden bağımsız sürede çalışır.
+    if cursor:
+        c_created_at, c_id = decode_cursor(cursor)
+        query = query.filter(tuple_(Order.created_at, Order.id) < tuple_(c_created_at, c_id))
+    orders = (await db.execute(query.limit(limit + 1))).scalars().all()
+    next_cursor = encode_cursor(orders[limit - 1].created_at, orders[limit - 1].id) if len(orders) > limit else None
+    return {
+        "items": [order_response(order, order.table.name if order.table else "Masa Bilinmiyor") for order in orders[:limit]],
+        "next_cursor": next_cursor
+    }
 
 @router.get("/{order_id}", response_model=OrderResponse)
-async def get_order(order_id: int, db: Session = Depends(get_session)):
-    order = db.query(Order).filter(Order.id == order_id).first()
+async def get_order(order_id: int, db: AsyncSession = Depends(get_async_session)):
+    order = (await db.execute(
+        select(Order).options(joinedload(Order.table), order_with_items()).filter(Order.id == order_id)
+    )).scalars().first()
     if not order: raise HTTPException(status_code=404, detail="Order not found")
-    items = []
-    for item in order.items:
-        p_name = item.product.name if item.product else "Bilinmeyen"
-        items.append({"id": item.id, "product_id": item.product_id, "quantity": item.quantity, "unit_price": item.unit_price, "extras": item.extras, "subtotal": item.subtotal, "product": {"id": item.product_id, "name": p_name, "description": "", "price": item.unit_price, "image_url": ""}})
     table_name = order.table.name if order.table else "Masa Bilinmiyor"
-    return {"id": order.id, "table_id": order.table_id, "table_name": table_name, "status": order.status, "customer_notes": order.customer_notes, "total_amount": order.total_amount, "created_at": order.created_at, "updated_at": order.updated_at, "items": items}
+    return order_response(order, table_name, product_details=False)
+
+# ÇEVİRİ SÖZLÜĞÜ: Türkçe/İngilizce ne gelirse gelsin doğruya çevirir
+STATUS_MAP = {
+    "hazirlaniyor": OrderStatus.HAZIRLANIYOR, "hazırlanıyor": OrderStatus.HAZIRLANIYOR, "preparing": OrderStatus.HAZIRLANIYOR,
+    "hazir": OrderStatus.HAZIR, "hazır": OrderStatus.HAZIR, "ready": OrderStatus.HAZIR,
+    "teslim_edildi": OrderStatus.TESLIM_EDILDI, "delivered": OrderStatus.TESLIM_EDILDI,
+    "iptal": OrderStatus.IPTAL, "cancelled": OrderStatus.IPTAL, "bekliyor": OrderStatus.BEKLIYOR, "pending": OrderStatus.BEKLIYOR
+}
+
+def parse_status(raw: str) -> OrderStatus:
+    new_status = STATUS_MAP.get(raw.lower().strip())
+    if not new_status:
+        raise HTTPException(status_code=422, detail=f"Geçersiz durum: {raw}")
+    return new_status
+
+@router.put("/status/bulk", response_model=BulkStatusResponse)
+async def bulk_update_order_status(
+    bulk: BulkStatusUpdate,
+    db: AsyncSession = Depends(get_async_session),
+    current_user = Depends(optional_current_user)
+):
+    """
+    Mutfak pasasında birden çok fişi tek seferde ilerletir: tek UPDATE ... IN,
+    kullanıcı cirosuna tek toplu artış ve tek "orders_updated" mesajı.
+    Zaten hedef durumda olan siparişler değiştirilmez (ciro iki kez yazılmaz).
+    """
+    new_status = parse_status(bulk.status)
+    order_ids = list(dict.fromkeys(bulk.order_ids))
+    if not order_ids:
+        return {"status": new_status, "updated": [], "unchanged": [], "not_found": []}
+
+    now = datetime.now()
+    rows = (await db.execute(
+        update(Order)
+        .where(Order.id.in_(order_ids), Order.status != new_status)
+        .values(status=new_status, updated_at=now)
+        .returning(Order.id, Order.table_id, Order.total_amount)
+        .execution_options(synchronize_session=False)
+    )).all()
+    updated_ids = {row.id for row in rows}
+    existing = set((await db.execute(select(Order.id).filter(Order.id.in_(order_ids)))).scalars())
+
+    await db.commit()
+    if new_status == OrderStatus.TESLIM_EDILDI and current_user is not None:
+        user_stats.credit(current_user.id, sum(float(row.total_amount or 0.0) for row in rows))
+
+    tables = {t.id: t for t in (await db.execute(
+        select(Table.id, Table.name, Table.number).filter(Table.id.in_({row.table_id for row in rows}))
+    )).all()} if rows else {}
+
+    # Mesajlar yalnızca fişinde kalemi olan mutfak istasyonlarına gider
+    stations = {row.id: kitchen_board.stations(row.id) for row in rows}
+    reopened = [row.id for row in rows if not kitchen_board.set_status(row.id, new_status)]
+    if reopened:
+        for order in (await db.execute(
+            select(Order).options(*ticket_options()).filter(Order.id.in_(reopened))
+        )).unique().scalars():
+            kitchen_board.add(kitchen_ticket(order))
+            stations[order.id] = kitchen_board.stations(order.id)
+
+    if rows:
+        await broadcast_order_update([
+            {"id": row.id, "status": new_status, "table_number": tables[row.table_id].number if row.table_id in tables else None,
+             "table_name": tables[row.table_id].name if row.table_id in tables else "Masa Bilinmiyor",
+             "stations": sorted(stations[row.id])}
+            for row in rows
+        ], "orders_updated")
+
+    return {
+        "status": new_status,
+        "updated": [i for i in order_ids if i in updated_ids],
+        "unchanged": [i for i in order_ids if i in existing and i not in updated_ids],
+        "not_found": [i for i in order_ids if i not in existing]
+    }
 
 @router.put("/{order_id}/status", response_model=OrderResponse)
 async def update_order_status(
     order_id: int,
     status_update: OrderStatusUpdate,
-    db: Session = Depends(get_session),
+    db: AsyncSession = Depends(get_async_session),
     current_user = Depends(optional_current_user)
 ):
-    # ÇEVİRİ SÖZLÜĞÜ: Türkçe/İngilizce ne gelirse gelsin doğruya çevirir
-    status_map = {
-        "hazirlaniyor": OrderStatus.HAZIRLANIYOR, "hazırlanıyor": OrderStatus.HAZIRLANIYOR, "preparing": OrderStatus.HAZIRLANIYOR,
-        "hazir": OrderStatus.HAZIR, "hazır": OrderStatus.HAZIR, "ready": OrderStatus.HAZIR,
-        "teslim_edildi": OrderStatus.TESLIM_EDILDI, "delivered": OrderStatus.TESLIM_EDILDI,
-        "iptal": OrderStatus.IPTAL, "cancelled": OrderStatus.IPTAL, "bekliyor": OrderStatus.BEKLIYOR, "pending": OrderStatus.BEKLIYOR
-    }
-
-    clean_status = status_update.status.lower().strip()
-    new_status_enum = status_map.get(clean_status)
+    new_status_enum = parse_status(status_update.status)
 
-    if not new_status_enum:
-        raise HTTPException(status_code=422, detail=f"Geçersiz durum: {status_update.status}")
-
-    order = db.query(Order).filter(Order.id == order_id).first()
+    order = (await db.execute(
+        select(Order).options(joinedload(Order.table)).filter(Order.id == order_id)
+    )).scalars().first()
     if not order: raise HTTPException(status_code=404, detail="Order not found")
     
     order.status = new_status_enum
-    db.commit()
-    try:
-        if new_status_enum == OrderStatus.TESLIM_EDILDI and current_user is not None:
-            from models import UserStats
-            stats = db.query(UserStats).filter(UserStats.user_id == current_user.id).first()
-            if not stats:
-                stats = UserStats(user_id=current_user.id)
-                db.add(stats)
-                db.flush()
-            amt = float(order.total_amount or 0.0)
-            tips = 0.0
-            stats.total_sales_score = float(stats.total_sales_score or 0.0) + amt
-            stats.total_tips_collected = float(stats.total_tips_collected or 0.0) + tips
-            db.commit()
-    except Exception:
-        pass
+    order.updated_at = datetime.now()
+    await db.commit()
+    if new_status_enum == OrderStatus.TESLIM_EDILDI and current_user is not None:
+        # Ciro bellekte birikir, arka planda toplu yazılır (services/user_stats.py)
+        user_stats.credit(current_user.id, float(order.total_amount or 0.0))
     
+    stations = kitchen_board.stations(order.id)
+    if not kitchen_board.set_status(order.id, order.status):
+        reopened = (await db.execute(
+            select(Order).options(*ticket_options()).filter(Order.id == order.id)
+        )).unique().scalars().first()
+        kitchen_board.add(kitchen_ticket(reopened))
+        stations = kitchen_board.stations(order.id)
+
     table_name = order.table.name if order.table else "Masa Bilinmiyor"
-    await broadcast_order_update({"id": order.id, "status": order.status, "table_name": table_name}, "order_updated")
+    await broadcast_order_update({
+        "id": order.id, "status": order.status, "table_number": order.table.number if order.table else None,
+        "table_name": table_name, "stations": sorted(stations)
+    }, "order_updated")
     
     return {
         "id": order.id, "table_id": order.table_id, "table_name": table_name,
@@ -1,10 +1,13 @@
 from fastapi import APIRouter, HTTPException, Depends, Query, UploadFile, File
 from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
-from pydantic import BaseModel
-from models import Product, Category, ExtraGroup, ExtraItem, ProductExtraGroup, Inventory, get_session
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel, field_validator
+from models import Product, Category, ExtraGroup, ExtraItem, ProductExtraGroup, Inventory, get_session, get_async_session
 from auth import require_role, get_current_active_user
 from models import UserRole
+from services.kitchen_board import normalize_station
 import os
 import sys
 from pathlib import Path
@@ -18,12 +21,28 @@ class CategoryCreate(BaseModel):
     name: str
     icon: Optional[str] = None
     order: int = 0
+    station: Optional[str] = None  # mutfak istasyonu (ör. "grill", "bar"); boşsa DEFAULT_KITCHEN_STATION
+
+class CategoryUpdate(BaseModel):
+    name: Optional[str] = None
+    icon: Optional[str] = None
+    order: Optional[int] = None
+    station: Optional[str] = None
+
+    @field_validator("name", "order")
+    @classmethod
+    def not_null(cls, value):
+        # Alanlar gönderilmeyebilir ama null olamaz (categories.name NOT NULL, unique)
+        if value is None:
+            raise ValueError("null olamaz")
+        return value
 
 class CategoryResponse(BaseModel):
     id: int
     name: str
     icon: Optional[str]
     order: int
+    station: Optional[str] = None
     is_active: bool
     created_at: datetime
     class Config: from_attributes = True
@@ -83,17 +102,17 @@ class ProductDetailResponse(ProductResponse):
 async def create_category(category: CategoryCreate, current_user = Depends(require_role([UserRole.ADMIN])), db: Session = Depends(get_session)):
     existing = db.query(Category).filter(Category.name == category.name).first()
     if existing: raise HTTPException(status_code=400, detail="Bu kategori zaten var")
-    new_category = Category(**category.dict())
+    new_category = Category(**{**category.dict(), "station": normalize_station(category.station)})
     db.add(new_category)
     db.commit()
     db.refresh(new_category)
     return new_category
 
 @router.get("/categories", response_model=List[CategoryResponse])
-async def get_categories(active_only: bool = Query(True), db: Session = Depends(get_session)):
-    query = db.query(Category)
+async def get_categories(active_only: bool = Query(True), db: AsyncSession = Depends(get_async_session)):
+    query = select(Category)
     if active_only: query = query.filter(Category.is_active == True)
-    return query.order_by(Category.order, Category.name).all()
+    return (await db.execute(query.order_by(Category.order, Category.name))).scalars().all()
 
 @router.get("/categories/{category_id}", response_model=CategoryResponse)
 async def get_category(category_id: int, db: Session = Depends(get_session)):
@@ -102,10 +121,12 @@ async def get_category(category_id: int, db: Session = Depends(get_session)):
     return category
 
 @router.put("/categories/{category_id}", response_model=CategoryResponse)
-async def update_category(category_id: int, category_update: CategoryCreate, current_user = Depends(require_role([UserRole.ADMIN])), db: Session = Depends(get_session)):
+async def update_category(category_id: int, category_update: CategoryUpdate, current_user = Depends(require_role([UserRole.ADMIN])), db: Session = Depends(get_session)):
     category = db.query(Category).filter(Category.id == category_id).first()
     if not category: raise HTTPException(status_code=404, detail="Kategori bulunamadı")
-    for key, value in category_update.dict().items(): setattr(category, key, value)
+    # Yalnızca gönderilen alanlar değişir; station göndermeyen istemci istasyonu sıfırlamaz
+    for key, value in category_update.dict(exclude_unset=True).items(): setattr(category, key, value)
+    category.station = normalize_station(category.station)
     db.commit()
     db.refresh(category)
     return category
@@ -154,13 +175,13 @@ async def create_product(product: ProductCreate, current_user = Depends(require_
     return new_product
 
 @router.get("", response_model=List[ProductResponse])
-async def get_products(skip: int = 0, limit: int = 100, category_id: Optional[int] = None, featured_only: bool = False, active_only: bool = True, db: Session = Depends(get_session)):
-    query = db.query(Product)
+async def get_products(skip: int = 0, limit: int = 100, category_id: Optional[int] = None, featured_only: bool = False, active_only: bool = True, db: AsyncSession = Depends(get_async_session)):
+    query = select(Product).options(selectinload(Product.category))
     if category_id: query = query.filter(Product.category_id == category_id)
     if featured_only: query = query.filter(Product.is_featured == True)
     if active_only: query = query.filter(Product.is_active == True)
-    products = query.offset(skip).limit(limit).all()
-    inv_map = {i.product_id: i.quantity for i in db.query(Inventory).all()}
+    products = (await db.execute(query.offset(skip).limit(limit))).scalars().all()
+    inv_map = dict((await db.execute(select(Inventory.product_id, Inventory.quantity))).all())
     result = []
     for p in products:
         category_data = {"id": p.category.id, "name": p.category.name, "icon": p.category.icon} if p.category else None
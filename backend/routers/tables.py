@@ -6,6 +6,7 @@ from models import Table, get_session, Order, OrderStatus, TableState
 from auth import require_role, get_current_active_user
 from models import UserRole
 from websocket_utils import broadcast_to_admin 
+from services.kitchen_board import kitchen_board, ACTIVE_STATUSES
 import qrcode
 import io
 import base64
@@ -124,6 +125,7 @@ async def update_table(table_id: int, table_update: TableUpdate, current_user =
             raise HTTPException(status_code=400, detail="Bu masa numarası zaten kullanımda")
     
     # Güncelleme işlemi
+    old_name = table.name
     for key, value in table_update.dict(exclude_unset=True).items():
         setattr(table, key, value)
     
@@ -133,6 +135,12 @@ async def update_table(table_id: int, table_update: TableUpdate, current_user =
     
     db.commit()
     db.refresh(table)
+    # Mutfak panosu masa adını bellekte tutar: aktif siparişlerin fişlerini güncelle
+    if table.name != old_name:
+        active_ids = [row.id for row in db.query(Order.id).filter(
+            Order.table_id == table_id, Order.status.in_(ACTIVE_STATUSES)
+        )]
+        kitchen_board.set_table_name(active_ids, table.name)
     return table
 
 @router.delete("/{table_id}")
@@ -262,6 +270,7 @@ async def transfer_table_orders(source_id: int, target_id: int, db: Session = De
     for o in active_orders:
         o.table_id = target_id
     db.commit()
+    kitchen_board.set_table_name([o.id for o in active_orders], target.name)
     s = db.query(TableState).filter(TableState.table_id == source_id).first()
     if not s:
         s = TableState(table_id=source_id, is_occupied=False)
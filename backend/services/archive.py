@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+from sqlalchemy import select, insert, delete, func, literal, union_all
+from models import Order, OrderItem, OrderStatus, ArchivedOrder, ArchivedOrderItem, get_async_session_factory
+
+logger = logging.getLogger("archive")
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "0"))
+ARCHIVE_CHUNK_SIZE = int(os.getenv("ARCHIVE_CHUNK_SIZE", "500"))
+ARCHIVE_INTERVAL_SECONDS = int(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
+
+ARCHIVABLE_STATUSES = (OrderStatus.TESLIM_EDILDI, OrderStatus.IPTAL)
+
+ORDER_COLUMNS = ("id", "table_id", "status", "customer_notes", "total_amount", "created_at", "updated_at")
+ITEM_COLUMNS = ("id", "order_id", "product_id", "quantity", "unit_price", "extras", "subtotal", "created_at")
+
+
+# (sipariş, kalem) modelleri: sıcak ve soğuk katman
+TIERS = ((Order, OrderItem), (ArchivedOrder, ArchivedOrderItem))
+
+
+def order_history(*columns: str, where: Optional[Callable] = None):
+    """
+    Sıcak (orders) ve soğuk (archived_orders) siparişler tek kaynak olarak
+    (UNION ALL). where(model) süzgeci her katmana ayrı uygulanır, böylece
+    her tablo kendi indeksini kullanır.
+    """
+    columns = columns or ORDER_COLUMNS
+    return union_all(*(
+        select(*(getattr(model, c) for c in columns)).where(*([where(model)] if where else []))
+        for model, _ in TIERS
+    )).subquery("order_history")
+
+
+def order_item_history(*columns: str, where: Optional[Callable] = None):
+    """order_items + archived_order_items (UNION ALL); where(sipariş modeli) ile siparişe göre süzülür."""
+    columns = columns or ITEM_COLUMNS
+    branches = []
+    for order_model, item_model in TIERS:
+        query = select(*(getattr(item_model, c) for c in columns))
+        if where is not None:
+            query = query.join(order_model, order_model.id == item_model.order_id).where(where(order_model))
+        branches.append(query)
+    return union_all(*branches).subquery("order_item_history")
+
+
+async def archive_orders(older_than_days: int = ARCHIVE_AFTER_DAYS, chunk_size: int = ARCHIVE_CHUNK_SIZE) -> int:
+    """
+    created_at'i older_than_days günden eski, teslim edilmiş/iptal edilmiş
+    siparişleri kalemleriyle birlikte arşiv tablolarına taşır. Her parça
+    (chunk_size sipariş) kendi transaction'ında kopyalanıp silinir; uzun
+    kilitler oluşmaz ve yarıda kesilirse kalan siparişler sıcak tabloda kalır.
+    """
+    cutoff = datetime.now() - timedelta(days=older_than_days)
+    moved = 0
+    async with get_async_session_factory()() as db:
+        # En yüksek id'li sipariş ve en yüksek id'li kalemin siparişi taşınmaz:
+        # AUTOINCREMENT'siz SQLite silinen en büyük rowid'i yeni satıra tekrar
+        # verir, arşivdeki id ile çakışırdı (daha küçük id'ler tekrar kullanılmaz)
+        max_id = (await db.execute(select(func.max(Order.id)))).scalar()
+        max_item_order_id = (await db.execute(
+            select(OrderItem.order_id).where(OrderItem.id == select(func.max(OrderItem.id)).scalar_subquery())
+        )).scalar()
+        keep = [Order.id != max_item_order_id] if max_item_order_id is not None else []
+        while max_id is not None:
+            ids = (await db.execute(
+                select(Order.id)
+                .filter(Order.status.in_(ARCHIVABLE_STATUSES), Order.created_at < cutoff, Order.id < max_id, *keep)
+                .order_by(Order.id)
+                .limit(chunk_size)
+            )).scalars().all()
+            if not ids:
+                break
+            now = literal(datetime.now())
+            await db.execute(insert(ArchivedOrder).from_select(
+                ORDER_COLUMNS + ("archived_at",),
+                select(*(getattr(Order, c) for c in ORDER_COLUMNS), now).filter(Order.id.in_(ids))
+            ))
+            await db.execute(insert(ArchivedOrderItem).from_select(
+                ITEM_COLUMNS,
+                select(*(getattr(OrderItem, c) for c in ITEM_COLUMNS)).filter(OrderItem.order_id.in_(ids))
+            ))
+            await db.execute(delete(OrderItem).where(OrderItem.order_id.in_(ids)).execution_options(synchronize_session=False))
+            await db.execute(delete(Order).where(Order.id.in_(ids)).execution_options(synchronize_session=False))
+            await db.commit()
+            moved += len(ids)
+            await asyncio.sleep(0)  # parçalar arasında istekler çalışabilsin
+    if moved:
+        logger.info(f"{moved} sipariş arşive taşındı (>{older_than_days} gün)")
+    return moved
+
+
+async def archive_loop():
+    while True:
+        try:
+            await archive_orders()
+        except Exception as e:
+            logger.warning(f"Arşivleme hatası: {e}")
+        await asyncio.sleep(ARCHIVE_INTERVAL_SECONDS)
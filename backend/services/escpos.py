@@ -0,0 +1,65 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+# ESC/POS komutları (Epson uyumlu termal yazıcılar)
+ESC = b"\x1b"
+GS = b"\x1d"
+INIT = ESC + b"@"
+CODEPAGE_PC857 = ESC + b"t" + bytes([13])  # Türkçe karakterler
+ALIGN_LEFT = ESC + b"a\x00"
+ALIGN_CENTER = ESC + b"a\x01"
+BOLD_ON = ESC + b"E\x01"
+BOLD_OFF = ESC + b"E\x00"
+DOUBLE_ON = GS + b"!\x11"
+DOUBLE_OFF = GS + b"!\x00"
+FEED_AND_CUT = GS + b"V" + bytes([66, 3])  # 3 satır besle + kısmi kesim
+
+LINE_WIDTH = 42  # 80mm kağıt, font A
+
+
+def _text(value: Any) -> bytes:
+    return str(value).replace("₺", "TL").encode("cp857", errors="replace")
+
+
+def _line(left: str = "", right: str = "") -> bytes:
+    gap = max(1, LINE_WIDTH - len(left) - len(right))
+    return _text(f"{left}{' ' * gap}{right}" if right else left) + b"\n"
+
+
+def _extras(extras: Optional[Dict[str, Any]]) -> str:
+    if not extras:
+        return ""
+    return ", ".join(f"{k}: {v}" if v not in (True, None, "") else str(k) for k, v in extras.items())
+
+
+def render_kitchen_ticket(ticket: Dict[str, Any]) -> bytes:
+    """Mutfak fişi: masa ve sipariş no büyük, kalemler adet x ürün, fiyat yok."""
+    created = ticket.get("created_at") or datetime.now().isoformat()
+    out = [INIT, CODEPAGE_PC857, ALIGN_CENTER, DOUBLE_ON, _text(ticket["table_name"]), b"\n", DOUBLE_OFF,
+           BOLD_ON, _text(f"Sipariş #{ticket['id']}"), BOLD_OFF, b"\n",
+           _text(str(created)[11:16]), b"\n", ALIGN_LEFT, _text("-" * LINE_WIDTH), b"\n"]
+    for item in ticket["items"]:
+        out += [BOLD_ON, _text(f"{item['quantity']} x {item['product_name']}"), BOLD_OFF, b"\n"]
+        extras = _extras(item.get("extras"))
+        if extras:
+            out.append(_text(f"   + {extras}\n"))
+    if ticket.get("customer_notes"):
+        out += [_text("-" * LINE_WIDTH), b"\n", BOLD_ON, _text(f"NOT: {ticket['customer_notes']}"), BOLD_OFF, b"\n"]
+    out.append(FEED_AND_CUT)
+    return b"".join(out)
+
+
+def render_receipt(ticket: Dict[str, Any], restaurant_name: str = "", currency: str = "TL") -> bytes:
+    """Müşteri fişi: kalem tutarları ve toplam."""
+    out = [INIT, CODEPAGE_PC857, ALIGN_CENTER]
+    if restaurant_name:
+        out += [DOUBLE_ON, _text(restaurant_name), b"\n", DOUBLE_OFF]
+    out += [_text(f"{ticket['table_name']} - Sipariş #{ticket['id']}"), b"\n",
+            _text(str(ticket.get("created_at") or "")[:16].replace("T", " ")), b"\n",
+            ALIGN_LEFT, _text("-" * LINE_WIDTH), b"\n"]
+    for item in ticket["items"]:
+        out.append(_line(f"{item['quantity']} x {item['product_name']}"[:LINE_WIDTH - 12],
+                         f"{float(item['subtotal'] or 0):.2f}"))
+    out += [_text("-" * LINE_WIDTH), b"\n", BOLD_ON,
+            _line("TOPLAM", f"{float(ticket['total_amount'] or 0):.2f} {currency}"), BOLD_OFF, FEED_AND_CUT]
+    return b"".join(out)
@@ -0,0 +1,206 @@
+import asyncio
+import json
+import logging
+import os
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger("event_bus")
+
+# memory: tek işçi / testler; redis: birden çok uvicorn/gunicorn işçisi
+EVENT_BUS = os.getenv("EVENT_BUS", "memory").lower()
+EVENT_BUS_CHANNEL = os.getenv("EVENT_BUS_CHANNEL", "restaurant:events")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+
+Handler = Callable[[Dict[str, Any]], Optional[Awaitable[None]]]
+ResyncHandler = Callable[[], Awaitable[None]]
+
+
+class EventBus(ABC):
+    """
+    İşçiler arası olay yolu. publish() olayı diğer işçilere iletir; yayınlayan
+    işçi kendi yerel etkisini (mutfak panosu, yerel WebSocket yayını) zaten
+    doğrudan uyguladığı için olay ona geri verilmez. Olaylar tek bir sıralı
+    kuyruktan gönderilir: pano güncellemesi, onu izleyen WebSocket olayından
+    önce uygulanır. publish() beklemez; start() çağrılmadıysa olay atılır.
+    Bağlantı kopup yeniden kurulunca aradaki olaylar kaybolmuş olabilir;
+    on_resync ile kaydedilen işleyiciler yerel durumu yeniden kurar.
+    """
+
+    def __init__(self):
+        self.worker_id = uuid.uuid4().hex[:8]
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._resync_handlers: List[ResyncHandler] = []
+        self._outbox: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self.published = 0
+        self.received = 0
+        self.errors = 0
+        self.resyncs = 0
+
+    def subscribe(self, topic: str, handler: Handler):
+        """Diğer işçilerden gelen topic olaylarını handler(payload) ile işler."""
+        self._handlers.setdefault(topic, []).append(handler)
+
+    def on_resync(self, handler: ResyncHandler):
+        """Yeniden bağlandıktan sonra await handler() çağrılır (kaçırılan olaylar için)."""
+        self._resync_handlers.append(handler)
+
+    async def _resynced(self):
+        self.resyncs += 1
+        for handler in self._resync_handlers:
+            try:
+                await handler()
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Yeniden eşitleme başarısız ({getattr(handler, '__name__', handler)}): {e}")
+
+    def publish(self, topic: str, payload: Dict[str, Any]):
+        if self._outbox is not None:
+            self._outbox.put_nowait({"origin": self.worker_id, "topic": topic, "payload": payload})
+
+    async def start(self):
+        self._outbox = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._sender()), asyncio.create_task(self._listen())]
+        logger.info(f"Olay yolu başladı: {type(self).__name__} (işçi {self.worker_id})")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._outbox = None
+        await self._close()
+
+    async def _sender(self):
+        while True:
+            event = await self._outbox.get()
+            try:
+                await self._send(json.dumps(event))
+                self.published += 1
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Olay yayınlanamadı ({event['topic']}): {e}")
+
+    async def _dispatch(self, raw):
+        event = json.loads(raw)
+        if event.get("origin") == self.worker_id:
+            return
+        self.received += 1
+        for handler in self._handlers.get(event.get("topic"), ()):
+            try:
+                result = handler(event["payload"])
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Olay işlenemedi ({event.get('topic')}): {e}")
+
+    # --- arka uç ---
+    @abstractmethod
+    async def _send(self, data: str):
+        """Serileştirilmiş olayı diğer işçilere iletir."""
+
+    @abstractmethod
+    async def _listen(self):
+        """Gelen olayları _dispatch() ile işler; iptal edilene kadar döner."""
+
+    async def _close(self):
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__, "worker_id": self.worker_id,
+                "published": self.published, "received": self.received, "errors": self.errors, "resyncs": self.resyncs,
+                "outbox": self._outbox.qsize() if self._outbox is not None else 0}
+
+
+class MemoryHub:
+    """Aynı süreçteki MemoryEventBus'ları birbirine bağlar (testlerde birden çok işçi)."""
+
+    def __init__(self):
+        self.buses: List["MemoryEventBus"] = []
+
+
+class MemoryEventBus(EventBus):
+    """
+    Bellek içi (loopback) arka uç. Olaylar Redis'teki gibi JSON olarak aynı
+    hub'daki diğer yollara iletilir. Tek işçide hub'da başka yol yoktur ve
+    yayın hiçbir yere gitmez.
+    """
+
+    def __init__(self, hub: Optional[MemoryHub] = None):
+        super().__init__()
+        self.hub = hub or MemoryHub()
+        self._inbox: Optional[asyncio.Queue] = None
+        self.hub.buses.append(self)
+
+    def publish(self, topic: str, payload: Dict[str, Any]):
+        if len(self.hub.buses) > 1:  # tek işçide serileştirme maliyeti yok
+            super().publish(topic, payload)
+
+    async def start(self):
+        self._inbox = asyncio.Queue()
+        await super().start()
+
+    async def _send(self, data: str):
+        for bus in self.hub.buses:
+            if bus is not self and bus._outbox is not None:
+                bus._inbox.put_nowait(data)
+
+    async def _listen(self):
+        while True:
+            await self._dispatch(await self._inbox.get())
+
+
+class RedisEventBus(EventBus):
+    """Redis pub/sub arka ucu: tüm işçiler aynı kanala abone olur."""
+
+    def __init__(self, url: str = REDIS_URL, channel: str = EVENT_BUS_CHANNEL):
+        super().__init__()
+        import redis.asyncio as aioredis
+        self.url = url
+        self.channel = channel
+        self._redis = aioredis.from_url(url)
+
+    async def _send(self, data: str):
+        await self._redis.publish(self.channel, data)
+
+    async def _listen(self):
+        # Redis yeniden başlarsa abonelik yeniden kurulur; aradaki olaylar
+        # kaybolduğu için ardından yerel durum yeniden eşitlenir
+        reconnecting = False
+        while True:
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                if reconnecting:
+                    reconnecting = False
+                    logger.info(f"Redis aboneliği yeniden kuruldu ({self.url}); yerel durum yenileniyor")
+                    await self._resynced()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        await self._dispatch(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                reconnecting = True
+                logger.warning(f"Redis aboneliği koptu ({self.url}): {e}; 1 sn sonra tekrar")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    async def _close(self):
+        await self._redis.aclose()
+
+
+def create_event_bus(backend: str = EVENT_BUS) -> EventBus:
+    if backend == "redis":
+        return RedisEventBus()
+    if backend == "memory":
+        return MemoryEventBus()
+    raise ValueError(f"EVENT_BUS 'memory' veya 'redis' olmalı: {backend}")
+
+
+event_bus = create_event_bus()
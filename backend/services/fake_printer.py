@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test ve geliştirme için sahte ESC/POS ağ yazıcısı (RAW port 9100 yerine).
+
+Gelen baytları kaydeder; kesim komutuna göre fişlere ayırır. Yazıcı arızası
+stop()/start() ile (bağlantı reddi) canlandırılır.
+
+    python services/fake_printer.py --port 9100 --out received.bin
+"""
+
+import argparse
+import asyncio
+import re
+from typing import List, Optional
+
+# GS V m / GS V m n (tam/kısmi kesim)
+CUT = re.compile(rb"\x1dV(?:[\x00\x01\x30\x31]|[\x41\x42][\x00-\xff])")
+
+
+class FakePrinter:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, out_path: Optional[str] = None):
+        self.host = host
+        self.port = port
+        self.out_path = out_path
+        self.received = bytearray()
+        self.connections = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> "FakePrinter":
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        data = await reader.read()
+        self.received += data
+        if self.out_path:
+            with open(self.out_path, "ab") as f:
+                f.write(data)
+        writer.close()
+
+    def tickets(self) -> List[bytes]:
+        """Alınan baytları kesim komutundan bölerek fiş listesi döner."""
+        return CUT.split(bytes(self.received))[:-1]
+
+
+async def _serve(args):
+    printer = await FakePrinter(args.host, args.port, args.out).start()
+    print(f"Sahte yazıcı dinliyor: {printer.host}:{printer.port}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--out", default=None, help="alınan baytların ekleneceği dosya")
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
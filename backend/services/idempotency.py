@@ -0,0 +1,135 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select, delete
+from models import IdempotencyKey, get_async_session_factory
+
+logger = logging.getLogger("idempotency")
+
+
+def request_fingerprint(payload: Any) -> str:
+    raw = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Idempotency-Key -> yanıt önbelleği (sınırlı boyut + TTL, LRU).
+    Tekrar gelen istek veritabanına ve WebSocket'e dokunmadan önbellekteki
+    yanıtı alır. Aynı anahtarla eşzamanlı gelen istekler ilkinin sonucunu bekler.
+    IDEMPOTENCY_DB_STORE=true ise anahtarlar yeniden başlatmalara karşı
+    idempotency_keys tablosunda da tutulur (yalnızca bellekte yoksa okunur).
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: int = 86400, use_db: bool = False):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.use_db = use_db
+        self._entries: "OrderedDict[str, Tuple[float, str, Any]]" = OrderedDict()
+        self._inflight: Dict[str, Tuple[str, asyncio.Future]] = {}
+        self._db_writes = 0
+        self.hits = 0
+
+    def _get_memory(self, key: str) -> Optional[Tuple[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, fingerprint, response = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return fingerprint, response
+
+    def _put_memory(self, key: str, fingerprint: str, response: Any):
+        self._entries[key] = (time.monotonic(), fingerprint, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _get_db(self, key: str) -> Optional[Tuple[str, Any]]:
+        cutoff = datetime.now() - timedelta(seconds=self.ttl_seconds)
+        async with get_async_session_factory()() as db:
+            row = (await db.execute(
+                select(IdempotencyKey).filter(IdempotencyKey.key == key, IdempotencyKey.created_at >= cutoff)
+            )).scalars().first()
+            return (row.fingerprint, row.response) if row else None
+
+    async def _put_db(self, key: str, fingerprint: str, response: Any):
+        async with get_async_session_factory()() as db:
+            await db.merge(IdempotencyKey(key=key, fingerprint=fingerprint, response=response, created_at=datetime.now()))
+            self._db_writes += 1
+            if self._db_writes % 100 == 0:
+                cutoff = datetime.now() - timedelta(seconds=self.ttl_seconds)
+                await db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff))
+            await db.commit()
+
+    @staticmethod
+    def _check(fingerprint: str, stored_fingerprint: str):
+        if fingerprint != stored_fingerprint:
+            raise HTTPException(status_code=422, detail="Idempotency-Key farklı bir istek gövdesiyle tekrar kullanıldı")
+
+    async def run(self, key: str, fingerprint: str, handler: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """(yanıt, tekrar_mı) döndürür. Hatalı sonuçlar önbelleğe alınmaz."""
+        cached = self._get_memory(key)
+        if cached is not None:
+            self._check(fingerprint, cached[0])
+            self.hits += 1
+            return cached[1], True
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self._check(fingerprint, inflight[0])
+            self.hits += 1
+            return await asyncio.shield(inflight[1]), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = (fingerprint, future)
+        try:
+            if self.use_db:
+                cached = await self._get_db(key)
+                if cached is not None:
+                    self._check(fingerprint, cached[0])
+                    self._put_memory(key, *cached)
+                    future.set_result(cached[1])
+                    self.hits += 1
+                    return cached[1], True
+
+            response = jsonable_encoder(await handler())
+            self._put_memory(key, fingerprint, response)
+            if self.use_db:
+                try:
+                    await self._put_db(key, fingerprint, response)
+                except Exception as e:
+                    # Sipariş zaten kaydedildi; kalıcı anahtar yazılamasa da yanıt döner
+                    logger.warning(f"Idempotency anahtarı DB'ye yazılamadı: {e}")
+            future.set_result(response)
+            return response, False
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+                future.exception()  # bekleyen yoksa "never retrieved" uyarısını engelle
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "inflight": len(self._inflight), "hits": self.hits}
+
+
+idempotency_store = IdempotencyStore(
+    max_entries=int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000")),
+    ttl_seconds=int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400")),
+    use_db=os.getenv("IDEMPOTENCY_DB_STORE", "false").lower() == "true",
+)
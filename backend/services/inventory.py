@@ -0,0 +1,51 @@
+from typing import Dict
+from sqlalchemy import update, case
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Inventory
+
+
+class InsufficientStockError(Exception):
+    def __init__(self, product_id: int):
+        self.product_id = product_id
+        super().__init__(f"Yetersiz stok: Ürün ID {product_id}")
+
+
+def _per_product(quantities: Dict[int, int]):
+    return case(quantities, value=Inventory.product_id, else_=0)
+
+
+async def reserve_stock(db: AsyncSession, quantities: Dict[int, int]) -> None:
+    """
+    Stoğu koşullu tek bir UPDATE ile ayırır (quantity >= istenen).
+    Ya hepsi ayrılır ya hiçbiri: yetmeyen bir ürün varsa, düşülen satırlar
+    aynı transaction içinde geri eklenir ve InsufficientStockError fırlatılır.
+    Sadece envanter kaydı olan ürünler verilmelidir; kaydı olmayan ürün sınırsızdır.
+    """
+    if not quantities:
+        return
+    needed = _per_product(quantities)
+    result = await db.execute(
+        update(Inventory)
+        .where(Inventory.product_id.in_(quantities.keys()), Inventory.quantity >= needed)
+        .values(quantity=Inventory.quantity - needed)
+        .returning(Inventory.product_id)
+        .execution_options(synchronize_session=False)
+    )
+    reserved = set(result.scalars().all())
+    missing = set(quantities) - reserved
+    if missing:
+        if reserved:
+            await release_stock(db, {pid: quantities[pid] for pid in reserved})
+        raise InsufficientStockError(min(missing))
+
+
+async def release_stock(db: AsyncSession, quantities: Dict[int, int]) -> None:
+    """Ayrılmış stoğu geri ekler."""
+    if not quantities:
+        return
+    await db.execute(
+        update(Inventory)
+        .where(Inventory.product_id.in_(quantities.keys()))
+        .values(quantity=Inventory.quantity + _per_product(quantities))
+        .execution_options(synchronize_session=False)
+    )
@@ -0,0 +1,212 @@
+import json
+import os
+import uuid
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Order, OrderItem, OrderStatus, Product, get_async_session_factory
+from services.event_bus import event_bus
+
+ACTIVE_STATUSES = (OrderStatus.BEKLIYOR, OrderStatus.HAZIRLANIYOR)
+
+# İstasyonu atanmamış kategorilerin kalemleri bu istasyona düşer
+DEFAULT_STATION = os.getenv("DEFAULT_KITCHEN_STATION", "kitchen")
+
+
+def normalize_station(station: Optional[str]) -> Optional[str]:
+    station = (station or "").strip().lower()
+    return station or None
+
+
+def product_station(product: Optional[Product]) -> str:
+    category = product.category if product else None
+    return normalize_station(category.station if category else None) or DEFAULT_STATION
+
+
+def ticket_options():
+    # kitchen_ticket() için gereken ilişkiler (async'te lazy-load yok)
+    return (selectinload(Order.items).selectinload(OrderItem.product).joinedload(Product.category), joinedload(Order.table))
+
+
+def kitchen_ticket(order: Order) -> Dict[str, Any]:
+    items = []
+    for item in order.items:
+        p_name = item.product.name if item.product else "Silinmiş Ürün"
+        items.append({
+            "id": item.id,
+            "product_id": item.product_id,
+            "product_name": p_name,
+            "quantity": item.quantity,
+            "extras": item.extras,
+            "subtotal": item.subtotal,
+            "station": product_station(item.product)
+        })
+    table_name = order.table.name if order.table else "Masa Bilinmiyor"
+    return {
+        "id": order.id,
+        "table_name": table_name,
+        "status": order.status,
+        "customer_notes": order.customer_notes,
+        "created_at": order.created_at.isoformat(),
+        "items": items,
+        "total_amount": order.total_amount
+    }
+
+
+async def load_kitchen_orders(db: AsyncSession) -> List[Order]:
+    # Kalemler, ürünler ve masa tek seferde yüklenir (async'te lazy-load yok)
+    result = await db.execute(
+        select(Order)
+        .options(*ticket_options())
+        .filter(Order.status.in_(ACTIVE_STATUSES))
+        .order_by(Order.created_at.asc())
+    )
+    return result.unique().scalars().all()
+
+
+class KitchenBoard:
+    """
+    Bekleyen/hazırlanan siparişlerin bellekteki kopyası.
+    Açılışta bir kez yüklenir, sipariş oluşturma ve durum değişikliklerinde
+    artımlı güncellenir. Her değişiklik versiyonu artırır; serileştirilmiş
+    liste versiyon başına bir kez üretilip önbellekte tutulur.
+    Değişiklikler olay yoluyla ("board") diğer işçilerin panolarına da
+    uygulanır (apply).
+    """
+
+    def __init__(self):
+        self._tickets: Dict[int, Dict[str, Any]] = {}
+        self._boot_id = uuid.uuid4().hex[:8]
+        self.version = 0
+        self._snapshot: Optional[Tuple[int, bytes]] = None
+        self._station_snapshots: Dict[str, Tuple[int, bytes, str]] = {}
+        self._listeners: List[Any] = []
+
+    def subscribe(self, listener):
+        """listener: board_reset(tickets), ticket_added(ticket), ticket_removed(order_id)."""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    async def load(self, db: AsyncSession):
+        orders = await load_kitchen_orders(db)
+        self._tickets = {order.id: kitchen_ticket(order) for order in orders}
+        self._changed()
+        for listener in self._listeners:
+            listener.board_reset(self.tickets())
+
+    def _changed(self):
+        self.version += 1
+        self._snapshot = None
+
+    @property
+    def etag(self) -> str:
+        return f'W/"kb-{self._boot_id}-{self.version}"'
+
+    def tickets(self) -> List[Dict[str, Any]]:
+        return list(self._tickets.values())
+
+    def ticket(self, order_id: int) -> Optional[Dict[str, Any]]:
+        return self._tickets.get(order_id)
+
+    def stations(self, order_id: int) -> Set[str]:
+        ticket = self._tickets.get(order_id)
+        return {item.get("station", DEFAULT_STATION) for item in ticket["items"]} if ticket else set()
+
+    def station_snapshot(self, station: str) -> Tuple[bytes, str]:
+        """
+        Yalnızca istasyonun kalemlerini içeren liste ve ETag'i (versiyon başına
+        bir kez üretilir). ETag içerikten türetilir: başka istasyonun
+        değişiklikleri bu istasyonda 304 döndürür.
+        """
+        cached = self._station_snapshots.get(station)
+        if cached is None or cached[0] != self.version:
+            tickets = []
+            for ticket in self._tickets.values():
+                items = [item for item in ticket["items"] if item.get("station", DEFAULT_STATION) == station]
+                if items:
+                    tickets.append({**ticket, "items": items})
+            body = json.dumps(tickets, ensure_ascii=False).encode("utf-8")
+            cached = (self.version, body, f'W/"kb-{self._boot_id}-{station}-{zlib.crc32(body):08x}"')
+            self._station_snapshots[station] = cached
+        return cached[1], cached[2]
+
+    def snapshot(self) -> bytes:
+        if self._snapshot is None or self._snapshot[0] != self.version:
+            self._snapshot = (self.version, json.dumps(self.tickets(), ensure_ascii=False).encode("utf-8"))
+        return self._snapshot[1]
+
+    def add(self, ticket: Dict[str, Any]):
+        self._add(ticket)
+        event_bus.publish("board", {"op": "add", "ticket": ticket})
+
+    def _add(self, ticket: Dict[str, Any]):
+        last = next(reversed(self._tickets.values()), None)
+        self._tickets[ticket["id"]] = ticket
+        if last is not None and ticket["created_at"] < last["created_at"]:
+            # Geri açılan eski sipariş: created_at sırası korunur
+            self._tickets = dict(sorted(self._tickets.items(), key=lambda kv: kv[1]["created_at"]))
+        self._changed()
+        for listener in self._listeners:
+            listener.ticket_added(ticket)
+
+    def set_status(self, order_id: int, status: OrderStatus) -> bool:
+        """Sipariş panoda yok ama aktif bir duruma geçiyorsa False döner; çağıran add() ile ekler."""
+        if not self._set_status(order_id, status):
+            return False
+        event_bus.publish("board", {"op": "status", "order_id": order_id, "status": status})
+        return True
+
+    def _set_status(self, order_id: int, status: OrderStatus) -> bool:
+        ticket = self._tickets.get(order_id)
+        if status in ACTIVE_STATUSES:
+            if ticket is None:
+                return False
+            ticket["status"] = status
+        elif ticket is None:
+            return True
+        else:
+            del self._tickets[order_id]
+            for listener in self._listeners:
+                listener.ticket_removed(order_id)
+        self._changed()
+        return True
+
+    def set_table_name(self, order_ids: Iterable[int], table_name: str):
+        order_ids = list(order_ids)
+        self._set_table_name(order_ids, table_name)
+        event_bus.publish("board", {"op": "table_name", "order_ids": order_ids, "table_name": table_name})
+
+    def _set_table_name(self, order_ids: Iterable[int], table_name: str):
+        changed = False
+        for order_id in order_ids:
+            ticket = self._tickets.get(order_id)
+            if ticket is not None:
+                ticket["table_name"] = table_name
+                changed = True
+        if changed:
+            self._changed()
+
+    def apply(self, event: Dict[str, Any]):
+        """Başka işçide yapılan değişikliği bu panoya uygular (yeniden yayınlamaz)."""
+        op = event["op"]
+        if op == "add":
+            self._add(event["ticket"])
+        elif op == "status":
+            self._set_status(event["order_id"], OrderStatus(event["status"]))
+        elif op == "table_name":
+            self._set_table_name(event["order_ids"], event["table_name"])
+
+
+kitchen_board = KitchenBoard()
+event_bus.subscribe("board", kitchen_board.apply)
+
+
+async def reload_kitchen_board():
+    """Olay yolu yeniden bağlanınca panoyu veritabanından yeniden kurar."""
+    async with get_async_session_factory()() as db:
+        await kitchen_board.load(db)
+
+
+event_bus.on_resync(reload_kitchen_board)
@@ -0,0 +1,148 @@
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+from sqlalchemy import select
+from models import RestaurantConfig, get_async_session_factory
+from websocket_utils import broadcast_to_admin
+from services.event_bus import event_bus
+from services.kitchen_board import kitchen_board
+
+logger = logging.getLogger("order_timeouts")
+
+
+class OrderTimeoutScheduler:
+    """
+    Aktif (bekliyor/hazırlanıyor) siparişlerin son tarihlerini bir min-heap'te
+    tutar ve süresi geçenleri admin kanalına bildirir. Veritabanı taranmaz:
+    kayıtlar mutfak panosundaki değişikliklerden gelir (kitchen_board.subscribe).
+    Ekleme O(log n); tamamlanan siparişler heap'ten tembel silinir.
+    """
+
+    def __init__(self, timeout_minutes: int = 30):
+        self.timeout_seconds = timeout_minutes * 60
+        self._heap: List[Tuple[float, int, float]] = []  # (son tarih, sipariş id, başlangıç)
+        self._started: Dict[int, float] = {}
+        self._escalated: Set[int] = set()
+        self._wake: Optional[asyncio.Event] = None
+        self.escalations = 0
+
+    def _push(self, order_id: int, started: float):
+        if self.timeout_seconds <= 0:
+            return
+        entry = (started + self.timeout_seconds, order_id, started)
+        heapq.heappush(self._heap, entry)
+        if self._heap[0] is entry and self._wake is not None:
+            self._wake.set()  # en yakın son tarih değişti
+
+    def _rebuild(self):
+        self._heap = [(started + self.timeout_seconds, order_id, started)
+                      for order_id, started in self._started.items() if order_id not in self._escalated]
+        heapq.heapify(self._heap)
+        if self._wake is not None:
+            self._wake.set()
+
+    # --- KitchenBoard dinleyicisi ---
+    def board_reset(self, tickets: List[Dict[str, Any]]):
+        # Pano her olay yolu resync'inde yeniden yüklenir: aynı başlangıçla hâlâ
+        # panoda olan siparişler için gecikme bildirimi tekrarlanmaz
+        started = {t["id"]: datetime.fromisoformat(t["created_at"]).timestamp() for t in tickets}
+        self._escalated = {order_id for order_id in self._escalated
+                           if order_id in started and self._started.get(order_id) == started[order_id]}
+        self._started = started
+        self._rebuild()
+
+    def ticket_added(self, ticket: Dict[str, Any]):
+        started = datetime.fromisoformat(ticket["created_at"]).timestamp()
+        if self._started.get(ticket["id"]) == started and ticket["id"] not in self._escalated:
+            return
+        self._started[ticket["id"]] = started
+        self._escalated.discard(ticket["id"])
+        self._push(ticket["id"], started)
+
+    def ticket_removed(self, order_id: int):
+        self._started.pop(order_id, None)
+        self._escalated.discard(order_id)
+        # Silinenler birikirse heap sıkıştırılır
+        if len(self._heap) > 2 * len(self._started) + 64:
+            self._rebuild()
+
+    def update_timeout(self, minutes: int):
+        """Ayarlardan değiştirildi: bu işçiye uygular ve diğer işçilere yayınlar."""
+        self.set_timeout(minutes)
+        event_bus.publish("order_timeouts", {"timeout_minutes": minutes})
+
+    def set_timeout(self, minutes: int):
+        """Süreyi yalnızca bu işçide uygular (başlangıç, olay yolu; 0 = kapalı)."""
+        if minutes * 60 == self.timeout_seconds:
+            return
+        self.timeout_seconds = minutes * 60
+        self._escalated.clear()
+        if self.timeout_seconds > 0:
+            self._rebuild()
+        else:
+            self._heap = []
+
+    async def _escalate(self, order_id: int, started: float, now: float):
+        # Pano tüm işçilerde aynıdır: her işçi yalnızca kendi admin soketlerine bildirir
+        ticket = kitchen_board.ticket(order_id) or {}
+        waited = int((now - started) // 60)
+        table_name = ticket.get("table_name", "Masa Bilinmiyor")
+        self.escalations += 1
+        logger.warning(f"Sipariş #{order_id} ({table_name}) {waited} dakikadır bekliyor")
+        await broadcast_to_admin({
+            "type": "order_overdue",
+            "order_id": order_id,
+            "table_name": table_name,
+            "status": ticket.get("status"),
+            "created_at": ticket.get("created_at"),
+            "waiting_minutes": waited,
+            "message": f"⏰ {table_name} - Sipariş #{order_id} {waited} dakikadır bekliyor!"
+        }, local=True)
+
+    async def run(self):
+        self._wake = asyncio.Event()
+        while True:
+            self._wake.clear()
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                _, order_id, started = heapq.heappop(self._heap)
+                # Tamamlanmış veya yeniden planlanmış siparişin eski kaydı
+                if self._started.get(order_id) != started or order_id in self._escalated:
+                    continue
+                self._escalated.add(order_id)
+                try:
+                    await self._escalate(order_id, started, now)
+                except Exception as e:
+                    logger.warning(f"Gecikme bildirimi gönderilemedi: {e}")
+            delay = self._heap[0][0] - now if self._heap else None
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tracked": len(self._started),
+            "heap": len(self._heap),
+            "overdue": len(self._escalated),
+            "escalations": self.escalations,
+            "timeout_minutes": self.timeout_seconds // 60,
+        }
+
+
+order_timeouts = OrderTimeoutScheduler()
+
+
+async def reload_timeout():
+    """Olay yolu yeniden bağlanınca süre ayarı veritabanından yeniden okunur."""
+    async with get_async_session_factory()() as db:
+        minutes = (await db.execute(select(RestaurantConfig.order_timeout_minutes))).scalar()
+    if minutes is not None:
+        order_timeouts.set_timeout(minutes)
+
+
+event_bus.subscribe("order_timeouts", lambda event: order_timeouts.set_timeout(event["timeout_minutes"]))
+event_bus.on_resync(reload_timeout)
@@ -0,0 +1,279 @@
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import select, update, func, case, and_, or_
+from sqlalchemy.orm import aliased
+from models import Order, PrintJob, RestaurantConfig, get_async_session_factory
+from services.escpos import render_kitchen_ticket, render_receipt
+from services.event_bus import event_bus
+from services.kitchen_board import kitchen_ticket, ticket_options
+
+logger = logging.getLogger("printer")
+
+PRINT_BATCH_MAX = int(os.getenv("PRINT_BATCH_MAX", "10"))
+PRINT_MAX_ATTEMPTS = int(os.getenv("PRINT_MAX_ATTEMPTS", "30"))
+PRINT_RETRY_BASE_SECONDS = float(os.getenv("PRINT_RETRY_BASE_SECONDS", "2"))
+PRINT_RETRY_MAX_SECONDS = float(os.getenv("PRINT_RETRY_MAX_SECONDS", "60"))
+PRINT_TIMEOUT_SECONDS = float(os.getenv("PRINT_TIMEOUT_SECONDS", "5"))
+# Gönderim için sahiplenilmiş ama bu sürede sonuçlanmamış iş (işçi çöktü) yeniden alınabilir
+PRINT_CLAIM_TIMEOUT_SECONDS = float(os.getenv("PRINT_CLAIM_TIMEOUT_SECONDS", "120"))
+PRINT_KITCHEN_ON_ORDER = os.getenv("PRINT_KITCHEN_ON_ORDER", "false").lower() == "true"
+
+# Fiş türü -> varsayılan yazıcı adı (PRINTERS içindeki isimler)
+KIND_PRINTERS = {"kitchen": "kitchen", "receipt": "receipt"}
+
+
+@dataclass
+class Printer:
+    name: str
+    host: str
+    port: int = 9100
+    online: Optional[bool] = None
+    last_error: Optional[str] = None
+    last_success_at: Optional[datetime] = None
+    retry_at: Optional[datetime] = None
+    failures: int = 0
+    printed: int = 0
+    connections: int = 0
+
+
+def parse_printers(spec: str) -> Dict[str, Printer]:
+    """PRINTERS="kitchen=192.168.1.50:9100,receipt=192.168.1.51" biçimini çözer."""
+    printers = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, address = entry.partition("=")
+        host, _, port = address.strip().partition(":")
+        if name and host:
+            printers[name.strip()] = Printer(name=name.strip(), host=host, port=int(port or 9100))
+    return printers
+
+
+class PrintSpooler:
+    """
+    Kalıcı yazdırma kuyruğu. İşler print_jobs tablosuna hazır ESC/POS baytları
+    olarak yazılır; her yazıcının tek bir worker'ı sıradaki işleri birleştirip
+    tek TCP bağlantısıyla (port 9100) gönderir. Hata olursa yazıcı üstel
+    bekleme ile yeniden denenir (fiş sırası korunur); PRINT_MAX_ATTEMPTS
+    başarısız denemeden sonra iş "failed" olur ve /printer/jobs/{id}/retry ile
+    tekrar kuyruğa alınabilir.
+    Sipariş alma yazıcıyı hiçbir zaman beklemez.
+    Birden çok işçi aynı kuyruğu işler: işler gönderimden önce tek UPDATE ile
+    "sending" olarak sahiplenilir, her iş yalnızca bir işçiden gönderilir.
+    Gönderim ile "done" işaretleme arasında çökme olursa fiş bir kez daha basılır
+    (sahiplik PRINT_CLAIM_TIMEOUT_SECONDS sonra düşer).
+    """
+
+    def __init__(self, printers: Dict[str, Printer]):
+        self.printers = printers
+        self._wake: Dict[str, asyncio.Event] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._pending: set = set()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.printers)
+
+    def start(self):
+        for printer in self.printers.values():
+            self._wake[printer.name] = asyncio.Event()
+            self._tasks.append(asyncio.create_task(self._worker(printer)))
+        if self.printers:
+            logger.info(f"Yazdırma kuyruğu başladı: {', '.join(self.printers)}")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._pending, return_exceptions=True)
+        self._tasks = []
+
+    def printer_for(self, kind: str) -> Optional[str]:
+        name = KIND_PRINTERS.get(kind, kind)
+        return name if name in self.printers else None
+
+    async def render(self, db, order_id: int, kind: str) -> Optional[bytes]:
+        order = (await db.execute(
+            select(Order)
+            .options(*ticket_options())
+            .filter(Order.id == order_id)
+        )).scalars().first()
+        if order is None:
+            return None
+        ticket = kitchen_ticket(order)
+        if kind == "receipt":
+            config = (await db.execute(select(RestaurantConfig))).scalars().first()
+            if config is None:
+                return render_receipt(ticket)
+            return render_receipt(ticket, config.restaurant_name or "", config.currency or "TL")
+        return render_kitchen_ticket(ticket)
+
+    async def enqueue(self, order_id: int, kind: str = "kitchen") -> Optional[int]:
+        """Siparişi render edip kuyruğa yazar; job id döner (sipariş yoksa None)."""
+        printer = self.printer_for(kind)
+        if printer is None:
+            raise LookupError(f"'{kind}' için yazıcı tanımlı değil")
+        async with get_async_session_factory()() as db:
+            payload = await self.render(db, order_id, kind)
+            if payload is None:
+                return None
+            job = PrintJob(printer=printer, order_id=order_id, kind=kind, payload=payload)
+            db.add(job)
+            await db.commit()
+            job_id = job.id
+        self._wake[printer].set()
+        return job_id
+
+    def submit(self, order_id: int, kind: str = "kitchen"):
+        """İstek yolundan çağrılır: kuyruğa yazmayı arka plana bırakır, beklemez."""
+        if self.printer_for(kind) is None:
+            return
+        task = asyncio.create_task(self.enqueue(order_id, kind))
+        self._pending.add(task)
+        task.add_done_callback(self._submitted)
+
+    def _submitted(self, task: asyncio.Task):
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Yazdırma işi kuyruğa yazılamadı: {task.exception()}")
+
+    async def retry(self, job_id: int) -> bool:
+        async with get_async_session_factory()() as db:
+            result = await db.execute(
+                update(PrintJob).where(PrintJob.id == job_id, PrintJob.status == "failed")
+                .values(status="queued", attempts=0)
+                .returning(PrintJob.printer)
+            )
+            printer = result.scalar()
+            await db.commit()
+        if printer in self._wake:
+            self.printers[printer].retry_at = None
+            self._wake[printer].set()
+        return printer is not None
+
+    async def _send(self, printer: Printer, data: bytes):
+        printer.connections += 1
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(printer.host, printer.port), PRINT_TIMEOUT_SECONDS
+        )
+        try:
+            writer.write(data)
+            await asyncio.wait_for(writer.drain(), PRINT_TIMEOUT_SECONDS)
+        finally:
+            writer.close()
+            try:
+                await asyncio.wait_for(writer.wait_closed(), PRINT_TIMEOUT_SECONDS)
+            except Exception:
+                pass
+
+    async def _claim(self, db, printer: Printer) -> list:
+        """
+        Sıradaki işleri bu işçi adına tek UPDATE ile sahiplenir (id sırasıyla).
+        Yazıcıda süresi dolmamış sahiplik varsa (başka işçi gönderiyor) boş
+        döner; fiş sırası işçiler arasında da korunur.
+        """
+        now = datetime.now()
+        expired = now - timedelta(seconds=PRINT_CLAIM_TIMEOUT_SECONDS)
+        claimable = and_(PrintJob.printer == printer.name, or_(
+            PrintJob.status == "queued",
+            and_(PrintJob.status == "sending", PrintJob.claimed_at < expired)
+        ))
+        other = aliased(PrintJob)
+        in_flight = select(other.id).filter(
+            other.printer == printer.name, other.status == "sending", other.claimed_at >= expired
+        ).exists()
+        ids = select(PrintJob.id).filter(claimable).order_by(PrintJob.id).limit(PRINT_BATCH_MAX).scalar_subquery()
+        if db.bind.dialect.name == "postgresql":
+            # SQLite yazımları zaten sıralar; Postgres'te aynı yazıcı için eşzamanlı sahiplenme sıraya girer
+            await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(f"print_jobs:{printer.name}"))))
+        jobs = (await db.execute(
+            update(PrintJob).where(PrintJob.id.in_(ids), claimable, ~in_flight)
+            .values(status="sending", claimed_by=event_bus.worker_id, claimed_at=now)
+            .returning(PrintJob.id, PrintJob.payload)
+            .execution_options(synchronize_session=False)
+        )).all()
+        await db.commit()
+        return sorted(jobs, key=lambda job: job.id)
+
+    async def _drain(self, printer: Printer):
+        """Kuyruktaki işleri sırayla gönderir; hata olursa yazıcıyı beklemeye alır."""
+        factory = get_async_session_factory()
+        while True:
+            async with factory() as db:
+                jobs = await self._claim(db, printer)
+            if not jobs:
+                return
+
+            ids = [job.id for job in jobs]
+            try:
+                # Ardışık fişler tek bağlantıda, art arda gönderilir
+                await self._send(printer, b"".join(job.payload for job in jobs))
+            except Exception as e:
+                # Bekleme yazıcı başınadır: kapalı yazıcıda fiş sırası korunur
+                printer.failures += 1
+                delay = min(PRINT_RETRY_MAX_SECONDS, PRINT_RETRY_BASE_SECONDS * 2 ** (printer.failures - 1))
+                printer.retry_at = datetime.now() + timedelta(seconds=delay)
+                printer.online = False
+                printer.last_error = f"{type(e).__name__}: {e}"
+                logger.warning(f"Yazıcı {printer.name} ({printer.host}:{printer.port}) hata: {e}; {len(ids)} iş, {delay:.0f} sn sonra tekrar")
+                async with factory() as db:
+                    await db.execute(
+                        update(PrintJob).where(PrintJob.id.in_(ids)).values(
+                            attempts=PrintJob.attempts + 1, last_error=printer.last_error, claimed_by=None, claimed_at=None,
+                            status=case((PrintJob.attempts + 1 >= PRINT_MAX_ATTEMPTS, "failed"), else_="queued")
+                        )
+                    )
+                    await db.commit()
+                return
+
+            printer.failures = 0
+            printer.retry_at = None
+            printer.online = True
+            printer.last_success_at = datetime.now()
+            printer.printed += len(ids)
+            async with factory() as db:
+                await db.execute(
+                    update(PrintJob).where(PrintJob.id.in_(ids))
+                    .values(status="done", printed_at=printer.last_success_at, attempts=PrintJob.attempts + 1,
+                            claimed_by=None, claimed_at=None)
+                )
+                await db.commit()
+
+    async def _worker(self, printer: Printer):
+        wake = self._wake[printer.name]
+        while True:
+            if printer.retry_at is not None:
+                await asyncio.sleep(max(0.0, (printer.retry_at - datetime.now()).total_seconds()))
+            wake.clear()
+            try:
+                await self._drain(printer)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Yazıcı worker hatası ({printer.name}): {e}")
+                printer.retry_at = datetime.now() + timedelta(seconds=PRINT_RETRY_BASE_SECONDS)
+            if printer.retry_at is None:
+                await wake.wait()
+
+    async def status(self) -> Dict[str, Any]:
+        async with get_async_session_factory()() as db:
+            counts = (await db.execute(
+                select(PrintJob.printer, PrintJob.status, func.count())
+                .filter(PrintJob.status.in_(("queued", "sending", "failed")))
+                .group_by(PrintJob.printer, PrintJob.status)
+            )).all()
+        queue = {(printer, status): count for printer, status, count in counts}
+        return {
+            "enabled": self.enabled,
+            "printers": [{
+                "name": p.name, "host": p.host, "port": p.port, "online": p.online,
+                "queued": queue.get((p.name, "queued"), 0), "sending": queue.get((p.name, "sending"), 0),
+                "failed": queue.get((p.name, "failed"), 0),
+                "printed": p.printed, "connections": p.connections,
+                "last_error": p.last_error, "last_success_at": p.last_success_at, "retry_at": p.retry_at,
+            } for p in self.printers.values()]
+        }
+
+
+print_spooler = PrintSpooler(parse_printers(os.getenv("PRINTERS", "")))
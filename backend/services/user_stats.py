@@ -0,0 +1,262 @@
+import asyncio
+import glob
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from typing import IO, Dict, List, Optional
+from sqlalchemy import select, update, func
+from models import UserStats, get_async_session_factory
+
+logger = logging.getLogger("user_stats")
+
+JOURNAL_SUFFIXES = (".flushing", ".lock", ".tmp")
+# Kendi journal kilidini başka işçi geçici olarak tutuyorsa (açılışta recover) beklenecek süre
+LOCK_WAIT_SECONDS = 5.0
+
+
+def try_lock(path: str) -> Optional[IO]:
+    """path üzerinde engellemeyen özel kilit; alınamazsa None. Dosya kapanınca kilit bırakılır."""
+    while True:
+        handle = open(path, "a+")
+        try:
+            if os.name == "nt":
+                import msvcrt
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return None
+        # Açma ile kilitleme arasında dosya silinmiş (ve belki yeniden yaratılmış)
+        # olabilir: kilit yalnızca yoldaki güncel dosyadaysa geçerlidir
+        try:
+            if os.fstat(handle.fileno()).st_ino == os.stat(path).st_ino:
+                return handle
+        except FileNotFoundError:
+            pass
+        handle.close()
+
+
+def unlock_and_remove(handle: IO, path: str):
+    """Kilit dosyasını kilit hâlâ tutulurken siler, sonra bırakır."""
+    try:
+        os.remove(path)
+    except OSError:
+        pass  # Windows'ta açık dosya silinemez
+    handle.close()
+
+
+class UserStatsAggregator:
+    """
+    UserStats ciro/bahşiş artışlarını bellekte biriktirir ve periyodik olarak
+    kullanıcı başına tek "total = total + :delta" UPDATE ile yazar.
+
+    Her artış önce journal dosyasına (JSON satırı) eklenir; süreç çökerse
+    açılışta recover() yazılmamış artışları geri yükler. Flush sırasında
+    journal ".flushing" adına taşınır ve commit sonrası silinir. Commit ile
+    silme arasındaki çok kısa pencerede çökme olursa o parti iki kez
+    uygulanabilir (en az bir kez).
+
+    Her işçi kendi journal'ını ("<journal_base>.<worker>") yazar ve süreç
+    boyunca "<journal>.lock" üzerinde özel kilit tutar. Kilidi alınabilen
+    journal'ın sahibi yaşamıyordur; recover() bu sahipsiz journal'ları
+    kilitleyerek devralır, böylece iki işçi aynı artışları uygulamaz.
+    """
+
+    def __init__(self, journal_base: str, flush_interval: float = 5.0, worker: Optional[str] = None):
+        self.journal_base = journal_base
+        self.journal_path = f"{journal_base}.{worker or os.getpid()}"
+        self.flushing_path = self.journal_path + ".flushing"
+        self.flush_interval = flush_interval
+        self._pending: Dict[int, List[float]] = defaultdict(lambda: [0.0, 0.0])
+        self._flushing: Dict[int, List[float]] = {}
+        self._journal = None
+        self._owner_lock: Optional[IO] = None
+        self._lock = asyncio.Lock()
+        self.flushes = 0
+
+    def _acquire(self):
+        if self._owner_lock is None:
+            directory = os.path.dirname(self.journal_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Açılışta başka bir işçinin recover()'ı bu kilidi kısa süre tutabilir
+            deadline = time.monotonic() + LOCK_WAIT_SECONDS
+            self._owner_lock = try_lock(self.journal_path + ".lock")
+            while self._owner_lock is None and time.monotonic() < deadline:
+                time.sleep(0.05)
+                self._owner_lock = try_lock(self.journal_path + ".lock")
+            if self._owner_lock is None:
+                raise RuntimeError(f"UserStats journal'ı başka bir süreçte açık: {self.journal_path}")
+
+    def _open_journal(self):
+        if self._journal is None:
+            self._acquire()
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        return self._journal
+
+    def _close_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def _append(self, user_id: int, score: float, tips: float):
+        journal = self._open_journal()
+        journal.write(json.dumps({"u": user_id, "s": score, "t": tips}) + "\n")
+        journal.flush()
+
+    @staticmethod
+    def _read(path: str) -> Dict[int, List[float]]:
+        deltas: Dict[int, List[float]] = defaultdict(lambda: [0.0, 0.0])
+        if not os.path.exists(path):
+            return deltas
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # çökme anında yarım kalmış son satır
+                deltas[int(entry["u"])][0] += float(entry["s"])
+                deltas[int(entry["u"])][1] += float(entry["t"])
+        return deltas
+
+    def credit(self, user_id: int, score: float, tips: float = 0.0):
+        """Artışı journal'a yazar ve bekleyen deltaya ekler (DB'ye dokunmaz)."""
+        if not score and not tips:
+            return
+        self._append(user_id, score, tips)
+        pending = self._pending[user_id]
+        pending[0] += score
+        pending[1] += tips
+
+    def pending(self, user_id: int) -> Dict[str, float]:
+        # Flush sürerken commit edilmemiş parti de bekleyen sayılır
+        score, tips = self._pending.get(user_id, (0.0, 0.0))
+        flushing = self._flushing.get(user_id, (0.0, 0.0))
+        return {"total_sales_score": score + flushing[0], "total_tips_collected": tips + flushing[1]}
+
+    async def get(self, user_id: int) -> Dict[str, float]:
+        """Kalıcı değer + henüz yazılmamış delta."""
+        async with get_async_session_factory()() as db:
+            row = (await db.execute(
+                select(UserStats.total_sales_score, UserStats.total_tips_collected).filter(UserStats.user_id == user_id)
+            )).first()
+        pending = self.pending(user_id)
+        return {
+            "user_id": user_id,
+            "total_sales_score": float((row and row[0]) or 0.0) + pending["total_sales_score"],
+            "total_tips_collected": float((row and row[1]) or 0.0) + pending["total_tips_collected"],
+            "pending_sales_score": pending["total_sales_score"],
+        }
+
+    def _orphans(self) -> List[str]:
+        """Bu işçinin dışındaki journal'lar (eski tek dosyalı "<journal_base>" dahil)."""
+        paths = {self.journal_base}
+        for path in glob.glob(glob.escape(self.journal_base) + ".*"):
+            for suffix in JOURNAL_SUFFIXES:
+                if path.endswith(suffix):
+                    path = path[:-len(suffix)]
+            paths.add(path)
+        paths.discard(self.journal_path)
+        return sorted(paths)
+
+    def recover(self):
+        """
+        Bu işçinin önceki çalışmasından ve çökmüş diğer işçilerden kalan
+        journal / yarım flush dosyalarını bekleyen deltaya yükler. Sahibi
+        yaşayan (kilitli) journal'lara dokunulmaz.
+        """
+        self._close_journal()
+        self._acquire()
+        recovered = 0
+        taken = []
+        for journal in [self.journal_path] + self._orphans():
+            lock = None
+            if journal != self.journal_path:
+                lock = try_lock(journal + ".lock")
+                if lock is None:
+                    continue  # sahibi çalışıyor
+                taken.append((journal, lock))
+            for path in (journal + ".flushing", journal):
+                for user_id, (score, tips) in self._read(path).items():
+                    self._pending[user_id][0] += score
+                    self._pending[user_id][1] += tips
+                    recovered += 1
+        if recovered:
+            # Tek journal'da birleştir, sonra eski dosyaları kaldır
+            tmp_path = self.journal_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for user_id, (score, tips) in self._pending.items():
+                    f.write(json.dumps({"u": user_id, "s": score, "t": tips}) + "\n")
+            os.replace(tmp_path, self.journal_path)
+            if os.path.exists(self.flushing_path):
+                os.remove(self.flushing_path)
+            logger.info(f"UserStats journal'larından {recovered} bekleyen artış geri yüklendi")
+        for journal, lock in taken:
+            for path in (journal + ".flushing", journal):
+                if os.path.exists(path):
+                    os.remove(path)
+            unlock_and_remove(lock, journal + ".lock")
+
+    async def _apply(self, batch: Dict[int, List[float]]):
+        async with get_async_session_factory()() as db:
+            for user_id, (score, tips) in batch.items():
+                result = await db.execute(
+                    update(UserStats).where(UserStats.user_id == user_id).values(
+                        total_sales_score=func.coalesce(UserStats.total_sales_score, 0.0) + score,
+                        total_tips_collected=func.coalesce(UserStats.total_tips_collected, 0.0) + tips
+                    ).execution_options(synchronize_session=False)
+                )
+                if result.rowcount == 0:
+                    db.add(UserStats(user_id=user_id, total_sales_score=score, total_tips_collected=tips))
+            await db.commit()
+
+    async def flush(self):
+        async with self._lock:
+            if not self._pending:
+                return
+            batch = self._flushing = dict(self._pending)
+            self._pending.clear()
+            self._close_journal()
+            os.replace(self.journal_path, self.flushing_path)
+            try:
+                await self._apply(batch)
+            except Exception as e:
+                # Yazılamayan deltalar geri alınır ve yeni journal'a taşınır
+                logger.warning(f"UserStats flush hatası: {e}")
+                for user_id, (score, tips) in batch.items():
+                    self.credit(user_id, score, tips)
+                os.remove(self.flushing_path)
+                return
+            finally:
+                self._flushing = {}
+            os.remove(self.flushing_path)
+            self.flushes += 1
+
+    def close(self):
+        """Kapanışta (flush sonrası): journal kapatılır ve kilit bırakılır."""
+        self._close_journal()
+        if self._owner_lock is not None:
+            if not os.path.exists(self.journal_path) and not os.path.exists(self.flushing_path):
+                unlock_and_remove(self._owner_lock, self.journal_path + ".lock")
+            else:
+                self._owner_lock.close()
+            self._owner_lock = None
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def stats(self) -> Dict[str, float]:
+        return {"pending_users": len(self._pending), "flushes": self.flushes, "journal": self.journal_path}
+
+
+user_stats = UserStatsAggregator(
+    journal_base=os.getenv("USER_STATS_JOURNAL", "user_stats.journal"),
+    flush_interval=float(os.getenv("USER_STATS_FLUSH_SECONDS", "5")),
+)
@@ -1,39 +1,587 @@
 import json
 import asyncio
+import logging
+import os
+import time
+import uuid
+import zlib
+from collections import Counter, deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple, Union
+from fastapi import WebSocket
+from services.event_bus import event_bus
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+logger = logging.getLogger("websocket")
+
+# Soket başına giden kuyruk: dolunca drop_oldest (en eskiyi at), coalesce
+# (aynı türdeki bekleyen en eski mesajı at) veya disconnect (soketi kapat)
+WS_QUEUE_SIZE = int(os.getenv("WS_QUEUE_SIZE", "100"))
+WS_QUEUE_POLICY = os.getenv("WS_QUEUE_POLICY", "drop_oldest").lower()
+WS_SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "10"))
+QUEUE_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+# Yeniden bağlanan istemcilere tekrar gönderilebilecek son sipariş olayı sayısı
+WS_REPLAY_BUFFER = int(os.getenv("WS_REPLAY_BUFFER", "1000"))
+# Sunucu bu aralıkla "ping" gönderir; bu süre boyunca hiçbir mesajı (pong
+# dahil) gelmeyen yarı açık soket kapatılır (0 = kapatma yok)
+WEBSOCKET_PING_INTERVAL = float(os.getenv("WEBSOCKET_PING_INTERVAL", "30"))
+WEBSOCKET_IDLE_TIMEOUT = float(os.getenv("WEBSOCKET_IDLE_TIMEOUT", "75"))
+# Sipariş olaylarını birleştirme penceresi (ms); 0 = her olay hemen gönderilir
+WS_COALESCE_MS = float(os.getenv("WS_COALESCE_MS", "0"))
+# İstemcinin register'da isteyebileceği kodlamalar ("compress": true ile +deflate)
+WS_ENCODINGS = ("json", "msgpack")
+WS_DEFLATE_LEVEL = int(os.getenv("WS_DEFLATE_LEVEL", "6"))
+
+
+class Frame(str):
+    """
+    Bir kez serileştirilmiş JSON mesajı (metin kare olarak doğrudan
+    gönderilir). İkili kodlama isteyen soketler için msgpack / deflate
+    karşılığı ilk ihtiyaçta üretilir ve mesajda saklanır: yayın, kaç soket
+    olursa olsun kodlama başına bir kez kodlanır.
+    """
+
+    def __new__(cls, message: Any):
+        frame = super().__new__(cls, json.dumps(message))
+        frame.message = message
+        frame._encoded = {}
+        return frame
+
+    def payload(self, encoding: str) -> Union[str, bytes]:
+        if encoding == "json":
+            return self
+        data = self._encoded.get(encoding)
+        if data is None:
+            fmt, _, compress = encoding.partition("+")
+            data = msgpack.packb(self.message) if fmt == "msgpack" else str.encode(self)
+            if compress:
+                # Ham deflate (tarayıcıda DecompressionStream("deflate-raw"))
+                deflater = zlib.compressobj(WS_DEFLATE_LEVEL, zlib.DEFLATED, -15)
+                data = deflater.compress(data) + deflater.flush()
+            self._encoded[encoding] = data
+        return data
+
+
+def encode_message(message: Any) -> Frame:
+    """Mesaj bir kez serileştirilir; aynı kare tüm hedeflere gönderilir."""
+    return Frame(message)
+
+
+def negotiate_encoding(encoding: Optional[str], compress: bool = False) -> str:
+    """register'daki isteğe göre soketin kodlaması; desteklenmeyen istek json'a düşer."""
+    fmt = encoding if encoding in WS_ENCODINGS else "json"
+    if fmt == "msgpack" and msgpack is None:
+        logger.warning("msgpack kurulu değil; istemci json ile devam ediyor")
+        fmt = "json"
+    return f"{fmt}+deflate" if compress else fmt
+
+
+class Outbox:
+    """
+    Bir soketin sınırlı giden kuyruğu ve yazıcı görevi. Yayın yapan taraf
+    yalnızca kuyruğa ekler, ağ yazımını beklemez; yavaş bir telefon mutfağa
+    giden mesajları geciktirmez.
+    """
+
+    def __init__(self, websocket: WebSocket, client_type: str, station: Optional[str], table_number: Optional[int],
+                 encoding: str = "json"):
+        self.websocket = websocket
+        self.client_type = client_type
+        self.station = station
+        self.table_number = table_number
+        self.encoding = encoding
+        self.queue: Deque[Tuple[Optional[str], str]] = deque()  # (tür, metin)
+        self.dropped = 0
+        self.sending = False
+        self._wake = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.last_seen = time.monotonic()
+
+    def put(self, text: str, kind: Optional[str], policy: str, limit: int) -> bool:
+        """Mesajı kuyruğa ekler; disconnect politikasında kuyruk doluysa False döner."""
+        if len(self.queue) >= limit:
+            if policy == "disconnect":
+                return False
+            index = 0
+            if policy == "coalesce" and kind is not None:
+                # Aynı türde bekleyen mesaj varsa yenisi onun yerine geçer
+                index = next((i for i, (k, _) in enumerate(self.queue) if k == kind), 0)
+            del self.queue[index]
+            self.dropped += 1
+        self.queue.append((kind, text))
+        self._wake.set()
+        return True
+
+    async def run(self, on_error):
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            while self.queue:
+                _, text = self.queue.popleft()
+                self.sending = True
+                try:
+                    if self.encoding == "json":
+                        send = self.websocket.send_text(text)
+                    else:
+                        frame = text if isinstance(text, Frame) else Frame(json.loads(text))
+                        send = self.websocket.send_bytes(frame.payload(self.encoding))
+                    await asyncio.wait_for(send, WS_SEND_TIMEOUT_SECONDS)
+                except Exception as e:
+                    on_error(self, e)
+                    return
+                finally:
+                    self.sending = False
+
+
+class ConnectionManager:
+    def __init__(self, queue_size: int = WS_QUEUE_SIZE, policy: str = WS_QUEUE_POLICY,
+                 ping_interval: float = WEBSOCKET_PING_INTERVAL, idle_timeout: float = WEBSOCKET_IDLE_TIMEOUT):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"WS_QUEUE_POLICY {QUEUE_POLICIES} değerlerinden biri olmalı: {policy}")
+        self.queue_size = queue_size
+        self.policy = policy
+        self.ping_interval = ping_interval
+        self.idle_timeout = idle_timeout
+        self.outboxes: Dict[WebSocket, Outbox] = {}
+        self._closing: set = set()
+        self.connects: Counter = Counter()
+        self.disconnects: Counter = Counter()
+        self.dropped: Counter = Counter()
+        self.reaped: Counter = Counter()
+        self.idle_reaped: Counter = Counter()
+        # active_connections kitchen/admin soketlerini de içerir
+        self.active_connections: List[WebSocket] = []
+        self.kitchen_connections: List[WebSocket] = []
+        self.admin_connections: List[WebSocket] = []
+        # İstasyona kayıtlı mutfak ekranları yalnızca kendi kalemlerini alır
+        self.station_connections: Dict[str, List[WebSocket]] = {}
+        # Masa numarasıyla kayıtlı müşteriler yalnızca kendi masasının siparişlerini alır
+        self.table_connections: Dict[int, List[WebSocket]] = {}
+
+    async def connect(self, websocket: WebSocket, client_type: str = "customer", station: Optional[str] = None, table_number: Optional[int] = None,
+                      encoding: str = "json"):
+        if encoding != "json":
+            # İstemci kareleri nasıl çözeceğini bilsin: bu kare her zaman JSON metin
+            await websocket.send_text(encode_message({"type": "encoding", "encoding": encoding}))
+        outbox = Outbox(websocket, client_type, station, table_number, encoding)
+        outbox.task = asyncio.create_task(outbox.run(self._send_failed))
+        self.outboxes[websocket] = outbox
+        self.connects[client_type] += 1
+        if client_type == "customer" and table_number is not None:
+            self.table_connections.setdefault(table_number, []).append(websocket)
+        if client_type == "kitchen" and station:
+            self.station_connections.setdefault(station, []).append(websocket)
+            logger.info(f"WS Connected: kitchen/{station}")
+            return
+        self.active_connections.append(websocket)
+        if client_type == "kitchen":
+            self.kitchen_connections.append(websocket)
+        elif client_type == "admin":
+            self.admin_connections.append(websocket)
+        logger.info(f"WS Connected: {client_type}")
+
+    def disconnect(self, websocket: WebSocket, client_type: str = "customer", station: Optional[str] = None, table_number: Optional[int] = None):
+        outbox = self.outboxes.pop(websocket, None)
+        if outbox is None:
+            return
+        self.disconnects[client_type] += 1
+        self.dropped[client_type] += outbox.dropped
+        if outbox.task is not None and outbox.task is not asyncio.current_task():
+            # İptal işlenene kadar göreve referans tutulur (yoksa GC yok edebilir)
+            self._closing.add(outbox.task)
+            outbox.task.add_done_callback(self._closing.discard)
+            outbox.task.cancel()
+        for index, key in ((self.station_connections, station), (self.table_connections, table_number)):
+            if key in index:
+                if websocket in index[key]: index[key].remove(websocket)
+                if not index[key]: del index[key]
+        if websocket in self.active_connections: self.active_connections.remove(websocket)
+        if client_type == "kitchen" and websocket in self.kitchen_connections: self.kitchen_connections.remove(websocket)
+        if client_type == "admin" and websocket in self.admin_connections: self.admin_connections.remove(websocket)
+        logger.info(f"WS Disconnected: {client_type}")
+
+    def reap(self, outbox: Outbox, reason: str):
+        """Ölü veya geride kalan soketi listelerden çıkarır ve kapatır."""
+        if self.outboxes.get(outbox.websocket) is not outbox:
+            return
+        self.reaped[outbox.client_type] += 1
+        logger.warning(f"WS reaped ({outbox.client_type}): {reason}")
+        self.disconnect(outbox.websocket, outbox.client_type, outbox.station, outbox.table_number)
+        task = asyncio.create_task(outbox.websocket.close(code=1013))
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    def _send_failed(self, outbox: Outbox, error: Exception):
+        reason = "gönderim zaman aşımı" if isinstance(error, asyncio.TimeoutError) else f"{type(error).__name__}: {error}"
+        self.reap(outbox, reason)
+
+    def touch(self, websocket: WebSocket):
+        """İstemciden mesaj (pong dahil) geldi: soket canlı."""
+        outbox = self.outboxes.get(websocket)
+        if outbox is not None:
+            outbox.last_seen = time.monotonic()
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """
+        idle_timeout boyunca sesi çıkmayan soketleri kapatır, kalanlara ping
+        kuyruklar. Yarı açık telefon bağlantıları TCP fark edene kadar (saatler)
+        her yayında bir gönderime mal olmaz. Kapatılan soket sayısını döner.
+        """
+        now = time.monotonic() if now is None else now
+        stale = [o for o in self.outboxes.values() if self.idle_timeout > 0 and now - o.last_seen > self.idle_timeout]
+        for outbox in stale:
+            self.idle_reaped[outbox.client_type] += 1
+            self.reap(outbox, f"{now - outbox.last_seen:.0f} sn yanıt yok")
+        if self.outboxes:
+            self.fanout_nowait(encode_message({"type": "ping", "ts": int(time.time())}), list(self.outboxes), kind="ping")
+        return len(stale)
+
+    async def heartbeat(self):
+        """Arka plan görevi: ping_interval'da bir sweep()."""
+        while self.ping_interval > 0:
+            await asyncio.sleep(self.ping_interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"WS heartbeat hatası: {e}")
+
+    def fanout_nowait(self, text: str, targets: Iterable[WebSocket], kind: Optional[str] = None):
+        for ws in targets:
+            self.send_message(ws, text, kind)
+
+    async def fanout(self, text: str, *groups: Iterable[WebSocket], kind: Optional[str] = None):
+        """
+        Önceden serileştirilmiş mesajı gruplardaki soketlerin kuyruklarına
+        ekler; ağ yazımı her soketin kendi görevinde yapılır. Birden çok
+        grupta bulunan soket mesajı bir kez alır.
+        """
+        self.fanout_nowait(text, list(dict.fromkeys(ws for group in groups for ws in group)), kind)
+
+    async def broadcast_to_all(self, message: dict):
+        await self.fanout(encode_message(message), self.active_connections, kind=message.get("type"))
+
+    async def broadcast_to_kitchen(self, message: dict):
+        await self.fanout(encode_message(message), self.kitchen_connections, kind=message.get("type"))
+
+    async def broadcast_to_station(self, station: str, text: str, kind: Optional[str] = None):
+        await self.fanout(text, self.station_connections.get(station, ()), kind=kind)
+
+    async def broadcast_to_table(self, table_number: int, text: str, kind: Optional[str] = None):
+        await self.fanout(text, self.table_connections.get(table_number, ()), kind=kind)
+
+    async def broadcast_to_admin(self, message: dict):
+        await self.fanout(encode_message(message), self.admin_connections, kind=message.get("type"))
+
+    def send_message(self, websocket: WebSocket, message: str, kind: Optional[str] = None):
+        outbox = self.outboxes.get(websocket)
+        if outbox is not None and not outbox.put(message, kind, self.policy, self.queue_size):
+            self.reap(outbox, f"kuyruk dolu ({self.queue_size})")
+
+    async def idle(self):
+        """Tüm kuyruklar boşalana kadar bekler (testler ve kapanış için)."""
+        while any(o.queue or o.sending for o in self.outboxes.values()):
+            await asyncio.sleep(0.001)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        İstemci türüne göre canlı bağlantı, kuyruk derinliği, toplam bağlanma/
+        kopma, atılan mesaj, kapatılan (idle: yanıtsızlıktan) soket sayıları
+        ve canlı soketlerin kodlamaları.
+        """
+        def entry_for(client_type: str) -> Dict[str, Any]:
+            return types.setdefault(client_type, {"connections": 0, "queued": 0, "max_depth": 0, "dropped": 0, "reaped": 0,
+                                                  "idle_reaped": 0, "connects": 0, "disconnects": 0, "encodings": Counter()})
+
+        types: Dict[str, Dict[str, Any]] = {}
+        for outbox in self.outboxes.values():
+            entry = entry_for(outbox.client_type)
+            entry["connections"] += 1
+            entry["queued"] += len(outbox.queue)
+            entry["max_depth"] = max(entry["max_depth"], len(outbox.queue))
+            entry["dropped"] += outbox.dropped
+            entry["encodings"][outbox.encoding] += 1
+        for client_type in set(self.connects) | set(self.dropped) | set(self.reaped):
+            entry = entry_for(client_type)
+            entry["dropped"] += self.dropped[client_type]
+            entry["reaped"] = self.reaped[client_type]
+            entry["idle_reaped"] = self.idle_reaped[client_type]
+            entry["connects"] = self.connects[client_type]
+            entry["disconnects"] = self.disconnects[client_type]
+        return {"policy": self.policy, "queue_size": self.queue_size, "ping_interval": self.ping_interval,
+                "idle_timeout": self.idle_timeout, "clients": types}
+
 
 # Global connection manager reference
 # main.py içindeki manager nesnesine buradan erişeceğiz
 manager = None
 
+class OrderEventLog:
+    """
+    Sipariş olaylarına artan sıra numarası (seq) verir ve son WS_REPLAY_BUFFER
+    olayı halkasal tamponda tutar. Numaralar işçi başınadır; epoch işçinin
+    her açılışta değişen kimliğidir, başka işçiden/önceki çalışmadan gelen
+    last_seq tam yeniden yüklemeye (resync) düşer.
+    """
+
+    def __init__(self, size: int = WS_REPLAY_BUFFER):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.seq = 0
+        self._events: Deque[Tuple[int, str, Any]] = deque(maxlen=size)
+        self.replayed = 0
+        self.resyncs = 0
+
+    def append(self, update_type: str, message) -> int:
+        self.seq += 1
+        self._events.append((self.seq, update_type, message))
+        return self.seq
+
+    def since(self, last_seq: int, epoch: Optional[str]) -> Optional[List[Tuple[int, str, Any]]]:
+        """last_seq'ten sonraki olaylar; tampon dönmüşse veya epoch farklıysa None."""
+        if epoch != self.epoch or last_seq > self.seq:
+            return None
+        oldest = self._events[0][0] if self._events else self.seq + 1
+        if last_seq < oldest - 1:
+            return None
+        return [event for event in self._events if event[0] > last_seq]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"epoch": self.epoch, "seq": self.seq, "buffered": len(self._events),
+                "replayed": self.replayed, "resyncs": self.resyncs}
+
+
+order_log = OrderEventLog()
+
+
 def set_connection_manager(connection_manager):
     """Main.py tarafından çağrılır ve manager'ı set eder"""
     global manager
     manager = connection_manager
 
-async def broadcast_order_update(message: dict, update_type: str = "order_updated"):
+def station_routes(entry: Dict[str, Any]) -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    Bir sipariş mesajının istasyon bazlı kopyaları (istasyon -> mesaj).
+    Kalemler istasyonlarına göre tek geçişte bölünür; kalemi olmayan durum
+    mesajları "stations" alanındaki istasyonlara gider. None: herkese gider.
+    """
+    items = entry.get("items")
+    if items and "station" in items[0]:
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for item in items:
+            groups.setdefault(item["station"], []).append(item)
+        return {station: {**entry, "items": subset} for station, subset in groups.items()}
+    if "stations" in entry:
+        return {station: entry for station in entry["stations"]}
+    return None
+
+
+def station_payloads(message, stations: Iterable[str]) -> Dict[str, Any]:
+    """Bağlı her istasyon için süzülmüş data; ilgisiz istasyonlar atlanır."""
+    entries = message if isinstance(message, list) else [message]
+    routes = [(entry, station_routes(entry)) for entry in entries]
+    payloads = {}
+    for station in stations:
+        subset = [entry if route is None else route[station] for entry, route in routes if route is None or station in route]
+        if subset:
+            payloads[station] = subset if isinstance(message, list) else subset[0]
+    return payloads
+
+
+def table_payloads(message, tables: Dict[int, Any]) -> Dict[int, Any]:
+    """Abonesi olan her masa için yalnızca o masanın sipariş(ler)i."""
+    entries = message if isinstance(message, list) else [message]
+    groups: Dict[int, List[Dict[str, Any]]] = {}
+    for entry in entries:
+        if entry.get("table_number") in tables:
+            groups.setdefault(entry["table_number"], []).append(entry)
+    return {table: subset if isinstance(message, list) else subset[0] for table, subset in groups.items()}
+
+
+async def broadcast_order_update(message, update_type: str = "order_updated"):
     """
     Sipariş güncellemelerini (yeni sipariş, durum değişimi) ilgili herkese duyurur.
+    Toplu işlemlerde (ör. "orders_created") data bir liste olur.
+    Mesaj bu işçinin soketlerine gönderilir ve olay yoluyla diğer işçilere
+    iletilir; her işçi kendi soketlerine yayar.
+    """
+    await deliver_order_update(message, update_type)
+    event_bus.publish("ws", {"kind": "order_update", "type": update_type, "data": message})
+
+def order_frame(update_type: str, data, seq: int) -> str:
+    return encode_message({"type": update_type, "data": data, "seq": seq, "epoch": order_log.epoch})
+
+def client_payload(outbox: Outbox, message):
+    """Mesajın bu soketin göreceği kısmı (mutfak istasyonu / masa süzgeci); yoksa None."""
+    if outbox.client_type == "kitchen":
+        return station_payloads(message, [outbox.station]).get(outbox.station) if outbox.station else message
+    if outbox.client_type == "admin":
+        return message
+    if outbox.table_number is not None:
+        return table_payloads(message, {outbox.table_number}).get(outbox.table_number)
+    return None
+
+async def replay_order_updates(websocket: WebSocket, last_seq: Optional[int], epoch: Optional[str]):
+    """
+    Yeniden bağlanan istemciye kaçırdığı sipariş olaylarını (seq > last_seq)
+    kendi süzgecinden geçirerek gönderir. Olaylar tampondan düşmüşse veya
+    giden kuyruğa sığmayacaksa {"type": "resync"} gönderilir; istemci listeyi
+    baştan yükler. İlk bağlantıda (last_seq yok) yalnızca güncel konum
+    {"type": "sync"} bildirilir.
+    """
+    outbox = manager.outboxes.get(websocket) if manager else None
+    if outbox is None:
+        return
+    if last_seq is None:
+        manager.send_message(websocket, encode_message({"type": "sync", "seq": order_log.seq, "epoch": order_log.epoch}))
+        return
+    events = order_log.since(last_seq, epoch)
+    if events is None or len(events) > manager.queue_size:
+        order_log.resyncs += 1
+        manager.send_message(websocket, encode_message({"type": "resync", "seq": order_log.seq, "epoch": order_log.epoch}))
+        return
+    for seq, update_type, message in events:
+        data = client_payload(outbox, message)
+        if data is not None:
+            manager.send_message(websocket, order_frame(update_type, data, seq), update_type)
+            order_log.replayed += 1
+
+# Toplu mesaj türleri tek tek olaylara açılır ("orders_created" -> "order_created")
+EVENT_TYPES = {"orders_created": "order_created", "orders_updated": "order_updated"}
+
+
+class OrderCoalescer:
+    """
+    Pencere (WS_COALESCE_MS) boyunca gelen sipariş olaylarını biriktirir ve
+    her hedef kitleye (mutfak+admin, istasyon, masa) tek kare gönderir:
+    birden çok olay {"type": "orders_batch", "data": [{type, data, seq}...]}
+    olur, tek olay eski biçimiyle gider. Aynı siparişin pencere içindeki
+    art arda güncellemelerinden yalnızca sonuncusu gönderilir.
     """
+
+    def __init__(self, window_ms: float = WS_COALESCE_MS):
+        self.window = window_ms / 1000
+        self._pending: Dict[Tuple, Tuple[int, str, Dict[str, Any]]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self.events = 0
+        self.collapsed = 0
+        self.frames_sent = 0
+        self.frames_saved = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    def add(self, update_type: str, message, seq: int):
+        event_type = EVENT_TYPES.get(update_type, update_type)
+        for entry in message if isinstance(message, list) else [message]:
+            self.events += 1
+            # Yeni sipariş olayları hiç atılmaz; güncellemeler sipariş başına sonuncuya iner
+            key = (event_type, entry.get("id")) if event_type == "order_updated" else (event_type, seq, entry.get("id"))
+            if self._pending.pop(key, None) is not None:
+                self.collapsed += 1
+            self._pending[key] = (seq, event_type, entry)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.window)
+        self._flush_task = None
+        self.flush()
+
+    def _send(self, events: List[Tuple[int, str, Any]], *groups: Iterable[WebSocket]):
+        targets = list(dict.fromkeys(ws for group in groups for ws in group))
+        if not events or not targets:
+            return
+        if len(events) == 1:
+            seq, kind, data = events[0]
+            text = order_frame(kind, data, seq)
+        else:
+            kind = "orders_batch"
+            text = encode_message({"type": kind, "data": [{"type": t, "data": d, "seq": q} for q, t, d in events],
+                                   "seq": events[-1][0], "epoch": order_log.epoch})
+        manager.fanout_nowait(text, targets, kind)
+        self.frames_sent += len(targets)
+        self.frames_saved += (len(events) - 1) * len(targets)
+
+    def flush(self):
+        events = sorted(self._pending.values(), key=lambda event: event[0])
+        self._pending = {}
+        if not events or not manager:
+            return
+        self._send(events, manager.kitchen_connections, manager.admin_connections)
+        for station, connections in list(manager.station_connections.items()):
+            routed = [(q, t, station_payloads(e, [station]).get(station)) for q, t, e in events]
+            self._send([event for event in routed if event[2] is not None], connections)
+        for table, connections in list(manager.table_connections.items()):
+            self._send([event for event in events if event[2].get("table_number") == table], connections)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"window_ms": self.window * 1000, "events": self.events, "collapsed": self.collapsed,
+                "frames_sent": self.frames_sent, "frames_saved": self.frames_saved,
+                "pending": len(self._pending)}
+
+
+coalescer = OrderCoalescer()
+
+
+async def deliver_order_update(message, update_type: str):
+    """Sipariş mesajını yalnızca bu işçiye bağlı soketlere gönderir."""
+    seq = order_log.append(update_type, message)
+    if manager and coalescer.enabled:
+        coalescer.add(update_type, message, seq)
+        return
     if manager:
-        full_message = {
-            "type": update_type,
-            "data": message
-        }
-        # 1. Mutfağa gönder (Sipariş düştü sesi için)
-        await manager.broadcast_to_kitchen(full_message)
-        
-        # 2. Admine gönder (Takip için)
-        await manager.broadcast_to_admin(full_message)
-        
-        # 3. Müşterilere gönder (Sipariş durumu değişti bildirimi için)
-        # Not: İdeal dünyada sadece o masaya gönderilmeli ama şimdilik broadcast OK.
-        await manager.broadcast_to_all(full_message)
-
-async def broadcast_to_admin(message: dict):
+        full_message = order_frame(update_type, message, seq)
+        # Mutfak (sipariş düştü sesi) ve admin (takip) tek hedef kümesi:
+        # her soket mesajı bir kez alır
+        sends = [manager.fanout(full_message, manager.kitchen_connections, manager.admin_connections, kind=update_type)]
+
+        # Müşteriler (durum bildirimi): yalnızca siparişin masasına kayıtlı
+        # telefonlar; başka masaların sipariş içeriği gönderilmez
+        if manager.table_connections:
+            sends += [
+                manager.broadcast_to_table(table, order_frame(update_type, data, seq), update_type)
+                for table, data in table_payloads(message, manager.table_connections).items()
+            ]
+
+        # İstasyon ekranları: her istasyona yalnızca kendi kalemleri,
+        # istasyon başına bir kez serileştirilir
+        if manager.station_connections:
+            payloads = station_payloads(message, list(manager.station_connections))
+            sends += [
+                manager.broadcast_to_station(station, order_frame(update_type, data, seq), update_type)
+                for station, data in payloads.items()
+            ]
+        await asyncio.gather(*sends)
+
+async def broadcast_to_admin(message: dict, local: bool = False):
     """
     SADECE Admin paneline mesaj gönderir.
     Örn: Garson Çağrısı, Acil Durum, Sistem Hatası
+    local=True: yalnızca bu işçinin admin soketleri (her işçinin kendisi
+    ürettiği bildirimler için, ör. sipariş zaman aşımı).
     """
     if manager:
         # message objesi { "type": "waiter_call", "table_name": "...", "message": "..." } formatında olmalı
-        await manager.broadcast_to_admin(message)
\ No newline at end of file
+        await manager.broadcast_to_admin(message)
+    if not local:
+        event_bus.publish("ws", {"kind": "admin", "message": message})
+
+async def handle_bus_event(event: dict):
+    """Diğer işçilerden gelen WebSocket olaylarını yerel soketlere yayar."""
+    if event["kind"] == "order_update":
+        await deliver_order_update(event["data"], event["type"])
+    elif event["kind"] == "admin" and manager:
+        await manager.broadcast_to_admin(event["message"])
+
+event_bus.subscribe("ws", handle_bus_event)
+
+async def resync_screens():
+    """Olay yolu kopukken kaçan sipariş olayları için ekranlar listeyi baştan yükler."""
+    if manager:
+        await manager.fanout(encode_message({"type": "resync", "seq": order_log.seq, "epoch": order_log.epoch}),
+                             manager.kitchen_connections, manager.admin_connections,
+                             *manager.station_connections.values(), kind="resync")
+
+event_bus.on_resync(resync_screens)